@@ -0,0 +1,100 @@
+"""
+Adaptive Tracking Rate Control for PeriQuest
+Degrades capture size, frame rate and landmarker input size under load
+"""
+
+from dataclasses import dataclass
+from typing import Tuple, Optional, List, Dict, Any
+
+from eye_events import SlidingWindowStats
+
+@dataclass(frozen=True)
+class OperatingPoint:
+    """One tracker configuration: process every frame_skip-th frame of a
+    capture_size capture, scaled by input_scale before the landmarker"""
+    capture_size: Tuple[int, int]
+    frame_skip: int
+    input_scale: float
+
+    def describe(self, camera_fps: float) -> str:
+        width, height = self.capture_size
+        return (f"{camera_fps / self.frame_skip:.0f} fps @ {width}x{height}"
+                f" (landmarker {int(width * self.input_scale)}x{int(height * self.input_scale)})")
+
+# Best quality first; each step roughly removes a quarter to a half of the work
+OPERATING_POINTS = [
+    OperatingPoint((640, 480), 1, 1.0),
+    OperatingPoint((640, 480), 1, 0.75),
+    OperatingPoint((640, 480), 2, 0.75),
+    OperatingPoint((320, 240), 2, 1.0),
+    OperatingPoint((320, 240), 3, 1.0),
+    OperatingPoint((320, 240), 4, 1.0),
+]
+
+class AdaptiveRateController:
+    """Keeps mean per-frame tracking time under a latency budget
+
+    Processing time is averaged over the last `window` processed frames.
+    Above budget_ms the controller steps to the next cheaper operating
+    point; below recover_ratio * budget_ms it steps back up. After a change
+    the window is cleared and no further change happens for `cooldown`
+    seconds, so each point is judged on its own measurements.
+    """
+
+    def __init__(self, budget_ms: float = 20.0, window: int = 30, recover_ratio: float = 0.5,
+                 cooldown: float = 2.0, points: Optional[List[OperatingPoint]] = None):
+        self.budget_ms = budget_ms
+        self.recover_ratio = recover_ratio
+        self.cooldown = cooldown
+        self.points = points or OPERATING_POINTS
+        self.level = 0
+        self.frame_times = SlidingWindowStats(window)
+        self.frame_counter = 0
+        self.changes = 0
+        self._last_change: Optional[float] = None
+
+    @property
+    def operating_point(self) -> OperatingPoint:
+        return self.points[self.level]
+
+    def should_process(self) -> bool:
+        """Call once per captured frame; False for frames to skip"""
+        self.frame_counter += 1
+        return self.frame_counter % self.operating_point.frame_skip == 0
+
+    def record(self, processing_ms: float, timestamp: float) -> bool:
+        """Add one processed frame's time; True if the operating point changed"""
+        self.frame_times.push(processing_ms)
+        if self._last_change is None:
+            self._last_change = timestamp
+        if not self.frame_times.full or timestamp - self._last_change < self.cooldown:
+            return False
+
+        mean_ms = self.frame_times.mean
+        if mean_ms > self.budget_ms and self.level < len(self.points) - 1:
+            return self._set_level(self.level + 1, timestamp)
+        if mean_ms < self.budget_ms * self.recover_ratio and self.level > 0:
+            return self._set_level(self.level - 1, timestamp)
+        return False
+
+    def _set_level(self, level: int, timestamp: float) -> bool:
+        self.level = level
+        self.frame_times.clear()
+        self.frame_counter = 0
+        self.changes += 1
+        self._last_change = timestamp
+        return True
+
+    def status(self, camera_fps: float = 30.0) -> Dict[str, Any]:
+        point = self.operating_point
+        return {
+            "level": self.level,
+            "capture_size": point.capture_size,
+            "frame_skip": point.frame_skip,
+            "input_scale": point.input_scale,
+            "tracking_fps": camera_fps / point.frame_skip,
+            "mean_frame_ms": self.frame_times.mean if len(self.frame_times) else None,
+            "budget_ms": self.budget_ms,
+            "changes": self.changes,
+            "description": point.describe(camera_fps),
+        }
@@ -0,0 +1,234 @@
+"""
+Batch Eye Tracking Analysis for PeriQuest
+Re-analyzes a directory of recorded sessions in parallel, headless
+
+Each video is tracked in its own worker process. Per-session event files
+(fixations, saccades, blinks, head movements plus summary statistics) are
+written next to a batch summary CSV. Finished sessions are recorded in a
+checkpoint file, so an interrupted batch resumes where it stopped.
+
+Usage:
+    python batch_analyze.py recordings/ --output analysis/
+    python batch_analyze.py recordings/ --output analysis/ --workers 4 --fixation-algorithm idt
+    python batch_analyze.py recordings/ --output analysis/ --restart
+"""
+
+import os
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+from typing import Optional, List, Dict, Any
+
+from tasks_eye_tracker import EnhancedEyeTracker, DEFAULT_MODEL_PATH
+from frame_sources import VideoFileSource
+from eye_events import FixationDetector
+from gaze_filters import GAZE_FILTERS
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+CHECKPOINT_NAME = 'batch_checkpoint.json'
+SUMMARY_NAME = 'batch_summary.csv'
+
+SUMMARY_FIELDS = [
+    'session', 'duration_s', 'frames', 'tracked_frames', 'tracking_rate',
+    'fixation_count', 'mean_fixation_ms', 'fixation_time_pct',
+    'saccade_count', 'mean_saccade_amplitude', 'mean_peak_velocity',
+    'blink_count', 'blink_rate_per_min', 'head_movement_count', 'head_movement_time_s',
+    'processing_s',
+]
+
+def find_sessions(input_dir: str) -> List[str]:
+    """Video files under input_dir (recursively), in a stable order"""
+    paths = []
+    for root, _, files in os.walk(input_dir):
+        for name in files:
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+def session_key(path: str, input_dir: str) -> str:
+    return os.path.relpath(path, input_dir).replace(os.sep, '/')
+
+def _fingerprint(path: str) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+def _mean(values) -> float:
+    values = list(values)
+    return sum(values) / len(values) if values else 0.0
+
+def summarize_session(tracker: EnhancedEyeTracker, duration: float, frames: int,
+                      tracked_frames: int) -> Dict[str, Any]:
+    fixations, saccades = tracker.fixations, tracker.saccades
+    fixation_time = sum(f.duration for f in fixations)
+    return {
+        "duration_s": duration,
+        "frames": frames,
+        "tracked_frames": tracked_frames,
+        "tracking_rate": tracked_frames / frames if frames else 0.0,
+        "fixation_count": len(fixations),
+        "mean_fixation_ms": _mean(f.duration for f in fixations) * 1000,
+        "fixation_time_pct": fixation_time / duration * 100 if duration > 0 else 0.0,
+        "saccade_count": len(saccades),
+        "mean_saccade_amplitude": _mean(s.amplitude for s in saccades),
+        "mean_peak_velocity": _mean(s.peak_velocity for s in saccades),
+        "blink_count": len(tracker.blinks),
+        "blink_rate_per_min": len(tracker.blinks) / duration * 60 if duration > 0 else 0.0,
+        "head_movement_count": len(tracker.head_movements),
+        "head_movement_time_s": sum(m.duration for m in tracker.head_movements),
+    }
+
+def analyze_session(path: str, output_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker entry point: track one recording and write its event file"""
+    started = time.perf_counter()
+    source = VideoFileSource(path)
+    tracker = EnhancedEyeTracker(source=source, model_path=options['model_path'],
+                                 fixation_algorithm=options['fixation_algorithm'],
+                                 gaze_filter=options['gaze_filter'])
+    if not tracker.use_mediapipe or not tracker.initialize_camera():
+        raise RuntimeError(f"could not track {path}")
+
+    frames = tracked_frames = 0
+    try:
+        while True:
+            eye_data = tracker.get_eye_data()
+            if tracker.end_of_source:
+                break
+            frames += 1
+            tracked_frames += eye_data is not None
+    finally:
+        tracker.release()
+
+    duration = frames / source.fps if source.fps else 0.0
+    summary = summarize_session(tracker, duration, frames, tracked_frames)
+    summary["processing_s"] = time.perf_counter() - started
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "source": os.path.abspath(path),
+            "options": options,
+            "summary": summary,
+            "fixations": [asdict(e) for e in tracker.fixations],
+            "saccades": [asdict(e) for e in tracker.saccades],
+            "blinks": [asdict(e) for e in tracker.blinks],
+            "head_movements": [asdict(e) for e in tracker.head_movements],
+        }, f, indent=1)
+    os.replace(tmp_path, output_path)
+    return summary
+
+# ==================== CHECKPOINT ====================
+class BatchCheckpoint:
+    """Completed sessions of a batch run, rewritten atomically after each one"""
+
+    def __init__(self, path: str, options: Dict[str, Any]):
+        self.path = path
+        self.options = options
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> bool:
+        """Resume from an earlier run with the same options; False if none"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"✗ Ignoring unreadable checkpoint {self.path}: {e}")
+            return False
+        if data.get("options") != self.options:
+            print("⚠ Analysis options changed since the checkpoint; starting over")
+            return False
+        self.sessions = data.get("sessions", {})
+        return True
+
+    def is_done(self, key: str, path: str, output_path: str) -> bool:
+        entry = self.sessions.get(key)
+        return (entry is not None and entry.get("source") == _fingerprint(path)
+                and os.path.exists(output_path))
+
+    def mark_done(self, key: str, path: str, summary: Dict[str, Any]):
+        self.sessions[key] = {"source": _fingerprint(path), "summary": summary}
+        self.save()
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"options": self.options, "sessions": self.sessions}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+def write_summary_csv(path: str, sessions: Dict[str, Dict[str, Any]]):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for key in sorted(sessions):
+            writer.writerow({"session": key, **sessions[key]["summary"]})
+
+# ==================== BATCH ====================
+def run_batch(input_dir: str, output_dir: str, options: Dict[str, Any],
+              workers: Optional[int] = None, restart: bool = False) -> Dict[str, Any]:
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint = BatchCheckpoint(os.path.join(output_dir, CHECKPOINT_NAME), options)
+    if not restart and checkpoint.load():
+        print(f"✓ Resuming: {len(checkpoint.sessions)} sessions already analyzed")
+
+    def output_path(key: str) -> str:
+        return os.path.join(output_dir, os.path.splitext(key)[0] + '_events.json')
+
+    sessions = find_sessions(input_dir)
+    pending = [(session_key(p, input_dir), p) for p in sessions]
+    pending = [(key, p) for key, p in pending
+               if not checkpoint.is_done(key, p, output_path(key))]
+    print(f"✓ {len(sessions)} recordings found, {len(pending)} to analyze")
+
+    failures = {}
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(analyze_session, p, output_path(key), options): (key, p)
+                       for key, p in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                key, p = futures[future]
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    failures[key] = str(e)
+                    print(f"  [{done}/{len(pending)}] ✗ {key}: {e}")
+                    continue
+                checkpoint.mark_done(key, p, summary)
+                print(f"  [{done}/{len(pending)}] ✓ {key} "
+                      f"({summary['fixation_count']} fixations, {summary['blink_count']} blinks, "
+                      f"{summary['processing_s']:.1f}s)")
+
+    write_summary_csv(os.path.join(output_dir, SUMMARY_NAME), checkpoint.sessions)
+    return {"analyzed": len(checkpoint.sessions), "failed": failures}
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze recorded PeriQuest sessions offline")
+    parser.add_argument('input_dir', help="Directory of session videos (searched recursively)")
+    parser.add_argument('--output', default='analysis', help="Directory for event files and summary")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--fixation-algorithm', choices=FixationDetector.ALGORITHMS, default='ivt')
+    parser.add_argument('--gaze-filter', choices=list(GAZE_FILTERS), default='one_euro')
+    parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and redo every session")
+    args = parser.parse_args()
+
+    options = {
+        "model_path": os.path.abspath(args.model),
+        "fixation_algorithm": args.fixation_algorithm,
+        "gaze_filter": args.gaze_filter,
+    }
+    started = time.time()
+    try:
+        result = run_batch(args.input_dir, args.output, options, workers=args.workers, restart=args.restart)
+    except KeyboardInterrupt:
+        print("\n⚠ Interrupted; rerun the same command to resume")
+        return
+    print(f"✓ {result['analyzed']} sessions in {args.output} ({time.time() - started:.1f}s), "
+          f"{len(result['failed'])} failed")
+
+if __name__ == "__main__":
+    main()
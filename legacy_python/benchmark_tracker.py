@@ -0,0 +1,350 @@
+"""
+Eye Tracking Throughput Benchmark for PeriQuest
+Runs EnhancedEyeTracker over recorded or synthetic input and reports
+per-stage latency, sustained FPS, gaze smoothing jitter/lag and memory
+growth as JSON
+
+Examples:
+    python benchmark_tracker.py --source synthetic --duration 60
+    python benchmark_tracker.py --source video --input session.mp4 --output bench.json
+    python benchmark_tracker.py --source synthetic --compare baseline.json
+    python benchmark_tracker.py --source synthetic --gaze-filter kalman --prediction 0.03
+    python benchmark_tracker.py --source video --input session.mp4 --latency-budget 0
+"""
+
+import os
+import json
+import time
+import platform
+import argparse
+import subprocess
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional, Callable
+
+import cv2
+import numpy as np
+
+from frame_sources import (FrameSource, VideoFileSource, ImageSequenceSource,
+                           SyntheticLandmarkSource)
+from tasks_eye_tracker import EnhancedEyeTracker, DEFAULT_MODEL_PATH
+from gaze_filters import GAZE_FILTERS
+
+# Pipeline stages timed for every frame; color_conversion is the rest of
+# _process_frame (input_scale resize and BGR->RGB)
+FRAME_STAGES = ['decode', 'color_conversion', 'landmarker', 'post_processing', 'total']
+# Tracker methods whose per-frame time makes up the stages above
+FRAME_METHODS = {
+    'image': '_process_frame',
+    'landmarker': '_detect_landmarks',
+    'post_processing': '_process_landmarks',
+}
+# Post-processing helpers timed inside _process_landmarks
+POST_STAGES = {
+    'estimate_gaze': '_estimate_gaze',
+    'gaze_filter': '_smooth_gaze',
+    'detect_fixation': '_detect_fixation',
+    'head_pose': '_estimate_head_pose',
+}
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size (Linux /proc), None if unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    if not samples_ms:
+        return {"count": 0}
+    arr = np.asarray(samples_ms)
+    return {
+        "count": int(arr.size),
+        "mean_ms": float(arr.mean()),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "max_ms": float(arr.max()),
+    }
+
+class TrackerBenchmark:
+    """Times each stage of the tracking pipeline over a frame source
+
+    Frames go through the tracker's own get_eye_data(), so the adaptive
+    rate controller (frame skipping, landmarker input_scale) and every
+    other step the game runs are part of the measurement.
+    """
+
+    def __init__(self, source: FrameSource, model_path: str = DEFAULT_MODEL_PATH,
+                 warmup_frames: int = 30, trace_memory: bool = False,
+                 gaze_filter: str = 'one_euro', prediction_time: float = 0.0,
+                 latency_budget_ms: Optional[float] = None):
+        self.source = source
+        self.warmup_frames = warmup_frames
+        self.trace_memory = trace_memory
+        self.tracker = EnhancedEyeTracker(source=source, model_path=model_path,
+                                          gaze_filter=gaze_filter, prediction_time=prediction_time,
+                                          latency_budget_ms=latency_budget_ms)
+        self.timings: Dict[str, List[float]] = {stage: [] for stage in FRAME_STAGES}
+        self.timings.update({stage: [] for stage in POST_STAGES})
+        # Per-frame gaze samples: (timestamp, raw x, raw y, smoothed x, smoothed y, fixating)
+        self.gaze_samples: List[tuple] = []
+        self._recording = False
+        self._frame = None
+        self._frame_ms: Dict[str, float] = {}
+        self._instrument()
+
+    def _instrument(self):
+        """Wrap the source's read() and the tracker's pipeline methods with timers"""
+        for stage, method_name in POST_STAGES.items():
+            method = getattr(self.tracker, method_name)
+            setattr(self.tracker, method_name, self._timed(stage, method))
+        for stage, method_name in FRAME_METHODS.items():
+            setattr(self.tracker, method_name, self._per_frame(stage, getattr(self.tracker, method_name)))
+        self.source.read = self._per_frame('decode', self.source.read)
+
+    def _timed(self, stage: str, method: Callable) -> Callable:
+        samples = self.timings[stage]
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            if self._recording:
+                samples.append((time.perf_counter() - start) * 1000)
+            return result
+        return wrapper
+
+    def _per_frame(self, stage: str, method: Callable) -> Callable:
+        """Timer that keeps the call's duration for the current frame"""
+        frame_ms = self._frame_ms
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            frame_ms[stage] = (time.perf_counter() - start) * 1000
+            if stage == 'decode':
+                self._frame = result
+            return result
+        return wrapper
+
+    def _step(self) -> bool:
+        """Process one frame, recording stage timings. False when the source ends."""
+        self._frame = None
+        self._frame_ms.clear()
+        start = time.perf_counter()
+        eye_data = self.tracker.get_eye_data()
+        total_ms = (time.perf_counter() - start) * 1000
+        if self._frame is None:
+            return False
+
+        if self._recording:
+            frame_ms = self._frame_ms
+            self.timings['decode'].append(frame_ms['decode'])
+            if 'image' in frame_ms:
+                inner = frame_ms.get('landmarker', 0.0) + frame_ms.get('post_processing', 0.0)
+                self.timings['color_conversion'].append(frame_ms['image'] - inner)
+                if 'landmarker' in frame_ms:
+                    self.timings['landmarker'].append(frame_ms['landmarker'])
+            if 'post_processing' in frame_ms:
+                self.timings['post_processing'].append(frame_ms['post_processing'])
+                self.frames_with_face += 1
+            self.timings['total'].append(total_ms)
+            if eye_data is not None and eye_data.raw_gaze_point:
+                self._record_gaze(self._frame, eye_data)
+        return True
+
+    def _record_gaze(self, frame, eye_data):
+        truth = frame.ground_truth or {}
+        fixating = truth.get("is_fixating", eye_data.is_fixating)
+        self.gaze_samples.append((frame.timestamp, *eye_data.raw_gaze_point,
+                                  *eye_data.gaze_point, fixating))
+
+    def gaze_quality(self) -> Dict:
+        """Jitter and lag of the smoothed gaze relative to the raw gaze
+
+        Jitter is the RMS frame-to-frame gaze step during fixations. Lag is
+        the delay of the smoothed gaze behind the raw gaze while the gaze is
+        moving (negative when prediction runs ahead).
+        """
+        if len(self.gaze_samples) < 3:
+            return {}
+        data = np.asarray(self.gaze_samples, dtype=np.float64)
+        timestamps, raw, smooth = data[:, 0], data[:, 1:3], data[:, 3:5]
+        fixating = data[:, 5].astype(bool)
+
+        steady = fixating[1:] & fixating[:-1]
+        def jitter(series):
+            steps = np.hypot(*np.diff(series, axis=0).T)[steady]
+            return float(np.sqrt(np.mean(steps ** 2))) if steps.size else None
+
+        # Least-squares delay: raw(t) - smooth(t) ~= lag * raw velocity(t),
+        # fitted over moving samples so sub-frame lag is resolvable
+        velocity = np.gradient(raw, timestamps, axis=0)
+        moving = ~fixating
+        lag = 0.0
+        if moving.any():
+            v = velocity[moving]
+            lag = float(np.sum((raw - smooth)[moving] * v) / max(np.sum(v * v), 1e-12))
+
+        return {
+            "filter": type(self.tracker.gaze_filter).__name__,
+            "prediction_time_s": self.tracker.prediction_time,
+            "jitter_raw": jitter(raw),
+            "jitter_filtered": jitter(smooth),
+            "lag_ms": lag * 1000,
+        }
+
+    def run(self, max_frames: Optional[int] = None) -> Dict:
+        if not self.tracker.initialize_camera():
+            raise RuntimeError("Could not open frame source")
+
+        if not self.source.provides_landmarks and not self.tracker.use_mediapipe:
+            raise RuntimeError("Image sources need MediaPipe and a valid --model path")
+
+        for _ in range(self.warmup_frames):
+            if not self._step():
+                break
+
+        self.frames_with_face = 0
+        self._recording = True
+        if self.trace_memory:
+            tracemalloc.start()
+        rss_start = _rss_bytes()
+
+        frames = 0
+        start = time.perf_counter()
+        while max_frames is None or frames < max_frames:
+            if not self._step():
+                break
+            frames += 1
+        elapsed = time.perf_counter() - start
+
+        rss_end = _rss_bytes()
+        memory = {
+            "rss_start_bytes": rss_start,
+            "rss_end_bytes": rss_end,
+            "rss_growth_bytes": (rss_end - rss_start) if rss_start and rss_end else None,
+        }
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory["python_heap_growth_bytes"] = current
+            memory["python_heap_peak_bytes"] = peak
+        self._recording = False
+        self.tracker.release()
+
+        return {
+            "frames": frames,
+            "frames_with_face": self.frames_with_face,
+            "elapsed_s": elapsed,
+            "sustained_fps": frames / elapsed if elapsed > 0 else 0.0,
+            "stages": {stage: summarize(samples) for stage, samples in self.timings.items()},
+            "gaze_quality": self.gaze_quality(),
+            "tracking_status": self.tracker.tracking_status,
+            "memory": memory,
+        }
+
+def build_source(args) -> FrameSource:
+    if args.source == 'synthetic':
+        return SyntheticLandmarkSource(duration=args.duration, fps=args.fps, seed=args.seed)
+    if not args.input:
+        raise SystemExit(f"--input is required for --source {args.source}")
+    # Warm-up frames come on top of the measured --frames
+    max_frames = None if args.frames is None else args.frames + args.warmup
+    if args.source == 'video':
+        return VideoFileSource(args.input, loop=args.loop, max_frames=max_frames)
+    return ImageSequenceSource(args.input, fps=args.fps, loop=args.loop, max_frames=max_frames)
+
+def compare(current: Dict, baseline: Dict):
+    """Print mean-latency and FPS deltas against a previous benchmark JSON"""
+    print(f"\nComparison with {baseline.get('commit') or 'baseline'}:")
+    base_fps = baseline["results"]["sustained_fps"]
+    fps = current["results"]["sustained_fps"]
+    if base_fps:
+        print(f"  sustained_fps: {base_fps:.1f} -> {fps:.1f} ({(fps - base_fps) / base_fps * 100:+.1f}%)")
+    for stage, stats in current["results"]["stages"].items():
+        base = baseline["results"]["stages"].get(stage, {})
+        if stats.get("count") and base.get("count") and base["mean_ms"] > 0:
+            delta = (stats["mean_ms"] - base["mean_ms"]) / base["mean_ms"] * 100
+            print(f"  {stage:18s} {base['mean_ms']:8.3f} -> {stats['mean_ms']:8.3f} ms ({delta:+.1f}%)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PeriQuest eye tracking throughput")
+    parser.add_argument('--source', choices=['synthetic', 'video', 'images'], default='synthetic')
+    parser.add_argument('--input', help="Video file or image directory")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help="Path to face_landmarker.task")
+    parser.add_argument('--duration', type=float, default=60.0, help="Synthetic input length (s)")
+    parser.add_argument('--fps', type=float, default=30.0, help="Synthetic/image sequence frame rate")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--frames', type=int, help="Maximum frames to measure")
+    parser.add_argument('--loop', action='store_true', help="Loop recorded input until --frames")
+    parser.add_argument('--warmup', type=int, default=30, help="Frames excluded from timing")
+    parser.add_argument('--gaze-filter', choices=list(GAZE_FILTERS), default='one_euro')
+    parser.add_argument('--prediction', type=float, default=0.0,
+                        help="Predict gaze this many seconds ahead")
+    parser.add_argument('--latency-budget', type=float, default=20.0,
+                        help="Adaptive tracking budget per frame (ms) as in the game; 0 disables")
+    parser.add_argument('--trace-memory', action='store_true', help="Track Python heap with tracemalloc")
+    parser.add_argument('--output', help="Write JSON results to this path")
+    parser.add_argument('--compare', help="Previous JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    benchmark = TrackerBenchmark(build_source(args), model_path=args.model,
+                                 warmup_frames=args.warmup, trace_memory=args.trace_memory,
+                                 gaze_filter=args.gaze_filter, prediction_time=args.prediction,
+                                 latency_budget_ms=args.latency_budget or None)
+    results = benchmark.run(max_frames=args.frames)
+
+    report = {
+        "benchmark": "eye_tracking_throughput",
+        "timestamp": datetime.now().isoformat(),
+        "commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+        },
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ('output', 'compare')},
+        "results": results,
+    }
+
+    print(f"✓ {results['frames']} frames in {results['elapsed_s']:.2f}s "
+          f"({results['sustained_fps']:.1f} FPS sustained)")
+    for stage, stats in results["stages"].items():
+        if stats.get("count"):
+            print(f"  {stage:18s} mean {stats['mean_ms']:8.3f} ms   p95 {stats['p95_ms']:8.3f} ms")
+    quality = results["gaze_quality"]
+    if quality:
+        if quality['jitter_raw'] is not None and quality['jitter_filtered'] is not None:
+            print(f"  gaze jitter {quality['jitter_raw']:.4f} -> {quality['jitter_filtered']:.4f}, "
+                  f"lag {quality['lag_ms']:.0f} ms ({quality['filter']})")
+        else:
+            print(f"  gaze lag {quality['lag_ms']:.0f} ms ({quality['filter']}); too few fixation samples for jitter")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results written: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+    return report
+
+if __name__ == "__main__":
+    main()
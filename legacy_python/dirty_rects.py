@@ -0,0 +1,96 @@
+"""
+Dirty-Rectangle Rendering for PeriQuest
+Redraws and presents only the screen regions whose content changed
+"""
+
+import pygame
+from collections import namedtuple
+from typing import Hashable, List, Dict, Tuple
+
+# One independently drawn element. `signature` captures everything that
+# affects its pixels; `draw` must only touch pixels inside `rect`.
+Layer = namedtuple('Layer', ['key', 'signature', 'rect', 'draw'])
+
+class DirtyRectRenderer:
+    """Diffs each frame's layers against the previous frame's
+
+    A layer that appeared, disappeared, moved or changed signature marks
+    its old and new rects dirty. Each dirty rect is cleared to the
+    background and every layer overlapping it is redrawn, in order, clipped
+    to the overlap, so translucent layers never blend over themselves.
+    Only the dirty rects are sent to the display. When they cover more than
+    full_redraw_fraction of the screen, the whole frame is redrawn and
+    flipped instead, which is cheaper than many overlapping updates.
+    """
+
+    def __init__(self, screen: pygame.Surface, bg_color: Tuple[int, int, int],
+                 full_redraw_fraction: float = 0.5):
+        self.screen = screen
+        self.bg_color = bg_color
+        self.full_redraw_fraction = full_redraw_fraction
+        self._previous: Dict[Hashable, Tuple[Hashable, pygame.Rect]] = {}
+        self._valid = False
+        self.updated_area = 0  # pixels presented by the last frame
+
+    def invalidate(self):
+        """Screen contents are unknown (another mode drew it); redraw fully next time"""
+        self._valid = False
+
+    def present(self, layers: List[Layer]) -> List[pygame.Rect]:
+        """Draw the changed parts of this frame and update the display; the rects updated"""
+        screen_rect = self.screen.get_rect()
+        current = {layer.key: (layer.signature, pygame.Rect(layer.rect)) for layer in layers}
+
+        dirty: List[pygame.Rect] = []
+        if self._valid:
+            for key, (signature, rect) in current.items():
+                old = self._previous.get(key)
+                if old is None:
+                    dirty.append(rect)
+                elif old[0] != signature or old[1] != rect:
+                    dirty.extend((old[1], rect))
+            for key, (_, rect) in self._previous.items():
+                if key not in current:
+                    dirty.append(rect)
+            dirty = [rect.clip(screen_rect) for rect in dirty]
+            dirty = [rect for rect in dirty if rect.width and rect.height]
+        self._previous = current
+
+        area = sum(rect.width * rect.height for rect in dirty)
+        if not self._valid or area > self.full_redraw_fraction * screen_rect.width * screen_rect.height:
+            self._redraw(layers, screen_rect)
+            pygame.display.flip()
+            self._valid = True
+            self.updated_area = screen_rect.width * screen_rect.height
+            return [screen_rect]
+
+        if dirty:
+            dirty = self._merge(dirty)
+            for rect in dirty:
+                self._redraw(layers, rect)
+            pygame.display.update(dirty)
+        self.updated_area = sum(rect.width * rect.height for rect in dirty)
+        return dirty
+
+    def _redraw(self, layers: List[Layer], region: pygame.Rect):
+        self.screen.set_clip(region)
+        self.screen.fill(self.bg_color, region)
+        for layer in layers:
+            overlap = region.clip(layer.rect)
+            if overlap.width and overlap.height:
+                self.screen.set_clip(overlap)
+                layer.draw()
+        self.screen.set_clip(None)
+
+    @staticmethod
+    def _merge(rects: List[pygame.Rect]) -> List[pygame.Rect]:
+        """Union overlapping rects so no region is redrawn twice"""
+        merged: List[pygame.Rect] = []
+        for rect in rects:
+            rect = pygame.Rect(rect)
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
@@ -0,0 +1,176 @@
+"""
+Columnar Eye Tracking Storage for PeriQuest
+Array-backed session history of EyeData samples
+"""
+
+import numpy as np
+from typing import Tuple, Optional, Dict, Iterator
+
+class EyeRecord:
+    """Read-only view of one stored sample with EyeData-style attributes"""
+
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store: 'EyeDataStore', index: int):
+        self._store = store
+        self._index = index
+
+    def _flag(self, flag: int) -> bool:
+        return bool(self._store._columns['flags'][self._index] & flag)
+
+    @property
+    def timestamp(self) -> float:
+        return float(self._store._columns['timestamp'][self._index])
+
+    @property
+    def gaze_point(self) -> Optional[Tuple[float, float]]:
+        if not self._flag(EyeDataStore.FLAG_HAS_GAZE):
+            return None
+        columns = self._store._columns
+        return (float(columns['gaze_x'][self._index]), float(columns['gaze_y'][self._index]))
+
+    @property
+    def left_pupil_size(self) -> float:
+        return float(self._store._columns['left_pupil'][self._index])
+
+    @property
+    def right_pupil_size(self) -> float:
+        return float(self._store._columns['right_pupil'][self._index])
+
+    @property
+    def pupil_diameter(self) -> Optional[float]:
+        value = float(self._store._columns['pupil'][self._index])
+        return None if np.isnan(value) else value
+
+    @property
+    def head_yaw(self) -> float:
+        return float(self._store._columns['head_yaw'][self._index])
+
+    @property
+    def head_pitch(self) -> float:
+        return float(self._store._columns['head_pitch'][self._index])
+
+    @property
+    def head_roll(self) -> float:
+        return float(self._store._columns['head_roll'][self._index])
+
+    @property
+    def is_fixating(self) -> bool:
+        return self._flag(EyeDataStore.FLAG_FIXATING)
+
+    @property
+    def blink_detected(self) -> bool:
+        return self._flag(EyeDataStore.FLAG_BLINK)
+
+    @property
+    def head_turn_detected(self) -> bool:
+        return self._flag(EyeDataStore.FLAG_HEAD_TURN)
+
+class EyeDataStore:
+    """Preallocated, growable column store for per-frame eye samples
+
+    Each sample costs 41 bytes across COLUMNS: a float64 timestamp, eight
+    float32 values (gaze x/y, left/right pupil size, normalized pupil
+    diameter, head yaw/pitch/roll) and a one-byte flag bitfield, instead of
+    a dataclass instance with its own tuples and floats. Indexing returns
+    EyeRecord views; report code reads whole columns with column() or flag().
+    """
+
+    FLAG_FIXATING = 1
+    FLAG_BLINK = 2
+    FLAG_HEAD_TURN = 4
+    FLAG_HAS_GAZE = 8
+
+    COLUMNS = {
+        'timestamp': np.float64,
+        'gaze_x': np.float32,
+        'gaze_y': np.float32,
+        'left_pupil': np.float32,
+        'right_pupil': np.float32,
+        'pupil': np.float32,
+        'head_yaw': np.float32,
+        'head_pitch': np.float32,
+        'head_roll': np.float32,
+        'flags': np.uint8,
+    }
+
+    def __init__(self, capacity: int = 9000):
+        # Default capacity covers a 5 minute session at 30 FPS
+        self._size = 0
+        self._capacity = max(1, capacity)
+        self._columns = {name: np.zeros(self._capacity, dtype=dtype)
+                         for name, dtype in self.COLUMNS.items()}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> EyeRecord:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("EyeDataStore index out of range")
+        return EyeRecord(self, index)
+
+    def __iter__(self) -> Iterator[EyeRecord]:
+        for index in range(self._size):
+            yield EyeRecord(self, index)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated for the columns (including unused capacity)"""
+        return sum(column.nbytes for column in self._columns.values())
+
+    def _grow(self):
+        self._capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.zeros(self._capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def append(self, eye_data):
+        """Store one EyeData sample"""
+        if self._size >= self._capacity:
+            self._grow()
+        i = self._size
+        columns = self._columns
+
+        flags = 0
+        if eye_data.is_fixating:
+            flags |= self.FLAG_FIXATING
+        if eye_data.blink_detected:
+            flags |= self.FLAG_BLINK
+        if getattr(eye_data, 'head_turn_detected', False):
+            flags |= self.FLAG_HEAD_TURN
+
+        gaze = eye_data.gaze_point
+        if gaze:
+            flags |= self.FLAG_HAS_GAZE
+            columns['gaze_x'][i] = gaze[0]
+            columns['gaze_y'][i] = gaze[1]
+        else:
+            columns['gaze_x'][i] = np.nan
+            columns['gaze_y'][i] = np.nan
+
+        columns['timestamp'][i] = eye_data.timestamp
+        columns['left_pupil'][i] = eye_data.left_pupil_size
+        columns['right_pupil'][i] = eye_data.right_pupil_size
+        pupil = getattr(eye_data, 'pupil_diameter', None)
+        columns['pupil'][i] = np.nan if pupil is None else pupil
+        columns['head_yaw'][i] = getattr(eye_data, 'head_yaw', 0.0)
+        columns['head_pitch'][i] = getattr(eye_data, 'head_pitch', 0.0)
+        columns['head_roll'][i] = getattr(eye_data, 'head_roll', 0.0)
+        columns['flags'][i] = flags
+        self._size += 1
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of a column's filled part"""
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def flag(self, flag: int) -> np.ndarray:
+        """Boolean array for one of the FLAG_* bits"""
+        return (self._columns['flags'][:self._size] & flag) != 0
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: self.column(name) for name in self.COLUMNS}
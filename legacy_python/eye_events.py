@@ -0,0 +1,446 @@
+"""
+Eye Movement Event Detection for PeriQuest
+Streaming fixation/saccade classification, blink and head movement detection
+"""
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Tuple, Optional, List
+
+# ==================== EVENTS ====================
+@dataclass
+class FixationEvent:
+    """A period of stable gaze"""
+    start_time: float
+    end_time: float
+    x: float
+    y: float
+    sample_count: int
+
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+@dataclass
+class SaccadeEvent:
+    """A rapid gaze shift between two fixations"""
+    start_time: float
+    end_time: float
+    start_point: Tuple[float, float]
+    end_point: Tuple[float, float]
+    amplitude: float
+    peak_velocity: float
+
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+@dataclass
+class BlinkEvent:
+    """A debounced blink (eye is 'both', 'left' or 'right')"""
+    start_time: float
+    end_time: float
+    eye: str
+
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+@dataclass
+class HeadMovementEvent:
+    """A head movement away from the neutral pose
+
+    direction is the dominant axis at the peak: 'left'/'right' (yaw) or
+    'up'/'down' (pitch), in image terms for an unmirrored camera.
+    """
+    start_time: float
+    end_time: float
+    peak_yaw: float
+    peak_pitch: float
+    peak_deviation: float
+    direction: str
+
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+# ==================== RUNNING STATISTICS ====================
+class SlidingWindowStats:
+    """Mean and variance over the last N values, updated in O(1)
+
+    Welford's update applied forwards for the incoming value and in reverse
+    for the value leaving the window.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) >= self.size
+
+    @property
+    def variance(self) -> float:
+        """Population variance (matches np.var)"""
+        n = len(self.values)
+        return max(0.0, self.m2 / n) if n else 0.0
+
+    def push(self, value: float):
+        if len(self.values) >= self.size:
+            self._remove(self.values.popleft())
+        self.values.append(value)
+        n = len(self.values)
+        delta = value - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (value - self.mean)
+
+    def _remove(self, value: float):
+        # Called after the value has left the deque; n counts it
+        n = len(self.values) + 1
+        if n <= 1:
+            self.mean = 0.0
+            self.m2 = 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / (n - 1)
+        self.m2 -= delta * (value - self.mean)
+
+    def clear(self):
+        self.values.clear()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+# ==================== FIXATION DETECTION ====================
+class FixationDetector:
+    """Streaming I-VT / I-DT fixation and saccade classifier
+
+    Each gaze sample costs O(1). Per-sample state is exposed through
+    update()'s return value; completed events are appended to
+    self.fixations and self.saccades.
+
+    Algorithms:
+        'ivt' - velocity threshold: a sample is part of a fixation when the
+                windowed mean gaze velocity (normalized units/s) is below
+                velocity_threshold.
+        'idt' - dispersion threshold: a sample is part of a fixation when the
+                RMS dispersion of the last window_size samples is below
+                dispersion_threshold.
+    """
+
+    ALGORITHMS = ('ivt', 'idt')
+
+    def __init__(self, algorithm: str = 'ivt', velocity_threshold: float = 1.0,
+                 dispersion_threshold: float = 0.03, window_size: int = 5,
+                 velocity_window: int = 3, min_fixation_duration: float = 0.1):
+        self.velocity_threshold = velocity_threshold
+        self.dispersion_threshold = dispersion_threshold
+        self.window_size = window_size
+        self.velocity_window = velocity_window
+        self.min_fixation_duration = min_fixation_duration
+
+        self.fixations: List[FixationEvent] = []
+        self.saccades: List[SaccadeEvent] = []
+        self.set_algorithm(algorithm)
+
+    def set_algorithm(self, algorithm: str):
+        """Switch classifier at runtime (resets in-progress state, keeps events)"""
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Unknown fixation algorithm '{algorithm}', expected one of {self.ALGORITHMS}")
+        self.algorithm = algorithm
+        self.reset()
+
+    def reset(self):
+        self.window_x = SlidingWindowStats(self.window_size)
+        self.window_y = SlidingWindowStats(self.window_size)
+        self.window_velocity = SlidingWindowStats(self.velocity_window)
+        self.prev_point: Optional[Tuple[float, float]] = None
+        self.prev_time: Optional[float] = None
+        self.is_fixating = False
+
+        # Open fixation candidate
+        self._fix_start: Optional[float] = None
+        self._fix_last_time = 0.0
+        self._fix_sum_x = 0.0
+        self._fix_sum_y = 0.0
+        self._fix_count = 0
+        self._fix_first_point: Optional[Tuple[float, float]] = None
+        self._fix_confirmed = False
+
+        # End of the previous confirmed fixation (start of the next saccade)
+        self._last_fix_end: Optional[float] = None
+        self._last_fix_point: Optional[Tuple[float, float]] = None
+        self._peak_velocity = 0.0
+
+    def update(self, timestamp: float, point: Optional[Tuple[float, float]]) -> bool:
+        """Add a gaze sample; returns whether the gaze is currently in a fixation"""
+        if point is None:
+            # Tracking lost: close any fixation and don't bridge saccades over the gap
+            self._close_fixation()
+            self._last_fix_end = None
+            self._last_fix_point = None
+            self.window_x.clear()
+            self.window_y.clear()
+            self.window_velocity.clear()
+            self.prev_point = None
+            self.prev_time = None
+            self.is_fixating = False
+            return False
+
+        x, y = point
+        velocity = 0.0
+        if self.prev_point is not None and timestamp > self.prev_time:
+            dx, dy = x - self.prev_point[0], y - self.prev_point[1]
+            velocity = math.hypot(dx, dy) / (timestamp - self.prev_time)
+            self.window_velocity.push(velocity)
+        self.prev_point = point
+        self.prev_time = timestamp
+        self.window_x.push(x)
+        self.window_y.push(y)
+
+        if self._classify_fixation_sample():
+            self._add_fixation_sample(timestamp, point)
+        else:
+            self._close_fixation()
+            self._peak_velocity = max(self._peak_velocity, velocity)
+
+        self.is_fixating = self._fix_confirmed
+        return self.is_fixating
+
+    def _classify_fixation_sample(self) -> bool:
+        if self.algorithm == 'ivt':
+            if not len(self.window_velocity):
+                return False
+            return self.window_velocity.mean < self.velocity_threshold
+
+        if not self.window_x.full:
+            return False
+        dispersion = math.sqrt(self.window_x.variance + self.window_y.variance)
+        return dispersion < self.dispersion_threshold
+
+    def _add_fixation_sample(self, timestamp: float, point: Tuple[float, float]):
+        if self._fix_start is None:
+            self._fix_start = timestamp
+            self._fix_sum_x = self._fix_sum_y = 0.0
+            self._fix_count = 0
+            self._fix_first_point = point
+            self._fix_confirmed = False
+
+        self._fix_sum_x += point[0]
+        self._fix_sum_y += point[1]
+        self._fix_count += 1
+        self._fix_last_time = timestamp
+
+        if not self._fix_confirmed and timestamp - self._fix_start >= self.min_fixation_duration:
+            self._fix_confirmed = True
+            if self._last_fix_end is not None:
+                self._emit_saccade(self._fix_start, self._fix_first_point)
+
+    def _emit_saccade(self, end_time: float, end_point: Tuple[float, float]):
+        start_point = self._last_fix_point
+        self.saccades.append(SaccadeEvent(
+            start_time=self._last_fix_end,
+            end_time=end_time,
+            start_point=start_point,
+            end_point=end_point,
+            amplitude=math.hypot(end_point[0] - start_point[0], end_point[1] - start_point[1]),
+            peak_velocity=self._peak_velocity,
+        ))
+        self._peak_velocity = 0.0
+
+    def _close_fixation(self):
+        if self._fix_start is not None and self._fix_confirmed:
+            centroid = (self._fix_sum_x / self._fix_count, self._fix_sum_y / self._fix_count)
+            self.fixations.append(FixationEvent(
+                start_time=self._fix_start,
+                end_time=self._fix_last_time,
+                x=centroid[0],
+                y=centroid[1],
+                sample_count=self._fix_count,
+            ))
+            self._last_fix_end = self._fix_last_time
+            self._last_fix_point = centroid
+            self._peak_velocity = 0.0
+        self._fix_start = None
+        self._fix_confirmed = False
+
+    def finish(self):
+        """Flush the fixation in progress (call at the end of a session)"""
+        self._close_fixation()
+        self.is_fixating = False
+
+# ==================== BLINK DETECTION ====================
+class BlinkDetector:
+    """Debounced per-eye blink detection from eyeBlink blendshape scores
+
+    An eye closes when its score rises above close_threshold and reopens
+    when it falls below open_threshold (hysteresis). One blink spans from the
+    first eye closing to the last eye reopening; episodes shorter than
+    min_duration (noise) or longer than max_duration (deliberate closure) are
+    not counted. The rolling blink rate is kept in O(1) amortized time.
+    """
+
+    def __init__(self, close_threshold: float = 0.5, open_threshold: float = 0.35,
+                 min_duration: float = 0.05, max_duration: float = 0.5,
+                 rate_window: float = 60.0):
+        self.close_threshold = close_threshold
+        self.open_threshold = open_threshold
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.rate_window = rate_window
+
+        self.blinks: List[BlinkEvent] = []
+        self.left_closed = False
+        self.right_closed = False
+        self.is_blinking = False
+
+        self._episode_start: Optional[float] = None
+        self._episode_left = False
+        self._episode_right = False
+        self._recent_onsets = deque()
+        self._first_timestamp: Optional[float] = None
+        self._last_timestamp = 0.0
+
+    def update(self, timestamp: float, left_score: float, right_score: float) -> bool:
+        """Add one frame of blink scores; returns whether the eyes are currently closed"""
+        if self._first_timestamp is None:
+            self._first_timestamp = timestamp
+        self._last_timestamp = timestamp
+
+        self.left_closed = self._hysteresis(self.left_closed, left_score)
+        self.right_closed = self._hysteresis(self.right_closed, right_score)
+        closed = self.left_closed or self.right_closed
+
+        if closed:
+            if self._episode_start is None:
+                self._episode_start = timestamp
+                self._episode_left = self._episode_right = False
+            self._episode_left |= self.left_closed
+            self._episode_right |= self.right_closed
+        elif self._episode_start is not None:
+            self._end_episode(timestamp)
+
+        self._expire_onsets(timestamp)
+        self.is_blinking = closed
+        return closed
+
+    def _hysteresis(self, closed: bool, score: float) -> bool:
+        if closed:
+            return score > self.open_threshold
+        return score > self.close_threshold
+
+    def _end_episode(self, timestamp: float):
+        start = self._episode_start
+        self._episode_start = None
+        duration = timestamp - start
+        if not (self.min_duration <= duration <= self.max_duration):
+            return
+
+        if self._episode_left and self._episode_right:
+            eye = 'both'
+        else:
+            eye = 'left' if self._episode_left else 'right'
+        self.blinks.append(BlinkEvent(start_time=start, end_time=timestamp, eye=eye))
+        self._recent_onsets.append(start)
+
+    def _expire_onsets(self, timestamp: float):
+        cutoff = timestamp - self.rate_window
+        while self._recent_onsets and self._recent_onsets[0] < cutoff:
+            self._recent_onsets.popleft()
+
+    @property
+    def blink_rate(self) -> float:
+        """Blinks per minute over the rolling window"""
+        if self._first_timestamp is None:
+            return 0.0
+        span = min(self.rate_window, self._last_timestamp - self._first_timestamp)
+        if span <= 0:
+            return 0.0
+        return len(self._recent_onsets) * 60.0 / span
+
+    def finish(self):
+        """Close a blink still in progress at the end of a session"""
+        if self._episode_start is not None:
+            self._end_episode(self._last_timestamp)
+        self.is_blinking = False
+
+# ==================== HEAD MOVEMENT DETECTION ====================
+class HeadMovementDetector:
+    """Debounced head movement events from per-frame head pose
+
+    Deviation is the angle (degrees) of yaw and pitch away from a neutral
+    pose. The neutral pose starts at the first sample and slowly follows the
+    head while it is still (time constant baseline_time), so a patient
+    sitting slightly off-axis does not register as permanently turned. A
+    movement starts above start_threshold, ends below end_threshold and is
+    kept if it lasts at least min_duration.
+    """
+
+    def __init__(self, start_threshold: float = 15.0, end_threshold: float = 10.0,
+                 min_duration: float = 0.1, baseline_time: float = 10.0):
+        self.start_threshold = start_threshold
+        self.end_threshold = end_threshold
+        self.min_duration = min_duration
+        self.baseline_time = baseline_time
+
+        self.movements: List[HeadMovementEvent] = []
+        self.is_moving = False
+        self.baseline_yaw: Optional[float] = None
+        self.baseline_pitch = 0.0
+
+        self._last_timestamp: Optional[float] = None
+        self._start: Optional[float] = None
+        self._peak = (0.0, 0.0, 0.0)
+
+    def update(self, timestamp: float, yaw: float, pitch: float) -> bool:
+        """Add one head pose sample; returns whether the head is currently moved"""
+        if self.baseline_yaw is None:
+            self.baseline_yaw, self.baseline_pitch = yaw, pitch
+        dt = 0.0 if self._last_timestamp is None else max(0.0, timestamp - self._last_timestamp)
+        self._last_timestamp = timestamp
+
+        d_yaw = yaw - self.baseline_yaw
+        d_pitch = pitch - self.baseline_pitch
+        deviation = math.hypot(d_yaw, d_pitch)
+
+        if self.is_moving:
+            if deviation > self._peak[2]:
+                self._peak = (d_yaw, d_pitch, deviation)
+            if deviation < self.end_threshold:
+                self._end_movement(timestamp)
+        elif deviation > self.start_threshold:
+            self.is_moving = True
+            self._start = timestamp
+            self._peak = (d_yaw, d_pitch, deviation)
+        else:
+            a = dt / (self.baseline_time + dt) if dt else 0.0
+            self.baseline_yaw += a * d_yaw
+            self.baseline_pitch += a * d_pitch
+        return self.is_moving
+
+    def _end_movement(self, timestamp: float):
+        self.is_moving = False
+        start = self._start
+        self._start = None
+        if timestamp - start < self.min_duration:
+            return
+
+        d_yaw, d_pitch, deviation = self._peak
+        if abs(d_yaw) >= abs(d_pitch):
+            direction = 'left' if d_yaw > 0 else 'right'
+        else:
+            direction = 'down' if d_pitch > 0 else 'up'
+        self.movements.append(HeadMovementEvent(
+            start_time=start, end_time=timestamp, peak_yaw=d_yaw, peak_pitch=d_pitch,
+            peak_deviation=deviation, direction=direction))
+
+    def finish(self):
+        """Close a movement still in progress at the end of a session"""
+        if self.is_moving:
+            self._end_movement(self._last_timestamp)
@@ -0,0 +1,489 @@
+"""
+Frame Sources for the PeriQuest Eye Tracker
+Live camera, recorded video, image sequences and synthetic landmarks
+"""
+
+import os
+import math
+import time
+import random
+import threading
+import cv2
+import numpy as np
+from collections import namedtuple
+from dataclasses import dataclass
+from typing import Tuple, Optional, List, Dict, Any
+
+from head_pose import HeadPoseEstimator, HeadPose
+from session_clock import SessionClock, SESSION_CLOCK
+
+# Minimal stand-ins for the MediaPipe result objects (x/y/z landmarks and
+# category_name/score blendshapes) so synthetic frames flow through the same
+# post-processing code as real detections.
+Landmark = namedtuple('Landmark', ['x', 'y', 'z'])
+Category = namedtuple('Category', ['category_name', 'score'])
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+NUM_FACE_LANDMARKS = 478
+
+@dataclass
+class SourceFrame:
+    """A single frame delivered by a frame source"""
+    timestamp: float
+    image: Optional[np.ndarray] = None
+    landmarks: Optional[List[Landmark]] = None
+    blendshapes: Optional[List[Category]] = None
+    ground_truth: Optional[Dict[str, Any]] = None
+
+class FrameSource:
+    """Base class for eye tracker frame sources"""
+
+    # Live sources are stamped from the session clock at capture, recorded
+    # ones with deterministic timestamps derived from the frame index
+    is_live = False
+    # Sources that deliver landmarks directly don't need the FaceLandmarker
+    provides_landmarks = False
+
+    def open(self) -> bool:
+        return True
+
+    def read(self) -> Optional[SourceFrame]:
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+# ==================== CAMERA ====================
+class CameraSource(FrameSource):
+    """Live webcam capture via cv2.VideoCapture
+
+    Frames are stamped between grab() and retrieve(), i.e. before the
+    decode, so the timestamp is as close to exposure as OpenCV allows.
+    """
+
+    is_live = True
+
+    def __init__(self, camera_id: int = 0, width: int = 640, height: int = 480, fps: int = 30,
+                 clock: SessionClock = SESSION_CLOCK):
+        self.camera_id = camera_id
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.clock = clock
+        self.cap = None
+
+    def open(self) -> bool:
+        """Open the requested camera, falling back to the next few device IDs"""
+        try:
+            self.cap = cv2.VideoCapture(self.camera_id)
+            if not self.cap.isOpened():
+                for cam_id in [1, 2, 3]:
+                    self.cap = cv2.VideoCapture(cam_id)
+                    if self.cap.isOpened():
+                        self.camera_id = cam_id
+                        break
+
+            if not self.cap.isOpened():
+                print("✗ No camera found")
+                return False
+
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+            print(f"✓ Camera {self.camera_id} initialized")
+            return True
+        except Exception as e:
+            print(f"✗ Camera initialization error: {e}")
+            return False
+
+    def set_resolution(self, width: int, height: int):
+        """Change the capture size of an open camera"""
+        self.width, self.height = width, height
+        if self.cap:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+    def read(self) -> Optional[SourceFrame]:
+        if not self.cap:
+            return None
+        if not self.cap.grab():
+            return None
+        timestamp = self.clock.now()
+        ret, frame = self.cap.retrieve()
+        if not ret:
+            return None
+        return SourceFrame(timestamp=timestamp, image=frame)
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+class ThreadedCaptureSource(FrameSource):
+    """Reads a live source on its own thread
+
+    Frames are grabbed (and stamped) as soon as the camera delivers them
+    instead of whenever the game loop gets round to it, and the loop never
+    blocks on the camera. read() returns the newest frame not yet
+    delivered, or None if there is none; older undelivered frames are
+    dropped and counted in `dropped_frames`.
+    """
+
+    is_live = True
+
+    # How long open() waits for the first frame
+    FIRST_FRAME_TIMEOUT = 2.0
+
+    def __init__(self, source: FrameSource):
+        self.source = source
+        self.dropped_frames = 0
+        self._frame: Optional[SourceFrame] = None
+        self._ready = threading.Condition()
+        self._source_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def camera_id(self):
+        return getattr(self.source, 'camera_id', None)
+
+    @property
+    def fps(self):
+        return getattr(self.source, 'fps', None)
+
+    def open(self) -> bool:
+        if not self.source.open():
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._capture_loop, name="frame-capture", daemon=True)
+        self._thread.start()
+        # The first frame stays pending, so a warm-up read right after open has one
+        with self._ready:
+            if not self._ready.wait_for(lambda: self._frame is not None, self.FIRST_FRAME_TIMEOUT):
+                print("✗ Camera delivered no frames")
+                self.release()
+                return False
+        return True
+
+    def _capture_loop(self):
+        while not self._stop.is_set():
+            with self._source_lock:
+                frame = self.source.read()
+            if frame is None:
+                time.sleep(0.005)
+                continue
+            with self._ready:
+                if self._frame is not None:
+                    self.dropped_frames += 1
+                self._frame = frame
+                self._ready.notify_all()
+
+    def read(self) -> Optional[SourceFrame]:
+        with self._ready:
+            frame, self._frame = self._frame, None
+        return frame
+
+    def set_resolution(self, width: int, height: int):
+        if hasattr(self.source, 'set_resolution'):
+            # VideoCapture is not thread-safe; wait for the current grab
+            with self._source_lock:
+                self.source.set_resolution(width, height)
+
+    def release(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.source.release()
+
+# ==================== RECORDED INPUT ====================
+class VideoFileSource(FrameSource):
+    """Recorded video file, stamped from the frame index and container FPS"""
+
+    def __init__(self, path: str, fps: Optional[float] = None, start_time: float = 0.0,
+                 loop: bool = False, max_frames: Optional[int] = None):
+        self.path = path
+        self.fps = fps
+        self.start_time = start_time
+        self.loop = loop
+        self.max_frames = max_frames
+        self.cap = None
+        self.frame_index = 0
+
+    def open(self) -> bool:
+        if not os.path.exists(self.path):
+            print(f"✗ Video file {self.path} not found")
+            return False
+
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            print(f"✗ Could not open video {self.path}")
+            return False
+
+        if not self.fps:
+            # Some containers report 0 FPS; fall back to the camera rate
+            self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_index = 0
+        print(f"✓ Video source opened: {self.path} ({self.fps:.1f} FPS)")
+        return True
+
+    def read(self) -> Optional[SourceFrame]:
+        if not self.cap:
+            return None
+        if self.max_frames is not None and self.frame_index >= self.max_frames:
+            return None
+
+        ret, frame = self.cap.read()
+        if not ret and self.loop and self.frame_index > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if not ret:
+            return None
+
+        timestamp = self.start_time + self.frame_index / self.fps
+        self.frame_index += 1
+        return SourceFrame(timestamp=timestamp, image=frame)
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+class ImageSequenceSource(FrameSource):
+    """Directory of still images played back in filename order at a fixed FPS"""
+
+    def __init__(self, directory: str, fps: float = 30.0, start_time: float = 0.0,
+                 loop: bool = False, max_frames: Optional[int] = None):
+        self.directory = directory
+        self.fps = fps
+        self.start_time = start_time
+        self.loop = loop
+        self.max_frames = max_frames
+        self.files: List[str] = []
+        self.frame_index = 0
+
+    def open(self) -> bool:
+        if not os.path.isdir(self.directory):
+            print(f"✗ Image directory {self.directory} not found")
+            return False
+
+        self.files = sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.files:
+            print(f"✗ No images found in {self.directory}")
+            return False
+
+        self.frame_index = 0
+        print(f"✓ Image sequence opened: {len(self.files)} frames from {self.directory}")
+        return True
+
+    def read(self) -> Optional[SourceFrame]:
+        if not self.files:
+            return None
+        if self.max_frames is not None and self.frame_index >= self.max_frames:
+            return None
+        if self.frame_index >= len(self.files) and not self.loop:
+            return None
+
+        path = self.files[self.frame_index % len(self.files)]
+        frame = cv2.imread(path)
+        if frame is None:
+            return None
+
+        timestamp = self.start_time + self.frame_index / self.fps
+        self.frame_index += 1
+        return SourceFrame(timestamp=timestamp, image=frame)
+
+# ==================== SYNTHETIC LANDMARKS ====================
+class SyntheticLandmarkSource(FrameSource):
+    """Scripted face landmarks that bypass MediaPipe entirely
+
+    Generates a seeded sequence of fixations, saccades, blinks and head turns
+    and encodes them as FaceLandmarker-style landmarks and blendshapes. The
+    ground truth for each frame is attached so tracker output can be checked.
+    """
+
+    provides_landmarks = True
+
+    # Eye geometry in normalized image coordinates
+    EYE_HALF_WIDTH = 0.035
+    EYE_HALF_HEIGHT = 0.012
+    IRIS_RADIUS = 0.012
+
+    # Head pose landmarks are projections of HeadPoseEstimator.MODEL_POINTS
+    # with the nose tip this far from the camera (model units) at the image centre
+    HEAD_DISTANCE = 2000.0
+    HEAD_POSE_NOISE = 0.5  # degrees
+
+    # Gains used by EnhancedEyeTracker._estimate_gaze (uncalibrated)
+    GAZE_GAIN_X = 5.0
+    GAZE_GAIN_Y = 10.0
+
+    def __init__(self, duration: float = 60.0, fps: float = 30.0, seed: int = 0,
+                 start_time: float = 0.0, fixation_noise: float = 0.004,
+                 blink_interval: Tuple[float, float] = (2.0, 6.0),
+                 blink_duration: Tuple[float, float] = (0.10, 0.30),
+                 head_turn_probability: float = 0.05,
+                 peripheral_saccade_probability: float = 0.3,
+                 image_size: Tuple[int, int] = (640, 480)):
+        self.duration = duration
+        self.fps = fps
+        self.seed = seed
+        self.start_time = start_time
+        self.fixation_noise = fixation_noise
+        self.blink_interval = blink_interval
+        self.blink_duration = blink_duration
+        self.head_turn_probability = head_turn_probability
+        self.peripheral_saccade_probability = peripheral_saccade_probability
+        self.pose_model = HeadPoseEstimator(image_size)
+
+        self.total_frames = int(duration * fps)
+        self.frame_index = 0
+        self._base_landmarks = self._build_base_landmarks()
+        self._reset_script()
+
+    def open(self) -> bool:
+        self.frame_index = 0
+        self._reset_script()
+        return True
+
+    def _reset_script(self):
+        self.rng = random.Random(self.seed)
+        self.gaze = (0.5, 0.5)
+        self.fixation_target = (0.5, 0.5)
+        self.saccade_from = None
+        self.saccade_duration = 0.0
+        self.saccade_end = 0.0
+        self.fixation_end = 0.0
+        self.next_blink = self.rng.uniform(*self.blink_interval)
+        self.blink_end = -1.0
+        self.head_turn_end = -1.0
+        self.head_pose = HeadPose()
+
+    def _build_base_landmarks(self) -> List[List[float]]:
+        """Neutral face: non-eye landmarks spread on an ellipse around the face"""
+        points = []
+        for i in range(NUM_FACE_LANDMARKS):
+            angle = 2 * math.pi * i / NUM_FACE_LANDMARKS
+            points.append([0.5 + 0.16 * math.cos(angle), 0.5 + 0.22 * math.sin(angle), 0.0])
+        return points
+
+    def _advance_script(self, t: float):
+        """Advance the scripted eye/head behaviour to time t (seconds from start)"""
+        # Gaze: alternate fixations with short linear saccades
+        if self.saccade_from is not None:
+            if t >= self.saccade_end:
+                self.gaze = self.fixation_target
+                self.saccade_from = None
+                self.fixation_end = t + self.rng.uniform(0.2, 1.5)
+            else:
+                progress = 1.0 - (self.saccade_end - t) / self.saccade_duration
+                fx, fy = self.saccade_from
+                tx, ty = self.fixation_target
+                self.gaze = (fx + (tx - fx) * progress, fy + (ty - fy) * progress)
+        elif t >= self.fixation_end:
+            self.saccade_from = self.gaze
+            if self.rng.random() < self.peripheral_saccade_probability:
+                target = (self.rng.uniform(0.1, 0.9), self.rng.uniform(0.1, 0.9))
+            else:
+                target = (0.5 + self.rng.gauss(0, 0.02), 0.5 + self.rng.gauss(0, 0.02))
+            self.fixation_target = target
+            self.saccade_duration = self.rng.uniform(0.03, 0.06)
+            self.saccade_end = t + self.saccade_duration
+
+        # Blinks
+        if t >= self.next_blink:
+            self.blink_end = t + self.rng.uniform(*self.blink_duration)
+            self.next_blink = self.blink_end + self.rng.uniform(*self.blink_interval)
+
+        # Head turns: occasional episodes of sustained yaw (degrees)
+        if t >= self.head_turn_end:
+            self.head_pose = HeadPose()
+            if self.rng.random() < self.head_turn_probability / self.fps:
+                self.head_pose = HeadPose(yaw=self.rng.choice([-1, 1]) * self.rng.uniform(20, 40),
+                                          pitch=self.rng.uniform(-10, 10))
+                self.head_turn_end = t + self.rng.uniform(0.5, 2.0)
+
+    def _build_landmarks(self, gaze: Tuple[float, float], head_pose: HeadPose) -> List[Landmark]:
+        points = [list(p) for p in self._base_landmarks]
+
+        # Pose landmarks; the eyes are laid out from the projected outer corners
+        projected = self.pose_model.project(head_pose, self.HEAD_DISTANCE)
+        for idx, (x, y) in zip(HeadPoseEstimator.LANDMARK_INDICES, projected):
+            points[idx] = [x, y, 0.0]
+        left_corner, right_corner = projected[2], projected[3]
+
+        # Iris offset that the uncalibrated tracker maps back to this gaze point
+        offset_x = (gaze[0] - 0.5) / self.GAZE_GAIN_X
+        offset_y = (gaze[1] - 0.5) / self.GAZE_GAIN_Y
+
+        hw, hh = self.EYE_HALF_WIDTH, self.EYE_HALF_HEIGHT
+        eyes = [
+            ((left_corner[0] + hw, left_corner[1]), [33, 160, 158, 133, 153, 144], [468, 469, 470, 471, 472]),
+            ((right_corner[0] - hw, right_corner[1]), [362, 385, 387, 263, 373, 380], [473, 474, 475, 476, 477]),
+        ]
+        for (cx, cy), contour, iris in eyes:
+            # Symmetric contour: corners, two upper lids, two lower lids
+            contour_points = [
+                (cx - hw, cy), (cx - hw / 3, cy - hh), (cx + hw / 3, cy - hh),
+                (cx + hw, cy), (cx + hw / 3, cy + hh), (cx - hw / 3, cy + hh),
+            ]
+            for idx, (x, y) in zip(contour, contour_points):
+                points[idx] = [x, y, 0.0]
+
+            ix, iy = cx + offset_x, cy + offset_y
+            r = self.IRIS_RADIUS
+            iris_points = [(ix, iy), (ix + r, iy), (ix, iy - r), (ix - r, iy), (ix, iy + r)]
+            for idx, (x, y) in zip(iris, iris_points):
+                points[idx] = [x, y, 0.0]
+
+        return [Landmark(x, y, z) for x, y, z in points]
+
+    def read(self) -> Optional[SourceFrame]:
+        if self.frame_index >= self.total_frames:
+            return None
+
+        t = self.frame_index / self.fps
+        self._advance_script(t)
+        self.frame_index += 1
+
+        fixating = self.saccade_from is None
+        gaze = self.gaze
+        if fixating:
+            gaze = (gaze[0] + self.rng.gauss(0, self.fixation_noise),
+                    gaze[1] + self.rng.gauss(0, self.fixation_noise))
+
+        noise = self.HEAD_POSE_NOISE
+        head_pose = HeadPose(self.head_pose.yaw + self.rng.gauss(0, noise),
+                             self.head_pose.pitch + self.rng.gauss(0, noise),
+                             self.head_pose.roll + self.rng.gauss(0, noise))
+
+        blinking = t < self.blink_end
+        blink_score = 0.9 if blinking else 0.05
+        blendshapes = [
+            Category('eyeBlinkLeft', blink_score),
+            Category('eyeBlinkRight', blink_score),
+        ]
+
+        return SourceFrame(
+            timestamp=self.start_time + t,
+            landmarks=self._build_landmarks(gaze, head_pose),
+            blendshapes=blendshapes,
+            ground_truth={
+                "gaze_point": gaze,
+                "is_fixating": fixating,
+                "blinking": blinking,
+                "head_yaw": head_pose.yaw,
+                "head_pitch": head_pose.pitch,
+                "head_turning": self.head_pose.yaw != 0.0,
+            }
+        )
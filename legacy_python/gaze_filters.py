@@ -0,0 +1,151 @@
+"""
+Temporal Gaze Smoothing Filters for PeriQuest
+One-Euro and constant-velocity Kalman filters with forward prediction
+"""
+
+import math
+from typing import Tuple, Optional
+
+class GazeFilter:
+    """Base class: pass-through filter
+
+    filter() takes a timestamped gaze point and returns the smoothed point;
+    predict() extrapolates the last smoothed state forward by lead_time
+    seconds to compensate for pipeline latency. State is held in plain
+    floats, so neither call allocates beyond the returned tuple.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.last_time: Optional[float] = None
+        self.x = 0.0
+        self.y = 0.0
+
+    def filter(self, timestamp: float, point: Tuple[float, float]) -> Tuple[float, float]:
+        self.last_time = timestamp
+        self.x, self.y = point
+        return point
+
+    def predict(self, lead_time: float) -> Tuple[float, float]:
+        return (self.x, self.y)
+
+class OneEuroFilter(GazeFilter):
+    """One-Euro filter (Casiez et al. 2012)
+
+    Low cutoff while the gaze is still (removes jitter), higher cutoff as
+    the gaze moves fast (keeps saccades responsive). min_cutoff trades
+    jitter for lag at rest; beta trades lag for jitter during movement.
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 5.0, d_cutoff: float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.dx = 0.0
+        self.dy = 0.0
+
+    @staticmethod
+    def _alpha(cutoff: float, dt: float) -> float:
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def filter(self, timestamp: float, point: Tuple[float, float]) -> Tuple[float, float]:
+        px, py = point
+        if self.last_time is None or timestamp <= self.last_time:
+            self.last_time = timestamp
+            self.x, self.y = px, py
+            return (px, py)
+
+        dt = timestamp - self.last_time
+        self.last_time = timestamp
+
+        # Smoothed derivative drives the adaptive cutoff
+        a_d = self._alpha(self.d_cutoff, dt)
+        self.dx += a_d * ((px - self.x) / dt - self.dx)
+        self.dy += a_d * ((py - self.y) / dt - self.dy)
+        speed = math.hypot(self.dx, self.dy)
+
+        a = self._alpha(self.min_cutoff + self.beta * speed, dt)
+        self.x += a * (px - self.x)
+        self.y += a * (py - self.y)
+        return (self.x, self.y)
+
+    def predict(self, lead_time: float) -> Tuple[float, float]:
+        return (self.x + self.dx * lead_time, self.y + self.dy * lead_time)
+
+class KalmanGazeFilter(GazeFilter):
+    """Constant-velocity Kalman filter, independent per axis
+
+    process_noise is the white-acceleration spectral density (how quickly
+    the gaze velocity may change); measurement_noise is the variance of a
+    raw gaze sample in normalized screen units.
+    """
+
+    def __init__(self, process_noise: float = 50.0, measurement_noise: float = 1e-4):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.vx = 0.0
+        self.vy = 0.0
+        # Shared 2x2 covariance [[p00, p01], [p01, p11]] (both axes use the same noise model)
+        self.p00 = 1.0
+        self.p01 = 0.0
+        self.p11 = 1.0
+
+    def filter(self, timestamp: float, point: Tuple[float, float]) -> Tuple[float, float]:
+        px, py = point
+        if self.last_time is None or timestamp <= self.last_time:
+            self.last_time = timestamp
+            self.x, self.y = px, py
+            self.vx = self.vy = 0.0
+            self.p00, self.p01, self.p11 = self.measurement_noise, 0.0, 1.0
+            return (px, py)
+
+        dt = timestamp - self.last_time
+        self.last_time = timestamp
+
+        # Predict: x += v*dt, P = F P F^T + Q
+        q = self.process_noise
+        p00 = self.p00 + dt * (2 * self.p01 + dt * self.p11) + q * dt ** 3 / 3
+        p01 = self.p01 + dt * self.p11 + q * dt ** 2 / 2
+        p11 = self.p11 + q * dt
+        x = self.x + self.vx * dt
+        y = self.y + self.vy * dt
+
+        # Update with the position measurement
+        s = p00 + self.measurement_noise
+        k0 = p00 / s
+        k1 = p01 / s
+        rx, ry = px - x, py - y
+        self.x = x + k0 * rx
+        self.y = y + k0 * ry
+        self.vx += k1 * rx
+        self.vy += k1 * ry
+        self.p00 = (1 - k0) * p00
+        self.p01 = (1 - k0) * p01
+        self.p11 = p11 - k1 * p01
+        return (self.x, self.y)
+
+    def predict(self, lead_time: float) -> Tuple[float, float]:
+        return (self.x + self.vx * lead_time, self.y + self.vy * lead_time)
+
+GAZE_FILTERS = {
+    'none': GazeFilter,
+    'one_euro': OneEuroFilter,
+    'kalman': KalmanGazeFilter,
+}
+
+def create_gaze_filter(name: str = 'one_euro', **params) -> GazeFilter:
+    """Build a gaze filter by name ('none', 'one_euro' or 'kalman')"""
+    if name not in GAZE_FILTERS:
+        raise ValueError(f"Unknown gaze filter '{name}', expected one of {list(GAZE_FILTERS)}")
+    return GAZE_FILTERS[name](**params)
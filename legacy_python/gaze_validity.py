@@ -0,0 +1,124 @@
+"""
+Gaze-Contingent Stimulus Validity for PeriQuest
+Detects stimuli the patient looked at instead of seeing them peripherally
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Tuple, Optional, List, Dict, Set
+
+class StimulusGrid:
+    """Uniform grid over the screen mapping cells to the stimuli overlapping them
+
+    A stimulus is registered in every cell its circle's bounding box
+    touches, so a point query only has to test the few stimuli of one cell.
+    """
+
+    def __init__(self, width: int, height: int, cell_size: int = 128):
+        self.cell_size = cell_size
+        self.columns = max(1, math.ceil(width / cell_size))
+        self.rows = max(1, math.ceil(height / cell_size))
+        self.cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._stimulus_cells: Dict[int, List[Tuple[int, int]]] = {}
+
+    def _cell_range(self, low: float, high: float, count: int) -> range:
+        first = min(count - 1, max(0, int(low // self.cell_size)))
+        last = min(count - 1, max(0, int(high // self.cell_size)))
+        return range(first, last + 1)
+
+    def insert(self, stimulus_id: int, x: float, y: float, radius: float):
+        cells = [(col, row)
+                 for col in self._cell_range(x - radius, x + radius, self.columns)
+                 for row in self._cell_range(y - radius, y + radius, self.rows)]
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(stimulus_id)
+        self._stimulus_cells[stimulus_id] = cells
+
+    def remove(self, stimulus_id: int):
+        for cell in self._stimulus_cells.pop(stimulus_id, ()):
+            members = self.cells[cell]
+            members.discard(stimulus_id)
+            if not members:
+                del self.cells[cell]
+
+    def query(self, x: float, y: float) -> Set[int]:
+        col = int(x // self.cell_size)
+        row = int(y // self.cell_size)
+        return self.cells.get((col, row), set())
+
+    def __len__(self) -> int:
+        return len(self._stimulus_cells)
+
+@dataclass
+class _Target:
+    x: float
+    y: float
+    radius: float
+    onset_time: float
+    hits: int = 0
+    looked_at: Optional[float] = None
+
+class GazeValidityTracker:
+    """Flags stimuli that received a saccade while they were on screen
+
+    Active stimuli live in a StimulusGrid; each gaze sample (calibrated,
+    normalized screen coordinates) is tested only against the stimuli in
+    its grid cell. A stimulus counts as looked at once min_samples
+    consecutive samples fall within its radius plus tolerance_px, which
+    covers the tracker's gaze error; samples captured before the stimulus
+    onset are ignored. Reactions to looked-at stimuli are not peripheral
+    detections.
+    """
+
+    def __init__(self, screen_size: Tuple[int, int], tolerance_px: float = 60.0,
+                 min_samples: int = 2, cell_size: int = 128):
+        self.width, self.height = screen_size
+        self.tolerance_px = tolerance_px
+        self.min_samples = min_samples
+        self.grid = StimulusGrid(self.width, self.height, cell_size)
+        self.targets: Dict[int, _Target] = {}
+        self._in_progress: Set[int] = set()  # targets with a run of hits going
+
+    def add_stimulus(self, stimulus_id: int, x: float, y: float, size: float, onset_time: float):
+        """Start watching a stimulus from its (display) onset"""
+        self.remove_stimulus(stimulus_id)
+        radius = size / 2 + self.tolerance_px
+        self.targets[stimulus_id] = _Target(x, y, radius, onset_time)
+        self.grid.insert(stimulus_id, x, y, radius)
+
+    def remove_stimulus(self, stimulus_id: int):
+        self.targets.pop(stimulus_id, None)
+        self._in_progress.discard(stimulus_id)
+        self.grid.remove(stimulus_id)
+
+    def update(self, timestamp: float, gaze_point: Optional[Tuple[float, float]]) -> List[int]:
+        """Add one gaze sample (None while blinking or lost); ids newly looked at"""
+        if gaze_point is None:
+            return []
+        x = gaze_point[0] * self.width
+        y = gaze_point[1] * self.height
+        candidates = self.grid.query(x, y)
+
+        newly_looked = []
+        hit = set()
+        for stimulus_id in candidates:
+            target = self.targets[stimulus_id]
+            if target.looked_at is not None or timestamp < target.onset_time:
+                continue
+            if (x - target.x) ** 2 + (y - target.y) ** 2 <= target.radius ** 2:
+                target.hits += 1
+                if target.hits >= self.min_samples:
+                    target.looked_at = timestamp
+                    newly_looked.append(stimulus_id)
+                else:
+                    hit.add(stimulus_id)
+        # Runs of hits on stimuli the gaze has left are broken
+        for stimulus_id in self._in_progress - hit:
+            self.targets[stimulus_id].hits = 0
+        self._in_progress = hit
+        return newly_looked
+
+    def looked_at(self, stimulus_id: int) -> Optional[float]:
+        """Time the stimulus was first looked at, None if it wasn't (or is unknown)"""
+        target = self.targets.get(stimulus_id)
+        return target.looked_at if target else None
@@ -0,0 +1,144 @@
+"""
+Head Pose Estimation for PeriQuest
+Yaw, pitch and roll from the facial transformation matrix or a solvePnP fit
+"""
+
+import math
+import cv2
+import numpy as np
+from dataclasses import dataclass
+from typing import Tuple, Optional, Sequence
+
+@dataclass
+class HeadPose:
+    """Head rotation in degrees, in OpenCV camera axes (x right, y down)
+
+    yaw > 0 turns the nose towards image left, pitch > 0 tilts the nose down
+    and roll > 0 tilts the head clockwise in the image. All zero is a face
+    looking straight into the camera.
+    """
+    yaw: float = 0.0
+    pitch: float = 0.0
+    roll: float = 0.0
+
+def rotation_to_euler(rotation: np.ndarray) -> Tuple[float, float, float]:
+    """(yaw, pitch, roll) in degrees for R = Ry(yaw) @ Rx(pitch) @ Rz(roll)"""
+    pitch = math.asin(max(-1.0, min(1.0, -rotation[1, 2])))
+    yaw = math.atan2(rotation[0, 2], rotation[2, 2])
+    roll = math.atan2(rotation[1, 0], rotation[1, 1])
+    return math.degrees(yaw), math.degrees(pitch), math.degrees(roll)
+
+def euler_to_rotation(yaw: float, pitch: float, roll: float) -> np.ndarray:
+    """Inverse of rotation_to_euler (angles in degrees)"""
+    y, p, r = math.radians(yaw), math.radians(pitch), math.radians(roll)
+    ry = np.array([[math.cos(y), 0, math.sin(y)], [0, 1, 0], [-math.sin(y), 0, math.cos(y)]])
+    rx = np.array([[1, 0, 0], [0, math.cos(p), -math.sin(p)], [0, math.sin(p), math.cos(p)]])
+    rz = np.array([[math.cos(r), -math.sin(r), 0], [math.sin(r), math.cos(r), 0], [0, 0, 1]])
+    return ry @ rx @ rz
+
+# MediaPipe's transformation matrix uses OpenGL axes (y up, z towards the
+# viewer); conjugating by this flip expresses it in OpenCV camera axes
+_GL_TO_CV = np.diag([1.0, -1.0, -1.0])
+
+class HeadPoseEstimator:
+    """Per-frame head pose from FaceLandmarker output
+
+    Prefers the landmarker's facial transformation matrix (a 3x3 slice and
+    one Euler decomposition). Without it, a six-point solvePnP fit against a
+    generic 3D face model is used; the model points and camera matrix are
+    built once, and each fit starts from the previous frame's solution.
+    """
+
+    # Nose tip, chin, outer eye corners (image left, image right), mouth corners
+    LANDMARK_INDICES = (1, 152, 33, 263, 61, 291)
+
+    # Generic face model (arbitrary units, ~0.1 mm), OpenCV axes, facing -z
+    MODEL_POINTS = np.array([
+        (0.0, 0.0, 0.0),
+        (0.0, 330.0, 65.0),
+        (-225.0, -170.0, 135.0),
+        (225.0, -170.0, 135.0),
+        (-150.0, 150.0, 125.0),
+        (150.0, 150.0, 125.0),
+    ], dtype=np.float64)
+
+    def __init__(self, image_size: Tuple[int, int] = (640, 480)):
+        self.image_size = None
+        self.set_image_size(image_size)
+        self._image_points = np.zeros((len(self.LANDMARK_INDICES), 2), dtype=np.float64)
+        self.reset()
+
+    def set_image_size(self, image_size: Tuple[int, int]):
+        """Rebuild the pinhole camera matrix when the frame size changes"""
+        image_size = tuple(image_size)
+        if image_size == self.image_size:
+            return
+        width, height = image_size
+        self.image_size = image_size
+        # Focal length ~ image width is a good fit for typical webcams
+        self.camera_matrix = np.array([
+            [width, 0, width / 2],
+            [0, width, height / 2],
+            [0, 0, 1],
+        ], dtype=np.float64)
+        self.dist_coeffs = np.zeros((4, 1), dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        """Forget the previous solution (e.g. after tracking is lost)"""
+        self._rvec: Optional[np.ndarray] = None
+        self._tvec: Optional[np.ndarray] = None
+
+    @staticmethod
+    def from_matrix(matrix: Sequence) -> HeadPose:
+        """Pose from a 4x4 facial transformation matrix"""
+        rotation = np.asarray(matrix, dtype=np.float64)[:3, :3]
+        # Strip any uniform scale the matrix carries
+        rotation = rotation / np.cbrt(np.linalg.det(rotation))
+        return HeadPose(*rotation_to_euler(_GL_TO_CV @ rotation @ _GL_TO_CV))
+
+    def from_landmarks(self, landmarks) -> Optional[HeadPose]:
+        """Pose from normalized landmarks via solvePnP; None if the fit fails"""
+        width, height = self.image_size
+        points = self._image_points
+        for row, index in enumerate(self.LANDMARK_INDICES):
+            landmark = landmarks[index]
+            points[row, 0] = landmark.x * width
+            points[row, 1] = landmark.y * height
+
+        if self._rvec is None:
+            ok, rvec, tvec = cv2.solvePnP(self.MODEL_POINTS, points, self.camera_matrix,
+                                          self.dist_coeffs, flags=cv2.SOLVEPNP_EPNP)
+            if ok:
+                # Refine the closed-form estimate; later frames start from here
+                ok, rvec, tvec = cv2.solvePnP(self.MODEL_POINTS, points, self.camera_matrix,
+                                              self.dist_coeffs, rvec, tvec, useExtrinsicGuess=True)
+        else:
+            ok, rvec, tvec = cv2.solvePnP(self.MODEL_POINTS, points, self.camera_matrix,
+                                          self.dist_coeffs, self._rvec, self._tvec,
+                                          useExtrinsicGuess=True)
+        if not ok or tvec[2, 0] <= 0:
+            self.reset()
+            return None
+
+        self._rvec, self._tvec = rvec, tvec
+        rotation, _ = cv2.Rodrigues(rvec)
+        return HeadPose(*rotation_to_euler(rotation))
+
+    def project(self, pose: HeadPose, distance: float,
+                center: Tuple[float, float] = (0.5, 0.5)) -> np.ndarray:
+        """Normalized image positions of MODEL_POINTS for a pose
+
+        The nose tip sits `distance` model units in front of the camera at
+        `center`. Used to synthesize landmarks that the solver can recover.
+        """
+        width, height = self.image_size
+        cx, cy = center
+        fx = self.camera_matrix[0, 0]
+        translation = np.array([(cx - 0.5) * width * distance / fx,
+                                (cy - 0.5) * height * distance / fx,
+                                distance], dtype=np.float64)
+        rvec, _ = cv2.Rodrigues(euler_to_rotation(pose.yaw, pose.pitch, pose.roll))
+        projected, _ = cv2.projectPoints(self.MODEL_POINTS, rvec, translation,
+                                         self.camera_matrix, self.dist_coeffs)
+        return projected.reshape(-1, 2) / (width, height)
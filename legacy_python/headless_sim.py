@@ -0,0 +1,294 @@
+"""
+Headless Simulation for PeriQuest
+Runs the game logic against a scripted virtual patient, faster than real time
+
+No window, camera or human is needed: the game's fixed-step simulation is
+driven by a simulated clock, presses come from a patient model with
+per-field reaction-time distributions and miss rates, and a virtual eye
+tracker produces the gaze and pupil stream. Each session yields the same
+SessionMetrics.to_dict() output as a real one.
+
+Usage:
+    python headless_sim.py --sessions 1000 --profile healthy
+    python headless_sim.py --sessions 200 --profile left_neglect --duration 300 --output sim.csv
+"""
+
+import io
+import csv
+import math
+import time
+import heapq
+import random
+import argparse
+import contextlib
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Tuple
+
+from session_clock import SessionClock
+from tasks_eye_tracker import EyeData
+from periquest_enhanced import EnhancedPeriQuestGame, GameState, VisualField, Stimulus
+
+# ==================== CLOCK ====================
+class SimulatedClock(SessionClock):
+    """Session clock that only moves when advanced"""
+
+    def __init__(self, start: float = 0.0, display_latency: float = 0.0):
+        super().__init__(display_latency=display_latency)
+        self.time = start
+        self._wall_offset = time.time() - start
+
+    def now(self) -> float:
+        return self.time
+
+    def advance(self, seconds: float):
+        self.time += seconds
+
+# ==================== PATIENT MODEL ====================
+@dataclass
+class FieldResponse:
+    """How the patient responds to stimuli in one visual field"""
+    mean_rt_ms: float = 450.0
+    sd_rt_ms: float = 100.0
+    miss_rate: float = 0.03  # targets never responded to
+    look_rate: float = 0.05  # stimuli the patient saccades to
+
+@dataclass
+class VirtualPatient:
+    """Scripted patient: reaction times, misses, false alarms and gaze behavior
+
+    Reaction times are log-normal with the field's mean and SD. Presses to
+    distractors happen with distractor_press_rate, and presses with no
+    stimulus as a Poisson process of false_alarm_rate per second. Looked-at
+    stimuli draw the gaze saccade_latency_ms after onset for dwell_ms;
+    otherwise the gaze holds the center with gaze_noise (normalized SD).
+    """
+    fields: Dict[str, FieldResponse] = field(default_factory=dict)
+    false_alarm_rate: float = 0.01
+    distractor_press_rate: float = 0.1
+    gaze_noise: float = 0.01
+    saccade_latency_ms: float = 200.0
+    dwell_ms: float = 300.0
+    pupil_baseline: float = 0.1
+    pupil_dilation: float = 0.05  # task-evoked peak, relative
+
+    def response(self, visual_field: VisualField) -> FieldResponse:
+        return self.fields.get(visual_field.value) or FieldResponse()
+
+    def reaction_time(self, visual_field: VisualField, rng: random.Random) -> float:
+        """One reaction time in seconds"""
+        response = self.response(visual_field)
+        mean, sd = response.mean_rt_ms, response.sd_rt_ms
+        sigma = math.sqrt(math.log(1 + (sd / mean) ** 2))
+        mu = math.log(mean) - sigma ** 2 / 2
+        return rng.lognormvariate(mu, sigma) / 1000
+
+    @classmethod
+    def from_profile(cls, name: str) -> 'VirtualPatient':
+        return PROFILES[name]()
+
+def _healthy() -> VirtualPatient:
+    return VirtualPatient()
+
+def _left_neglect() -> VirtualPatient:
+    impaired = FieldResponse(mean_rt_ms=750, sd_rt_ms=200, miss_rate=0.35, look_rate=0.15)
+    return VirtualPatient(fields={f: impaired for f in ('left', 'top_left', 'bottom_left')})
+
+def _tunnel_vision() -> VirtualPatient:
+    # Loss grows towards the corners of the visual field
+    edge = FieldResponse(mean_rt_ms=650, sd_rt_ms=180, miss_rate=0.25, look_rate=0.2)
+    corner = FieldResponse(mean_rt_ms=850, sd_rt_ms=250, miss_rate=0.5, look_rate=0.3)
+    fields = {f: edge for f in ('left', 'right', 'top', 'bottom')}
+    fields.update({f: corner for f in ('top_left', 'top_right', 'bottom_left', 'bottom_right')})
+    return VirtualPatient(fields=fields)
+
+def _impulsive() -> VirtualPatient:
+    fast = FieldResponse(mean_rt_ms=320, sd_rt_ms=80, miss_rate=0.02, look_rate=0.3)
+    return VirtualPatient(fields={f.value: fast for f in VisualField},
+                          false_alarm_rate=0.1, distractor_press_rate=0.5)
+
+PROFILES = {
+    'healthy': _healthy,
+    'left_neglect': _left_neglect,
+    'tunnel_vision': _tunnel_vision,
+    'impulsive': _impulsive,
+}
+
+# ==================== VIRTUAL TRACKER ====================
+class _Calibration:
+    is_calibrated = True
+
+class VirtualEyeTracker:
+    """Stands in for EnhancedEyeTracker, sampling the patient's gaze at sample_rate"""
+
+    def __init__(self, patient: VirtualPatient, clock: SimulatedClock, rng: random.Random,
+                 sample_rate: float = 30.0):
+        self.patient = patient
+        self.clock = clock
+        self.rng = rng
+        self.sample_interval = 1.0 / sample_rate
+        self.calibration = _Calibration()
+        self.blinks: List = []
+        self.head_movements: List = []
+        self.frame_count = 0
+        self._next_sample = clock.now()
+        self._looks: List[Tuple[float, float, Tuple[float, float]]] = []  # (start, end, point)
+        self._onsets: List[float] = []
+
+    def look_at(self, start: float, end: float, point: Tuple[float, float]):
+        self._looks.append((start, end, point))
+
+    def stimulus_onset(self, onset: float):
+        self._onsets.append(onset)
+
+    def _pupil(self, now: float) -> float:
+        # Gamma-shaped dilation peaking 1 s after each onset, gone after 3 s
+        self._onsets = [t for t in self._onsets if now - t < 3.0]
+        dilation = sum((now - t) * math.exp(1 - (now - t)) for t in self._onsets if now >= t)
+        size = self.patient.pupil_baseline * (1 + self.patient.pupil_dilation * dilation)
+        return size * (1 + self.rng.gauss(0, 0.01))
+
+    def get_eye_data(self) -> Optional[EyeData]:
+        now = self.clock.now()
+        if now < self._next_sample:
+            return None
+        self._next_sample += self.sample_interval
+        self.frame_count += 1
+
+        self._looks = [look for look in self._looks if look[1] > now]
+        looking = next((point for start, _, point in self._looks if start <= now), None)
+        center = looking or (0.5, 0.5)
+        noise = self.patient.gaze_noise
+        gaze = (center[0] + self.rng.gauss(0, noise), center[1] + self.rng.gauss(0, noise))
+        return EyeData(timestamp=now, gaze_point=gaze, raw_gaze_point=gaze,
+                       pupil_diameter=self._pupil(now), is_fixating=looking is None)
+
+    def release(self):
+        pass
+
+# ==================== SESSION ====================
+def simulate_session(patient: VirtualPatient, duration: float = 300.0, seed: Optional[int] = None,
+                     config: Optional[Dict[str, Any]] = None, patient_id: str = "virtual",
+                     with_eye_tracking: bool = True, trace_interval: float = 30.0) -> Dict[str, Any]:
+    """Run one session to completion; SessionMetrics.to_dict() of the result
+
+    config overrides GameConfig attributes (e.g. SIMULATION_HZ, SPAWN_JITTER).
+    Two extra keys describe the course of the session: "level_times" maps
+    each level reached to the session time it was first reached, and
+    "trace" holds (time, level, total_stimuli, correct_reactions, score)
+    every trace_interval seconds.
+    """
+    rng = random.Random(seed)
+    clock = SimulatedClock()
+    tracker = VirtualEyeTracker(patient, clock, rng) if with_eye_tracking else None
+
+    # The game reports progress with print(); thousands of sessions would flood the console
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = EnhancedPeriQuestGame(patient_id, eye_tracker=tracker, clock=clock,
+                                     rng=random.Random(rng.random()), headless=True)
+        # Simulated sessions stay in memory: no checkpoints, trial or eye sample logs on disk
+        game.config.CHECKPOINT_INTERVAL = 0
+        game.config.LONG_SESSION_MINUTES = math.inf
+        for name, value in (config or {}).items():
+            setattr(game.config, name, value)
+        game.config.SESSION_DURATION = duration
+        game.time_step = 1.0 / game.config.SIMULATION_HZ
+        screen_size = (game.config.SCREEN_WIDTH, game.config.SCREEN_HEIGHT)
+
+        game.start_session()
+        game._begin_playing()
+        presses: List[float] = []
+        level_times = {game.current_level: 0.0}
+        trace = []
+        next_trace = trace_interval
+        next_false_alarm = (clock.now() + rng.expovariate(patient.false_alarm_rate)
+                            if patient.false_alarm_rate > 0 else math.inf)
+
+        while game.state == GameState.PLAYING:
+            clock.advance(game.time_step)
+            now = clock.now()
+            while presses and presses[0] <= now:
+                game._handle_reaction(heapq.heappop(presses))
+            while next_false_alarm <= now:
+                game._handle_reaction(next_false_alarm)
+                next_false_alarm += rng.expovariate(patient.false_alarm_rate)
+
+            game.step()
+            shown = list(game.stimulus_manager.pending_onsets)
+            game._on_frame_presented(clock.flip_time())
+            for stimulus in shown:
+                _script_response(patient, stimulus, tracker, presses, rng, screen_size)
+
+            elapsed = game.sim_time - game.session_start_time
+            level_times.setdefault(game.current_level, elapsed)
+            if elapsed >= next_trace:
+                metrics = game.metrics
+                trace.append((round(elapsed, 3), game.current_level, metrics.total_stimuli,
+                              metrics.correct_reactions, metrics.score))
+                next_trace += trace_interval
+
+        if tracker:
+            tracker.release()
+    return {**game.metrics.to_dict(), "level_times": level_times, "trace": trace}
+
+def _script_response(patient: VirtualPatient, stimulus: Stimulus, tracker: Optional[VirtualEyeTracker],
+                     presses: List[float], rng: random.Random, screen_size: Tuple[int, int]):
+    """Decide how the patient will respond to a stimulus that just appeared"""
+    onset = stimulus.appear_time
+    response = patient.response(stimulus.field)
+    if tracker:
+        tracker.stimulus_onset(onset)
+        if rng.random() < response.look_rate:
+            start = onset + patient.saccade_latency_ms / 1000
+            point = (stimulus.x / screen_size[0], stimulus.y / screen_size[1])
+            tracker.look_at(start, start + patient.dwell_ms / 1000, point)
+
+    press_probability = (1 - response.miss_rate) if stimulus.is_target else patient.distractor_press_rate
+    if rng.random() < press_probability:
+        heapq.heappush(presses, onset + patient.reaction_time(stimulus.field, rng))
+
+# ==================== CLI ====================
+SUMMARY_FIELDS = [
+    'session', 'seed', 'level', 'total_stimuli', 'correct_reactions', 'missed_stimuli',
+    'false_positives', 'gaze_invalid_reactions', 'average_reaction_time_ms',
+    'accuracy_percentage', 'fixation_breaks', 'score',
+]
+
+def _mean_sd(values: List[float]) -> Tuple[float, float]:
+    mean = sum(values) / len(values)
+    return mean, math.sqrt(sum((v - mean) ** 2 for v in values) / len(values))
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate PeriQuest sessions with a virtual patient")
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--profile', choices=list(PROFILES), default='healthy')
+    parser.add_argument('--duration', type=float, default=300.0, help="Session length (s)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the first session")
+    parser.add_argument('--no-eye-tracking', action='store_true')
+    parser.add_argument('--output', help="CSV file for per-session results")
+    args = parser.parse_args()
+
+    patient = VirtualPatient.from_profile(args.profile)
+    results = []
+    started = time.perf_counter()
+    for index in range(args.sessions):
+        seed = args.seed + index
+        result = simulate_session(patient, args.duration, seed=seed, patient_id=f"virtual_{seed}",
+                                  with_eye_tracking=not args.no_eye_tracking)
+        results.append({"session": index, "seed": seed, **result})
+    elapsed = time.perf_counter() - started
+
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(results)
+
+    print(f"✓ {args.sessions} '{args.profile}' sessions of {args.duration:.0f}s in {elapsed:.1f}s "
+          f"({args.sessions * args.duration / elapsed:.0f}x real time)")
+    for name in ('accuracy_percentage', 'average_reaction_time_ms', 'level', 'score',
+                 'false_positives', 'gaze_invalid_reactions'):
+        mean, sd = _mean_sd([r[name] for r in results])
+        print(f"  {name:<26} {mean:8.1f} ± {sd:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,13 @@ Improved version with advanced eye tracking and comprehensive reporting
 """
 
 import pygame
-import time
+import os
 import random
 import math
+import heapq
+import bisect
 import numpy as np
+from array import array
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
@@ -15,18 +18,38 @@ from enum import Enum
 
 class GameState(Enum):
     INSTRUCTIONS = "instructions"
+    CALIBRATION = "calibration"
     PLAYING = "playing"
     RESULTS = "results"
-from collections import deque
+from collections import deque, OrderedDict
+
+from eye_data_store import EyeDataStore
+from session_stats import TrialStats
+from session_log import SessionLog, SpillingEyeDataStore
+from session_checkpoint import CheckpointWriter, load_checkpoint, remove_checkpoint
+from session_clock import SessionClock
+from pupillometry import PupilResponseTracker
+from gaze_validity import GazeValidityTracker
+from render_cache import RenderCache
+from dirty_rects import DirtyRectRenderer, Layer
 
 try:
-    from tasks_eye_tracker import EnhancedEyeTracker, EyeData
-    EYE_TRACKING_AVAILABLE = True
-    print("✓ Using MediaPipe Tasks API Eye Tracker")
+    from tasks_eye_tracker import EnhancedEyeTracker, EyeData, MEDIAPIPE_AVAILABLE
+    EYE_TRACKING_AVAILABLE = MEDIAPIPE_AVAILABLE
+    if EYE_TRACKING_AVAILABLE:
+        print("✓ Using MediaPipe Tasks API Eye Tracker")
+    else:
+        print("⚠ Eye tracking not available (mediapipe not installed)")
 except ImportError:
     print("⚠ Eye tracking not available (tasks_eye_tracker.py missing)")
     EYE_TRACKING_AVAILABLE = False
 
+try:
+    from tracking_server import TrackingClient
+    TRACKING_SERVER_AVAILABLE = True
+except ImportError:
+    TRACKING_SERVER_AVAILABLE = False
+
 try:
     from report_generator import ReportGenerator
     REPORTING_AVAILABLE = True
@@ -46,9 +69,21 @@ class GameConfig:
     SCREEN_HEIGHT: int = 720
     FPS: int = 60
     
+    # Game logic runs in fixed steps regardless of the achieved frame rate
+    SIMULATION_HZ: int = 60
+    MAX_CATCH_UP_STEPS: int = 5  # beyond this the simulation skips ahead instead of spiralling
+    
     # Session
     SESSION_DURATION: int = 300  # 5 minutes
     
+    # Sessions longer than this keep eye samples and trials in an on-disk log, not in memory
+    LONG_SESSION_MINUTES: float = 30.0
+    SESSION_LOG_DIR: str = "session_logs"
+    SPILL_CHUNK_SAMPLES: int = 1800  # eye samples held in memory (1 minute at 30 FPS)
+    RECENT_REACTION_TIMES: int = 1000  # reaction times held in memory
+    # Seconds between crash-safe snapshots in SESSION_LOG_DIR (0 turns checkpoints and the trial log off)
+    CHECKPOINT_INTERVAL: float = 5.0
+    
     # Colors - Modern palette
     BG_COLOR: Tuple[int, int, int] = (15, 23, 42)  # Dark blue-gray
     CENTER_DOT_COLOR: Tuple[int, int, int] = (34, 211, 238)  # Cyan
@@ -69,6 +104,16 @@ class GameConfig:
     MIN_STIM_SIZE: int = 30
     MAX_STIM_SIZE: int = 120
     STIMULUS_DURATIONS: Dict[int, int] = None
+    # Stimuli spawn every level spawn interval plus an exponential delay with this mean (s)
+    SPAWN_JITTER: float = 0.8
+    
+    # Level progression
+    # level -> (accuracy % above, average RT ms below, minimum stimuli) to advance
+    LEVEL_UP_RULES: Dict[int, Tuple[float, float, int]] = None
+    LEVEL_DOWN_ACCURACY: float = 40.0  # drop a level below this accuracy %
+    LEVEL_DOWN_MIN_STIMULI: int = 8
+    LEVEL_CHANGE_COOLDOWN: float = 20.0  # minimum seconds between level changes
+    SPAWN_INTERVALS: Dict[int, float] = None  # seconds between stimuli per level
     
     # Scoring
     PERFECT_RT: int = 500
@@ -79,10 +124,34 @@ class GameConfig:
     SLOW_SCORE: int = 25
     MISS_PENALTY: int = -5
     
+    # Gaze calibration (GRID x GRID on-screen targets)
+    CALIBRATION_GRID: int = 3
+    CALIBRATION_POINT_DURATION: float = 1.5  # seconds per target
+    CALIBRATION_SETTLE_TIME: float = 0.5  # ignore samples while the eyes move to the target
+    
+    # Eye tracking runs in the game loop; degrade tracking rate to keep frames under this
+    TRACKING_LATENCY_BUDGET_MS: float = 20.0
+    
+    # Fixed hardware delays removed from reaction times (measure per setup, e.g. with a photodiode)
+    DISPLAY_LATENCY_MS: float = 0.0  # display flip to light on the screen
+    INPUT_LATENCY_MS: float = 0.0  # key press to pygame event
+    
+    # Reactions to stimuli the gaze landed on (within this of their edge) don't count
+    GAZE_TARGET_TOLERANCE_PX: float = 60.0
+    
+    # Present only changed screen regions while playing (full flips otherwise)
+    DIRTY_RECT_RENDERING: bool = True
+    
     def __post_init__(self):
         self.STIMULUS_DURATIONS = {
             1: 3000, 2: 2500, 3: 2000, 4: 1500, 5: 1000
         }
+        self.LEVEL_UP_RULES = {
+            1: (75, 1500, 5), 2: (70, 1200, 10), 3: (65, 1000, 15), 4: (60, 800, 20)
+        }
+        self.SPAWN_INTERVALS = {
+            1: 2.5, 2: 2.0, 3: 1.7, 4: 1.4, 5: 1.0
+        }
 
 # ==================== ENUMS ====================
 class StimulusType(Enum):
@@ -112,14 +181,18 @@ class Stimulus:
     y: int
     size: int
     color: Tuple[int, int, int]
-    appear_time: float
+    appear_time: float  # spawn time until shown, then the onset at the display flip
     duration_ms: int
     level: int
     is_target: bool = True
     reacted: bool = False
     reaction_time: Optional[float] = None
+    shown: bool = False
+    onset_gaze: Optional[Tuple[float, float]] = None  # normalized gaze when it appeared
     
     def is_expired(self, current_time: float) -> bool:
+        if not self.shown:
+            return False
         elapsed = (current_time - self.appear_time) * 1000
         return elapsed > self.duration_ms
     
@@ -138,48 +211,99 @@ class SessionMetrics:
     correct_reactions: int = 0
     missed_stimuli: int = 0
     false_positives: int = 0
+    gaze_invalid_reactions: int = 0
     total_reaction_time: float = 0.0
-    reaction_times: List[float] = None
-    field_performance: Dict[str, Dict] = None
-    head_movements: int = 0
+    reaction_times: array = None  # ms, in trial order (only the latest in long sessions)
+    field_stats: TrialStats = None
+    level_stats: TrialStats = None
+    head_movements: List = None
     fixation_breaks: int = 0
     score: int = 0
-    eye_tracking_data: List = None
+    eye_tracking_data: EyeDataStore = None
+    blinks: List = None
+    pupillometry: PupilResponseTracker = None
+    log: Optional[SessionLog] = None  # where trial events go, if anywhere
+    # Session clock time play began (or resumed) and seconds played in total;
+    # blinks and head movements before play_started aren't counted
+    play_started: Optional[float] = None
+    play_time: float = 0.0
+    # Events from before a resume (the tracker's event lists start empty again)
+    earlier_blinks: int = 0
+    earlier_head_movements: int = 0
+    earlier_head_movement_time: float = 0.0
+    
+    # Plain values carried by to_state()
+    STATE_FIELDS = ('level', 'total_stimuli', 'correct_reactions', 'missed_stimuli', 'false_positives',
+                    'gaze_invalid_reactions', 'total_reaction_time', 'fixation_breaks', 'score')
     
     def __post_init__(self):
         if self.reaction_times is None:
-            self.reaction_times = []
-        if self.field_performance is None:
-            self.field_performance = {
-                field.value: {"correct": 0, "total": 0, "avg_rt": 0.0}
-                for field in VisualField
-            }
+            self.reaction_times = array('d')
+        # Running aggregates, so per-frame queries don't depend on session length
+        if self.field_stats is None:
+            self.field_stats = TrialStats(field.value for field in VisualField)
+        if self.level_stats is None:
+            self.level_stats = TrialStats()
         if self.eye_tracking_data is None:
-            self.eye_tracking_data = []
+            self.eye_tracking_data = EyeDataStore()
+        if self.blinks is None:
+            self.blinks = []
+        if self.head_movements is None:
+            self.head_movements = []
+        if self.pupillometry is None:
+            self.pupillometry = PupilResponseTracker()
     
     def add_reaction(self, stimulus: Stimulus, reaction_time: float):
         self.correct_reactions += 1
         self.total_reaction_time += reaction_time
-        self.reaction_times.append(reaction_time * 1000)  # Convert to ms
-        
-        field_stats = self.field_performance[stimulus.field.value]
-        field_stats["correct"] += 1
-        field_stats["total"] += 1
-        if field_stats["correct"] > 0:
-            field_stats["avg_rt"] = (
-                (field_stats["avg_rt"] * (field_stats["correct"] - 1)) + 
-                (reaction_time * 1000)
-            ) / field_stats["correct"]
+        rt_ms = reaction_time * 1000  # Convert to ms
+        self.reaction_times.append(rt_ms)
+        self.field_stats.record(stimulus.field.value, 'correct', rt_ms)
+        self.level_stats.record(stimulus.level, 'correct', rt_ms)
+        self._log_trial(stimulus, 'correct', rt_ms)
+    
+    def add_gaze_invalid_reaction(self, stimulus: Stimulus):
+        """Reaction after looking at the target: not a peripheral detection"""
+        self.gaze_invalid_reactions += 1
+        self.field_stats.record(stimulus.field.value, 'gaze_invalid')
+        self.level_stats.record(stimulus.level, 'gaze_invalid')
+        self._log_trial(stimulus, 'gaze_invalid')
     
     def add_miss(self, stimulus: Stimulus):
         self.missed_stimuli += 1
-        field_stats = self.field_performance[stimulus.field.value]
-        field_stats["total"] += 1
+        self.field_stats.record(stimulus.field.value, 'missed')
+        self.level_stats.record(stimulus.level, 'missed')
+        self._log_trial(stimulus, 'missed')
+    
+    def add_false_positive(self, press_time: float):
+        self.false_positives += 1
+        if self.log is not None:
+            self.log.append_trial(press_time, 'false_positive')
+    
+    def _log_trial(self, stimulus: Stimulus, outcome: str, rt_ms: Optional[float] = None):
+        if self.log is not None:
+            self.log.append_trial(stimulus.appear_time, outcome, stimulus=stimulus.id,
+                                  field=stimulus.field.value, type=stimulus.type.value,
+                                  level=stimulus.level, target=stimulus.is_target, size=stimulus.size,
+                                  position=(stimulus.x, stimulus.y), rt_ms=rt_ms,
+                                  gaze=stimulus.onset_gaze)
+    
+    @property
+    def field_performance(self) -> Dict[str, Dict]:
+        """Per-field outcome counts and mean reaction time (ms)"""
+        stats = self.field_stats
+        return {
+            field: {"correct": stats.count('correct', field), "total": stats.total(field),
+                    "avg_rt": stats.mean_rt(field), "gaze_invalid": stats.count('gaze_invalid', field)}
+            for field in stats.rows
+        }
     
     def calculate_average_rt(self) -> float:
-        if not self.reaction_times:
-            return 0.0
-        return sum(self.reaction_times) / len(self.reaction_times)
+        return self.field_stats.mean_rt()
+    
+    def calculate_rt_quantile(self, q: float) -> float:
+        """Approximate reaction-time quantile (ms), e.g. 0.5 for the median"""
+        return self.field_stats.rt_quantile(q)
     
     def calculate_accuracy(self) -> float:
         if self.total_stimuli == 0:
@@ -187,11 +311,11 @@ class SessionMetrics:
         return (self.correct_reactions / self.total_stimuli) * 100
     
     def get_side_bias(self) -> Dict:
-        left_stats = self.field_performance["left"]
-        right_stats = self.field_performance["right"]
+        stats = self.field_stats
+        left_total, right_total = stats.total("left"), stats.total("right")
         
-        left_acc = (left_stats["correct"] / left_stats["total"] * 100) if left_stats["total"] > 0 else 0
-        right_acc = (right_stats["correct"] / right_stats["total"] * 100) if right_stats["total"] > 0 else 0
+        left_acc = (stats.count("correct", "left") / left_total * 100) if left_total > 0 else 0
+        right_acc = (stats.count("correct", "right") / right_total * 100) if right_total > 0 else 0
         
         bias_pct = 0
         if max(left_acc, right_acc) > 0:
@@ -204,6 +328,59 @@ class SessionMetrics:
             "right_accuracy": right_acc,
         }
     
+    def calculate_blink_rate(self) -> float:
+        """Blinks per minute of play so far"""
+        minutes = self.play_time / 60
+        return self.blink_count() / minutes if minutes > 0 else 0.0
+    
+    def _events_in_play(self, events: List) -> List:
+        if self.play_started is None:
+            return []
+        return [event for event in events if event.start_time >= self.play_started]
+    
+    def blink_count(self) -> int:
+        return self.earlier_blinks + len(self._events_in_play(self.blinks))
+    
+    def head_movement_count(self) -> int:
+        return self.earlier_head_movements + len(self._events_in_play(self.head_movements))
+    
+    def head_movement_time(self) -> float:
+        in_play = self._events_in_play(self.head_movements)
+        return self.earlier_head_movement_time + sum(event.duration for event in in_play)
+    
+    def to_state(self) -> Dict:
+        """Snapshot for a session checkpoint (eye samples and pupillometry are not included)"""
+        state = {name: getattr(self, name) for name in self.STATE_FIELDS}
+        state.update({
+            "patient_id": self.patient_id,
+            "session_id": self.session_id,
+            "start_time": self.start_time.isoformat(),
+            "reaction_times": list(self.reaction_times),
+            "field_stats": self.field_stats.to_state(),
+            "level_stats": self.level_stats.to_state(),
+            "blinks": self.blink_count(),
+            "head_movements": self.head_movement_count(),
+            "head_movement_time": self.head_movement_time(),
+        })
+        return state
+    
+    @classmethod
+    def from_state(cls, state: Dict) -> 'SessionMetrics':
+        metrics = cls(
+            patient_id=state["patient_id"],
+            session_id=state["session_id"],
+            start_time=datetime.fromisoformat(state["start_time"]),
+            reaction_times=array('d', state["reaction_times"]),
+            field_stats=TrialStats.from_state(state["field_stats"]),
+            level_stats=TrialStats.from_state(state["level_stats"]),
+            earlier_blinks=state["blinks"],
+            earlier_head_movements=state["head_movements"],
+            earlier_head_movement_time=state["head_movement_time"],
+        )
+        for name in cls.STATE_FIELDS:
+            setattr(metrics, name, state[name])
+        return metrics
+    
     def to_dict(self) -> Dict:
         return {
             "patient_id": self.patient_id,
@@ -215,32 +392,43 @@ class SessionMetrics:
             "correct_reactions": self.correct_reactions,
             "missed_stimuli": self.missed_stimuli,
             "false_positives": self.false_positives,
+            "gaze_invalid_reactions": self.gaze_invalid_reactions,
             "average_reaction_time_ms": self.calculate_average_rt(),
             "accuracy_percentage": self.calculate_accuracy(),
-            "head_movements": self.head_movements,
+            "head_movements": self.head_movement_count(),
+            "head_movement_time_s": self.head_movement_time(),
             "fixation_breaks": self.fixation_breaks,
+            "blink_count": self.blink_count(),
+            "blink_rate_per_min": self.calculate_blink_rate(),
+            **self.pupillometry.summary(),
             "score": self.score,
             "field_performance": self.field_performance,
             "side_bias": self.get_side_bias(),
-            "reaction_times": self.reaction_times
+            "reaction_times": list(self.reaction_times)
         }
 
 # ==================== ADAPTIVE DIFFICULTY ====================
 class AdaptiveDifficulty:
     """Manages adaptive difficulty and level progression"""
     
-    def __init__(self):
+    LEVEL_UP_MESSAGES = {
+        2: "Squares added as distractors",
+        3: "More shapes added",
+        4: "Distractors increased",
+        5: "Expert mode!",
+    }
+    
+    def __init__(self, config: GameConfig):
+        self.config = config
         self.current_level = 1
-        self.last_level_change = time.time()
-        self.level_change_cooldown = 20  # Minimum 20 seconds between level changes
+        self.last_level_change = 0.0  # session time (s)
         
     def update(self, metrics: SessionMetrics, session_duration: float) -> int:
         """Update difficulty based on performance, returns new level"""
         if session_duration < 10:  # Don't change level in first 10 seconds
             return self.current_level
         
-        current_time = time.time()
-        if current_time - self.last_level_change < self.level_change_cooldown:
+        if session_duration - self.last_level_change < self.config.LEVEL_CHANGE_COOLDOWN:
             return self.current_level
         
         accuracy = metrics.calculate_accuracy()
@@ -249,47 +437,50 @@ class AdaptiveDifficulty:
         old_level = self.current_level
         
         # Level progression rules
-        if self.current_level == 1 and accuracy > 75 and avg_rt < 1500 and metrics.total_stimuli >= 5:
-            self.current_level = 2
-            print("\n🎉 Level Up! Now at Level 2 - Squares added as distractors")
-            
-        elif self.current_level == 2 and accuracy > 70 and avg_rt < 1200 and metrics.total_stimuli >= 10:
-            self.current_level = 3
-            print("\n🎉 Level Up! Now at Level 3 - More shapes added")
-            
-        elif self.current_level == 3 and accuracy > 65 and avg_rt < 1000 and metrics.total_stimuli >= 15:
-            self.current_level = 4
-            print("\n🎉 Level Up! Now at Level 4 - Distractors increased")
-            
-        elif self.current_level == 4 and accuracy > 60 and avg_rt < 800 and metrics.total_stimuli >= 20:
-            self.current_level = 5
-            print("\n🎉 Level Up! Now at Level 5 - Expert mode!")
+        rule = self.config.LEVEL_UP_RULES.get(self.current_level)
+        if rule and accuracy > rule[0] and avg_rt < rule[1] and metrics.total_stimuli >= rule[2]:
+            self.current_level += 1
+            print(f"\n🎉 Level Up! Now at Level {self.current_level} - "
+                  f"{self.LEVEL_UP_MESSAGES.get(self.current_level, '')}")
         
         # Level regression if performance is poor
-        elif self.current_level > 1 and accuracy < 40 and metrics.total_stimuli >= 8:
+        elif (self.current_level > 1 and accuracy < self.config.LEVEL_DOWN_ACCURACY
+              and metrics.total_stimuli >= self.config.LEVEL_DOWN_MIN_STIMULI):
             self.current_level -= 1
             print(f"\n⚠ Level Down to Level {self.current_level} - Keep practicing!")
         
         if old_level != self.current_level:
-            self.last_level_change = current_time
+            self.last_level_change = session_duration
         
         return self.current_level
     
     def get_spawn_interval(self) -> float:
         """Get stimulus spawn interval based on level"""
-        intervals = {1: 2.5, 2: 2.0, 3: 1.7, 4: 1.4, 5: 1.0}
-        return intervals.get(self.current_level, 2.0)
+        return self.config.SPAWN_INTERVALS.get(self.current_level, 2.0)
 
 # ==================== STIMULUS MANAGER ====================
 class StimulusManager:
-    """Manages stimulus generation and display"""
+    """Manages stimulus generation and display
+
+    Shown stimuli are kept in a heap keyed by expiry time, so update()
+    only touches stimuli that actually expire. Unreacted targets are kept
+    in onset order for reaction matching, and the valid spawn positions of
+    every zone are precomputed once.
+    """
     
-    def __init__(self, config: GameConfig):
+    # Spacing of the precomputed spawn positions (px)
+    POSITION_GRID_STEP = 4
+    
+    def __init__(self, config: GameConfig, rng: Optional[random.Random] = None):
         self.config = config
-        self.stimuli = []
+        self.rng = rng or random.Random()
+        self.active: Dict[int, Stimulus] = {}
         self.next_id = 1
-        self.last_spawn_time = 0
+        self.next_spawn_time: Optional[float] = None
         self.spawn_interval = 2.0
+        self.pending_onsets: List[Stimulus] = []  # spawned, not yet on screen
+        self._expiry_heap: List[Tuple[float, int]] = []
+        self._open_targets: "OrderedDict[int, Stimulus]" = OrderedDict()  # shown, unreacted, by onset
         
         # Visual field zones (normalized coordinates)
         self.field_zones = {
@@ -302,6 +493,9 @@ class StimulusManager:
             VisualField.BOTTOM_LEFT: (0.1, 0.7, 0.2, 0.2),
             VisualField.BOTTOM_RIGHT: (0.7, 0.7, 0.2, 0.2),
         }
+        self.fields = list(self.field_zones)
+        self.position_grids = {field: self._build_position_grid(zone)
+                               for field, zone in self.field_zones.items()}
         
         # Modern color palette for stimuli
         self.stimulus_colors = {
@@ -311,13 +505,17 @@ class StimulusManager:
             StimulusType.STAR: (34, 197, 94),       # Green
         }
     
-    def _is_position_valid(self, x, y, size):
-        """Check if position overlaps with UI elements"""
-        # Define UI exclusion zones (rects: x, y, w, h)
-        # 1. Top HUD
+    @property
+    def stimuli(self):
+        """Active stimuli in spawn order"""
+        return self.active.values()
+    
+    def _max_valid_size(self, x, y) -> int:
+        """Largest stimulus size at (x, y) that doesn't overlap the UI elements"""
+        # UI exclusion zones
+        # 1. Top HUD: the stimulus must stay below it
         hud_height = 120 
-        if y < hud_height + size: 
-            return False
+        below_hud = y - hud_height
             
         # 2. Camera Feed & Eye Status (Bottom Left)
         # Camera is 320x240, Status is 200x240. 
@@ -325,32 +523,53 @@ class StimulusManager:
         # Let's say bottom area starting from SCREEN_HEIGHT - 260
         bottom_ui_y = self.config.SCREEN_HEIGHT - 260
         total_ui_width = 20 + 320 + 20 + 200 + 20 # Padding + Cam + Gap + Status + Padding
+        # Either above the panels or to their right
+        clear_of_panels = max(bottom_ui_y - y, x - total_ui_width)
         
-        if y > bottom_ui_y - size and x < total_ui_width + size:
-            return False
-            
-        return True
-
-    def generate_stimulus(self, level: int) -> Optional[Stimulus]:
-        current_time = time.time()
+        return min(below_hud, clear_of_panels)
+    
+    def _build_position_grid(self, zone) -> Tuple[List[int], List[Tuple[int, int]]]:
+        """Spawn positions of a zone, largest allowed stimulus first
         
-        if current_time - self.last_spawn_time < self.spawn_interval:
+        Returns (negated max sizes, positions) in matching order: the
+        positions valid for a size are a prefix, found with one bisect.
+        """
+        step = self.POSITION_GRID_STEP
+        # Narrow zones collapse to a single row or column (rounding may swap the ends)
+        x_lo, x_hi = sorted((round((zone[0] + 0.1) * self.config.SCREEN_WIDTH),
+                             round((zone[0] + zone[2] - 0.1) * self.config.SCREEN_WIDTH)))
+        y_lo, y_hi = sorted((round((zone[1] + 0.1) * self.config.SCREEN_HEIGHT),
+                             round((zone[1] + zone[3] - 0.1) * self.config.SCREEN_HEIGHT)))
+        cells = sorted(((self._max_valid_size(x, y), x, y)
+                        for x in range(x_lo, x_hi + 1, step)
+                        for y in range(y_lo, y_hi + 1, step)), reverse=True)
+        return [-size for size, _, _ in cells], [(x, y) for _, x, y in cells]
+    
+    def _random_position(self, field: VisualField, size: int) -> Optional[Tuple[int, int]]:
+        neg_sizes, positions = self.position_grids[field]
+        count = bisect.bisect_right(neg_sizes, -size)
+        return positions[self.rng.randrange(count)] if count else None
+
+    def schedule_next_spawn(self, current_time: float):
+        """Spawn gaps are spawn_interval plus an exponential jitter, independent of frame rate"""
+        self.next_spawn_time = (current_time + self.spawn_interval
+                                + self.rng.expovariate(1.0 / self.config.SPAWN_JITTER))
+    
+    def generate_stimulus(self, level: int, current_time: float) -> Optional[Stimulus]:
+        """Spawn the next stimulus if it is due; a failed placement retries next step"""
+        if self.next_spawn_time is None:
+            self.next_spawn_time = current_time + self.rng.expovariate(1.0 / self.config.SPAWN_JITTER)
+        if current_time < self.next_spawn_time:
             return None
         
         # Select field and parameters
-        field = random.choice(list(self.field_zones.keys()))
+        field = self.rng.choice(self.fields)
         stim_type, size, is_target = self._get_parameters(level)
         
-        # Get position - Try multiple times to find valid pos
-        for _ in range(10): 
-            zone = self.field_zones[field]
-            x = int(random.uniform(zone[0] + 0.1, zone[0] + zone[2] - 0.1) * self.config.SCREEN_WIDTH)
-            y = int(random.uniform(zone[1] + 0.1, zone[1] + zone[3] - 0.1) * self.config.SCREEN_HEIGHT)
-            
-            if self._is_position_valid(x, y, size):
-                break
-        else:
-            return None # Could not find valid position
+        position = self._random_position(field, size)
+        if position is None:
+            return None # No position in this zone fits the stimulus
+        x, y = position
         
         # Create stimulus
         stimulus = Stimulus(
@@ -368,47 +587,79 @@ class StimulusManager:
         )
         
         self.next_id += 1
-        self.last_spawn_time = current_time
-        self.stimuli.append(stimulus)
+        self.schedule_next_spawn(current_time)
+        self.active[stimulus.id] = stimulus
+        self.pending_onsets.append(stimulus)
         
         return stimulus
     
+    def mark_shown(self, onset_time: float) -> List[Stimulus]:
+        """Stamp the onset of every stimulus first displayed by this frame"""
+        shown, self.pending_onsets = self.pending_onsets, []
+        for stimulus in shown:
+            stimulus.appear_time = onset_time
+            stimulus.shown = True
+            heapq.heappush(self._expiry_heap, (onset_time + stimulus.duration_ms / 1000, stimulus.id))
+            if stimulus.is_target:
+                self._open_targets[stimulus.id] = stimulus
+        return shown
+    
+    def match_reaction(self, press_time: float) -> Optional[Stimulus]:
+        """Oldest open target a press at press_time can be a reaction to"""
+        for stimulus in self._open_targets.values():
+            reaction_ms = (press_time - stimulus.appear_time) * 1000
+            if reaction_ms < 0:
+                # Later targets have later onsets
+                return None
+            if reaction_ms < stimulus.duration_ms:
+                return stimulus
+        return None
+    
+    def mark_reacted(self, stimulus: Stimulus):
+        stimulus.reacted = True
+        self._open_targets.pop(stimulus.id, None)
+    
     def _get_parameters(self, level: int):
         if level == 1:
-            return StimulusType.CIRCLE, random.randint(80, 120), True
+            return StimulusType.CIRCLE, self.rng.randint(80, 120), True
         elif level == 2:
-            stim_type = random.choice([StimulusType.CIRCLE, StimulusType.SQUARE])
-            return stim_type, random.randint(60, 90), stim_type == StimulusType.CIRCLE
+            stim_type = self.rng.choice([StimulusType.CIRCLE, StimulusType.SQUARE])
+            return stim_type, self.rng.randint(60, 90), stim_type == StimulusType.CIRCLE
         elif level == 3:
-            stim_type = random.choice(list(StimulusType))
-            return stim_type, random.randint(50, 80), stim_type in [StimulusType.CIRCLE, StimulusType.STAR]
+            stim_type = self.rng.choice(list(StimulusType))
+            return stim_type, self.rng.randint(50, 80), stim_type in [StimulusType.CIRCLE, StimulusType.STAR]
         else:
-            stim_type = random.choice(list(StimulusType))
-            is_target = random.random() > 0.3
-            return stim_type, random.randint(40, 70), is_target
+            stim_type = self.rng.choice(list(StimulusType))
+            is_target = self.rng.random() > 0.3
+            return stim_type, self.rng.randint(40, 70), is_target
     
     def update(self, current_time: float) -> List[Stimulus]:
+        """Remove and return the stimuli that expired by current_time"""
         expired = []
-        active = []
-        
-        for stimulus in self.stimuli:
-            if stimulus.is_expired(current_time):
-                expired.append(stimulus)
-            else:
-                active.append(stimulus)
-        
-        self.stimuli = active
+        heap = self._expiry_heap
+        while heap and self.active[heap[0][1]].is_expired(current_time):
+            _, stimulus_id = heapq.heappop(heap)
+            expired.append(self.active.pop(stimulus_id))
+            self._open_targets.pop(stimulus_id, None)
         return expired
     
     def clear_all(self):
-        self.stimuli.clear()
+        self.active.clear()
+        self.pending_onsets.clear()
+        self._expiry_heap.clear()
+        self._open_targets.clear()
 
 # ==================== RENDERER ====================
 class ModernRenderer:
-    """Modern, clean renderer with improved visuals"""
+    """Modern, clean renderer with improved visuals
+
+    Text, glows and translucent panels come from a RenderCache, so a
+    steady-state frame allocates only the camera preview conversion.
+    """
     
-    def __init__(self, config: GameConfig):
+    def __init__(self, config: GameConfig, session_clock: SessionClock):
         self.config = config
+        self.session_clock = session_clock
         self.screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
         pygame.display.set_caption("PeriQuest - Enhanced Edition")
         
@@ -418,43 +669,88 @@ class ModernRenderer:
         self.medium_font = pygame.font.SysFont('Segoe UI', config.MEDIUM_SIZE)
         self.small_font = pygame.font.SysFont('Segoe UI', config.SMALL_SIZE)
         
+        self.cache = RenderCache()
+        self._camera_surface = pygame.Surface((320, 240))
+        self.dirty_rects = DirtyRectRenderer(self.screen, config.BG_COLOR)
         self.clock = pygame.time.Clock()
     
+    def text(self, font: pygame.font.Font, string: str, color) -> pygame.Surface:
+        """Rendered (antialiased) text, memoized"""
+        return self.cache.text(font, string, tuple(color))
+    
     def clear_screen(self):
         self.screen.fill(self.config.BG_COLOR)
     
-    def draw_center_fixation(self, is_fixating=True):
+    def draw_center_fixation(self, is_fixating=True, pulse=None):
         """Draw modern center fixation point
         is_fixating: If True, draws normal/active state. If False, draws warning state.
+        pulse: glow offset to draw (default: fixation_pulse now)
         """
         cx, cy = self.config.SCREEN_WIDTH // 2, self.config.SCREEN_HEIGHT // 2
         
         # Determine colors based on fixation status
         if is_fixating:
             dot_color = self.config.CENTER_DOT_COLOR # Cyan
-            glow_color = (*self.config.CENTER_DOT_COLOR, 50)
         else:
             dot_color = self.config.ERROR_COLOR # Red
-            glow_color = (*self.config.ERROR_COLOR, 50)
 
         # Outer glow (pulsing if not fixating to grab attention)
-        pulse = 0
-        if not is_fixating:
-            pulse = int(math.sin(time.time() * 10) * 5)
-            
-        for r in range(20 + pulse, 10 + pulse, -2):
-            val = int(50 * (1 - (r - 10) / 10))
-            alpha = max(0, min(255, val))
-            s = pygame.Surface((r*2, r*2), pygame.SRCALPHA)
-            # Ensure we only use RGB components (first 3) + new alpha
-            color_with_alpha = (*dot_color[:3], alpha)
-            pygame.draw.circle(s, color_with_alpha, (r, r), r)
-            self.screen.blit(s, (cx - r, cy - r))
+        if pulse is None:
+            pulse = self.fixation_pulse(is_fixating)
+        glow = self.cache.sprite(('fixation_glow', pulse, dot_color),
+                                 lambda: self._build_fixation_glow(pulse, dot_color))
+        self.screen.blit(glow, glow.get_rect(center=(cx, cy)))
         
         # Center dot
         pygame.draw.circle(self.screen, dot_color, (cx, cy), 10)
         pygame.draw.circle(self.screen, self.config.TEXT_COLOR, (cx, cy), 10, 2)
 
+    def fixation_pulse(self, is_fixating: bool) -> int:
+        """Current glow radius offset of the center fixation point"""
+        if is_fixating:
+            return 0
+        return int(math.sin(self.session_clock.now() * 10) * 5)
+    
+    # Screen areas of the elements, for dirty-rect rendering
+    def center_fixation_rect(self) -> pygame.Rect:
+        rect = pygame.Rect(0, 0, 52, 52)
+        rect.center = (self.config.SCREEN_WIDTH // 2, self.config.SCREEN_HEIGHT // 2)
+        return rect
+    
+    def gaze_cursor_rect(self, gaze_point) -> pygame.Rect:
+        x = int(gaze_point[0] * self.config.SCREEN_WIDTH)
+        y = int(gaze_point[1] * self.config.SCREEN_HEIGHT)
+        label = self.text(self.small_font, "GAZE", (255, 255, 255))
+        return pygame.Rect(x - 32, y - 32, 67 + label.get_width(), 64)
+    
+    def stimulus_rect(self, stimulus: Stimulus) -> pygame.Rect:
+        radius = int(stimulus.size * 1.5)
+        return pygame.Rect(stimulus.x - radius, stimulus.y - radius, radius * 2, radius * 2)
+    
+    def hud_rect(self) -> pygame.Rect:
+        return pygame.Rect(20, 20, self.config.SCREEN_WIDTH - 40, 100)
+    
+    def feedback_rect(self, message: str) -> pygame.Rect:
+        text = self.text(self.title_font, message, self.config.TEXT_COLOR)
+        rect = text.get_rect(center=(self.config.SCREEN_WIDTH // 2, self.config.SCREEN_HEIGHT // 2))
+        return rect.inflate(60, 40)
+    
+    def camera_feed_rect(self) -> pygame.Rect:
+        # Includes the border and the label above the default position
+        return pygame.Rect(18, self.config.SCREEN_HEIGHT - 282, 324, 264)
+    
+    def eye_status_rect(self) -> pygame.Rect:
+        return pygame.Rect(360, self.config.SCREEN_HEIGHT - 260, 200, 240)
+    
+    def _build_fixation_glow(self, pulse: int, color) -> pygame.Surface:
+        """The concentric glow rings around the fixation dot, composited once"""
+        outer = 20 + pulse
+        glow = pygame.Surface((outer * 2, outer * 2), pygame.SRCALPHA)
+        for r in range(outer, 10 + pulse, -2):
+            alpha = max(0, min(255, int(50 * (1 - (r - 10) / 10))))
+            glow.blit(self.cache.circle(r, color, alpha), (outer - r, outer - r))
+        return glow
+    
     def draw_gaze_cursor(self, gaze_point):
         """Draw a cursor showing where the user is looking"""
         if not gaze_point:
@@ -474,16 +770,14 @@ class ModernRenderer:
         pygame.draw.line(self.screen, (255, 255, 255), (x, y + 4), (x, y + 10), 2)
         
         # 3. Label
-        label = self.small_font.render("GAZE", True, (255, 255, 255))
+        label = self.text(self.small_font, "GAZE", (255, 255, 255))
         self.screen.blit(label, (x + 35, y - 10))
     
     def draw_stimulus(self, stimulus: Stimulus):
         """Draw stimulus with modern styling"""
         # Add glow effect
-        glow_surface = pygame.Surface((stimulus.size * 3, stimulus.size * 3), pygame.SRCALPHA)
-        pygame.draw.circle(glow_surface, (*stimulus.color, 30), 
-                         (stimulus.size * 1.5, stimulus.size * 1.5), stimulus.size * 1.5)
-        self.screen.blit(glow_surface, (stimulus.x - stimulus.size * 1.5, stimulus.y - stimulus.size * 1.5))
+        glow_surface = self.cache.circle(int(stimulus.size * 1.5), stimulus.color, 30)
+        self.screen.blit(glow_surface, glow_surface.get_rect(center=(stimulus.x, stimulus.y)))
         
         # Draw shape
         if stimulus.type == StimulusType.CIRCLE:
@@ -498,48 +792,43 @@ class ModernRenderer:
     def draw_hud(self, metrics: SessionMetrics, time_remaining: float, level: int):
         """Draw modern HUD"""
         # Top bar
-        hud_rect = pygame.Rect(20, 20, self.config.SCREEN_WIDTH - 40, 100)
-        s = pygame.Surface((hud_rect.width, hud_rect.height), pygame.SRCALPHA)
-        pygame.draw.rect(s, self.config.HUD_BG, s.get_rect(), border_radius=15)
-        self.screen.blit(s, hud_rect)
+        hud_rect = self.hud_rect()
+        self.screen.blit(self.cache.panel(hud_rect.size, self.config.HUD_BG, border_radius=15), hud_rect)
         
         # Level
-        level_text = self.large_font.render(f"Level {level}", True, self.config.ACCENT_COLOR)
+        level_text = self.text(self.large_font, f"Level {level}", self.config.ACCENT_COLOR)
         self.screen.blit(level_text, (40, 35))
         
         # Time
-        time_text = self.medium_font.render(f"Time: {int(time_remaining)}s", True, self.config.TEXT_COLOR)
+        time_text = self.text(self.medium_font, f"Time: {int(time_remaining)}s", self.config.TEXT_COLOR)
         self.screen.blit(time_text, (40, 75))
         
         # Score
-        score_text = self.large_font.render(f"Score: {metrics.score}", True, self.config.SUCCESS_COLOR)
+        score_text = self.text(self.large_font, f"Score: {metrics.score}", self.config.SUCCESS_COLOR)
         score_rect = score_text.get_rect(right=self.config.SCREEN_WIDTH - 40, centery=60)
         self.screen.blit(score_text, score_rect)
         
         # Accuracy
         accuracy = metrics.calculate_accuracy()
         acc_color = self.config.SUCCESS_COLOR if accuracy >= 75 else self.config.WARNING_COLOR if accuracy >= 50 else self.config.ERROR_COLOR
-        acc_text = self.medium_font.render(f"Accuracy: {accuracy:.1f}%", True, acc_color)
+        acc_text = self.text(self.medium_font, f"Accuracy: {accuracy:.1f}%", acc_color)
         acc_rect = acc_text.get_rect(centerx=self.config.SCREEN_WIDTH // 2, y=40)
         self.screen.blit(acc_text, acc_rect)
         
         # Avg RT
         avg_rt = metrics.calculate_average_rt()
-        rt_text = self.small_font.render(f"Avg RT: {avg_rt:.0f}ms", True, self.config.TEXT_COLOR)
+        rt_text = self.text(self.small_font, f"Avg RT: {avg_rt:.0f}ms", self.config.TEXT_COLOR)
         rt_rect = rt_text.get_rect(centerx=self.config.SCREEN_WIDTH // 2, y=75)
         self.screen.blit(rt_text, rt_rect)
     
     def draw_feedback(self, message: str, color: Tuple[int, int, int]):
         """Draw feedback message"""
-        text = self.title_font.render(message, True, color)
+        text = self.text(self.title_font, message, color)
         rect = text.get_rect(center=(self.config.SCREEN_WIDTH // 2, self.config.SCREEN_HEIGHT // 2))
         
         # Background
         bg_rect = rect.inflate(60, 40)
-        s = pygame.Surface((bg_rect.width, bg_rect.height), pygame.SRCALPHA)
-        pygame.draw.rect(s, (0, 0, 0, 200), s.get_rect(), border_radius=20)
-        pygame.draw.rect(s, color, s.get_rect(), 3, border_radius=20)
-        self.screen.blit(s, bg_rect)
+        self.screen.blit(self.cache.panel(bg_rect.size, (0, 0, 0, 200), tuple(color), 3, 20), bg_rect)
         
         self.screen.blit(text, rect)
     
@@ -579,19 +868,19 @@ class ModernRenderer:
             # For visualization, we can just show the raw feed or try to re-draw if we had data.
             # Simplest for now: Show the raw feed. Eye Status panel shows the data.
             
-            # Convert to pygame surface
+            # Copy into the persistent preview surface
             frame_rgb = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2RGB)
-            frame_surface = pygame.surfarray.make_surface(frame_rgb.swapaxes(0, 1))
+            pygame.surfarray.blit_array(self._camera_surface, frame_rgb.swapaxes(0, 1))
             
             # Draw border
-            border_rect = pygame.Rect(position[0] - 2, position[1] - 2, 324, 244)
-            pygame.draw.rect(self.screen, self.config.ACCENT_COLOR, border_rect, 2, border_radius=10)
+            border = self.cache.panel((324, 244), (0, 0, 0, 0), self.config.ACCENT_COLOR)
+            self.screen.blit(border, (position[0] - 2, position[1] - 2))
             
             # Blit to screen
-            self.screen.blit(frame_surface, position)
+            self.screen.blit(self._camera_surface, position)
             
             # Add label
-            label = self.small_font.render("Camera Feed", True, self.config.TEXT_COLOR)
+            label = self.text(self.small_font, "Camera Feed", self.config.TEXT_COLOR)
             self.screen.blit(label, (position[0], position[1] - 20))
             
         except Exception as e:
@@ -599,17 +888,13 @@ class ModernRenderer:
             self._draw_cam_placeholder(position, "Error")
 
     def _draw_cam_placeholder(self, position, text):
-        placeholder = pygame.Rect(position[0], position[1], 320, 240)
-        s = pygame.Surface((320, 240), pygame.SRCALPHA)
-        pygame.draw.rect(s, (30, 41, 59, 200), s.get_rect(), border_radius=10)
-        pygame.draw.rect(s, self.config.ACCENT_COLOR, s.get_rect(), 2, border_radius=10)
-        self.screen.blit(s, position)
+        self.screen.blit(self.cache.panel((320, 240), (30, 41, 59, 200), self.config.ACCENT_COLOR), position)
         
-        msg = self.small_font.render(text, True, self.config.TEXT_COLOR)
+        msg = self.text(self.small_font, text, self.config.TEXT_COLOR)
         text_rect = msg.get_rect(center=(position[0] + 160, position[1] + 120))
         self.screen.blit(msg, text_rect)
     
-    def draw_eye_status(self, eye_data, position=None):
+    def draw_eye_status(self, eye_data, position=None, tracking_status=None):
         """Draw eye tracking status panel"""
         # Default position: Next to Camera (Bottom Left + Offset)
         if position is None:
@@ -618,13 +903,14 @@ class ModernRenderer:
         panel_width, panel_height = 200, 240
         
         # Background
-        s = pygame.Surface((panel_width, panel_height), pygame.SRCALPHA)
-        pygame.draw.rect(s, (30, 41, 59, 200), s.get_rect(), border_radius=10)
-        pygame.draw.rect(s, self.config.ACCENT_COLOR, s.get_rect(), 2, border_radius=10)
-        self.screen.blit(s, position)
+        self.screen.blit(self.cache.panel((panel_width, panel_height), (30, 41, 59, 200),
+                                          self.config.ACCENT_COLOR), position)
         
         # Title
-        title = self.small_font.render("Eye Tracking", True, self.config.TEXT_COLOR)
+        title_text = "Eye Tracking"
+        if tracking_status:
+            title_text += f" ({tracking_status['tracking_fps']:.0f} fps)"
+        title = self.text(self.small_font, title_text, self.config.TEXT_COLOR)
         self.screen.blit(title, (position[0] + 10, position[1] + 10))
         
         y_offset = position[1] + 40
@@ -646,12 +932,12 @@ class ModernRenderer:
                 status_text,
                 f"Gaze: ({eye_data.gaze_point[0]:.2f}, {eye_data.gaze_point[1]:.2f})" if eye_data.gaze_point else "Gaze: --",
                 f"Pupil: {eye_data.left_pupil_size:.3f}",
-                f"Head Yaw: {getattr(eye_data, 'head_yaw', 0.0):.2f}"
+                f"Head: yaw {eye_data.head_yaw:+.0f}° pitch {eye_data.head_pitch:+.0f}°"
             ]
             
             for i, label in enumerate(labels):
                 color_to_use = color if i == 0 else self.config.TEXT_COLOR
-                text = self.small_font.render(label, True, color_to_use)
+                text = self.text(self.small_font, label, color_to_use)
                 self.screen.blit(text, (position[0] + 10, y_offset))
                 y_offset += 25
             
@@ -675,37 +961,73 @@ class ModernRenderer:
                 pygame.draw.line(self.screen, (100, 110, 130), 
                                (indicator_x, indicator_y - 10), (indicator_x, indicator_y + 10), 1)
         else:
-            no_data_text = self.small_font.render("No eye data", True, self.config.TEXT_COLOR)
+            no_data_text = self.text(self.small_font, "No eye data", self.config.TEXT_COLOR)
             self.screen.blit(no_data_text, (position[0] + 10, y_offset))
     
-    def update_display(self):
+    def update_display(self) -> float:
+        """Flip and cap the frame rate; returns the onset time of the new frame"""
         pygame.display.flip()
+        flip_time = self.session_clock.flip_time()
+        self.dirty_rects.invalidate()
         self.clock.tick(self.config.FPS)
+        return flip_time
+    
+    def present_layers(self, layers: List[Layer]) -> float:
+        """Draw and present only what changed since the last layered frame"""
+        self.dirty_rects.present(layers)
+        flip_time = self.session_clock.flip_time()
+        self.clock.tick(self.config.FPS)
+        return flip_time
 
 # ==================== MAIN GAME ====================
 class EnhancedPeriQuestGame:
     """Enhanced PeriQuest game with advanced features"""
     
-    def __init__(self, patient_id: str = "default"):
+    def __init__(self, patient_id: str = "default", station_id: Optional[str] = None,
+                 eye_tracker=None, clock: Optional[SessionClock] = None,
+                 rng: Optional[random.Random] = None, headless: bool = False):
+        """headless=True runs the game logic without a window or reporting (see
+        headless_sim.py); eye_tracker and clock replace the live ones"""
         self.config = GameConfig()
         self.patient_id = patient_id
         self.session_id = f"{patient_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
-        # Components
-        self.stimulus_manager = StimulusManager(self.config)
-        self.renderer = ModernRenderer(self.config)
-        self.adaptive_difficulty = AdaptiveDifficulty()
+        # Capture, stimulus onsets and key presses share one monotonic clock
+        self.clock = clock or SessionClock(display_latency=self.config.DISPLAY_LATENCY_MS / 1000,
+                                           input_latency=self.config.INPUT_LATENCY_MS / 1000)
         
-        # Eye tracking
-        if EYE_TRACKING_AVAILABLE:
-            self.eye_tracker = EnhancedEyeTracker()
+        # Components
+        self.stimulus_manager = StimulusManager(self.config, rng)
+        self.renderer = None if headless else ModernRenderer(self.config, self.clock)
+        self.adaptive_difficulty = AdaptiveDifficulty(self.config)
+        self.gaze_validity = GazeValidityTracker((self.config.SCREEN_WIDTH, self.config.SCREEN_HEIGHT),
+                                                 tolerance_px=self.config.GAZE_TARGET_TOLERANCE_PX)
+        
+        # Eye tracking (supplied, local camera, or a station of a running tracking_server.py)
+        if eye_tracker is not None:
+            self.eye_tracker = eye_tracker
+            self.eye_tracker_enabled = True
+        elif headless:
+            self.eye_tracker = None
+            self.eye_tracker_enabled = False
+        elif station_id and TRACKING_SERVER_AVAILABLE:
+            self.eye_tracker = TrackingClient(station_id)
             self.eye_tracker_enabled = self.eye_tracker.initialize_camera()
+            if self.eye_tracker_enabled:
+                self.eye_tracker.load_calibration(patient_id)
+        elif EYE_TRACKING_AVAILABLE:
+            # Model load, camera open and warm-up run while the instructions are shown;
+            # tracking is enabled by _poll_eye_tracker once the tracker reports ready
+            self.eye_tracker = EnhancedEyeTracker(latency_budget_ms=self.config.TRACKING_LATENCY_BUDGET_MS,
+                                                  lazy=True, threaded_capture=True)
+            self.eye_tracker.start_background_init()
+            self.eye_tracker_enabled = False
         else:
             self.eye_tracker = None
             self.eye_tracker_enabled = False
         
         # Reporting
-        if REPORTING_AVAILABLE:
+        if REPORTING_AVAILABLE and not headless:
             self.report_generator = ReportGenerator()
         else:
             self.report_generator = None
@@ -716,10 +1038,29 @@ class EnhancedPeriQuestGame:
         self.game_over = False
         self.state = GameState.INSTRUCTIONS
         self.session_start_time = 0
+        # Simulation time: session clock time advanced in fixed steps (see run)
+        self.sim_time = self.clock.now()
+        self.time_step = 1.0 / self.config.SIMULATION_HZ
+        self._gaze_previous = None
+        self._gaze_current = None
         self.current_level = 1
         self.level_up_animation_time = 0
+        self.latest_eye_data = None
+        self.start_requested = False
+        
+        # Calibration
+        self.calibration_targets: List[Tuple[float, float]] = []
+        self.calibration_index = 0
+        self.calibration_point_start = 0.0
         
         # Metrics
+        self.session_log: Optional[SessionLog] = None
+        self.long_session = False
+        self.checkpoint_writer: Optional[CheckpointWriter] = None
+        self.next_checkpoint = 0.0
+        self.resume_directory: Optional[str] = None
+        self.resume_state: Optional[Dict] = None
+        self.resumed_elapsed = 0.0  # session time played before a resume
         self.metrics = SessionMetrics(
             patient_id=patient_id,
             session_id=self.session_id,
@@ -731,22 +1072,97 @@ class EnhancedPeriQuestGame:
         self.current_feedback = None
         
         print(f"✓ Enhanced PeriQuest initialized for patient: {patient_id}")
-        print(f"  Eye Tracking: {'Enabled' if self.eye_tracker_enabled else 'Disabled'}")
+        if self.eye_tracker_enabled:
+            print("  Eye Tracking: Enabled")
+        elif getattr(self.eye_tracker, 'is_initializing', False):
+            print("  Eye Tracking: Starting in background")
+        else:
+            print("  Eye Tracking: Disabled")
         print(f"  Reporting: {'Enabled' if self.report_generator else 'Disabled'}")
     
+    def resume_from(self, directory: str, state: Optional[Dict] = None):
+        """Continue the session checkpointed in directory when the session starts"""
+        state = state or load_checkpoint(directory)
+        self.resume_directory = directory
+        self.resume_state = state
+        self.session_id = state["session_id"]
+        self.config.SESSION_DURATION = state["session_duration"]
+    
     def start_session(self):
-        """Start therapy session"""
+        """Start therapy session (or continue the one given to resume_from)"""
         self.running = True
-        self.session_start_time = time.time()
-        self.metrics = SessionMetrics(
-            patient_id=self.patient_id,
-            session_id=self.session_id,
-            start_time=datetime.now()
-        )
+        self.sim_time = self.clock.now()
+        resume, self.resume_state = self.resume_state, None
+        self.resumed_elapsed = resume["elapsed"] if resume else 0.0
+        self.session_start_time = self.sim_time - self.resumed_elapsed
+        
+        if self.checkpoint_writer is not None:
+            self.checkpoint_writer.close()
+        self.checkpoint_writer = None
+        self._close_session_log()
+        directory = self.resume_directory or os.path.join(self.config.SESSION_LOG_DIR, self.session_id)
+        self.long_session = self.config.SESSION_DURATION > self.config.LONG_SESSION_MINUTES * 60
+        if resume:
+            # Entries logged after the checkpoint aren't in its metrics; drop them
+            self.session_log = SessionLog.reopen(directory, *resume["log"])
+        elif self.long_session or self.config.CHECKPOINT_INTERVAL > 0:
+            self.session_log = SessionLog(directory)
+        if self.long_session:
+            print(f"✓ Long session: logging to {directory}")
+        
+        if resume:
+            self.metrics = SessionMetrics.from_state(resume["metrics"])
+        else:
+            self.metrics = SessionMetrics(
+                patient_id=self.patient_id,
+                session_id=self.session_id,
+                start_time=datetime.now()
+            )
+        self.metrics.log = self.session_log
+        self.metrics.play_time = self.resumed_elapsed
+        if self.long_session:
+            # Memory stays bounded however long the session runs
+            eye_store = SpillingEyeDataStore(self.session_log, self.config.SPILL_CHUNK_SAMPLES)
+            eye_store.spilled = len(self.session_log)
+            self.metrics.eye_tracking_data = eye_store
+            self.metrics.reaction_times = deque(self.metrics.reaction_times,
+                                                maxlen=self.config.RECENT_REACTION_TIMES)
+        if self.eye_tracker:
+            # Blink and head movement events are appended by the tracker's detectors as they happen
+            self.metrics.blinks = self.eye_tracker.blinks
+            self.metrics.head_movements = self.eye_tracker.head_movements
+        
+        if resume:
+            self.current_level = self.adaptive_difficulty.current_level = resume["level"]
+            self.adaptive_difficulty.last_level_change = resume["last_level_change"]
+            print(f"✓ Resuming at {self.resumed_elapsed:.0f}s, level {self.current_level}")
+        if self.config.CHECKPOINT_INTERVAL > 0:
+            self.checkpoint_writer = CheckpointWriter(directory, self.session_log)
+            self.next_checkpoint = self.resumed_elapsed + self.config.CHECKPOINT_INTERVAL
         print(f"✓ Session started: {self.session_id}")
     
+    def _save_checkpoint(self, session_duration: float, complete: bool = False):
+        """Snapshot the session for the writer thread (cheap; the disk work happens there)"""
+        if self.long_session:
+            self.metrics.eye_tracking_data.flush()
+        self.session_log.flush()
+        self.checkpoint_writer.submit({
+            "version": 1,
+            "patient_id": self.patient_id,
+            "session_id": self.session_id,
+            "session_duration": self.config.SESSION_DURATION,
+            "elapsed": session_duration,
+            "complete": complete,
+            "level": self.current_level,
+            "last_level_change": self.adaptive_difficulty.last_level_change,
+            "log": self.session_log.position(),
+            "metrics": self.metrics.to_state(),
+        })
+        self.next_checkpoint = session_duration + self.config.CHECKPOINT_INTERVAL
+    
     def handle_events(self):
         """Handle input events"""
+        press_time = self.clock.poll_input()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
@@ -767,24 +1183,89 @@ class EnhancedPeriQuestGame:
                          self._generate_report('excel')
                 
                 elif self.state == GameState.INSTRUCTIONS:
-                    self.state = GameState.PLAYING
-                    self.session_start_time = time.time()
+                    self._leave_instructions()
             
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.running = False
                 
                 elif self.state == GameState.INSTRUCTIONS:
-                    # Any key to start
-                    self.state = GameState.PLAYING
-                    self.session_start_time = time.time()
+                    if event.key == pygame.K_c and self.eye_tracker_enabled:
+                        self._start_calibration()
+                    else:
+                        # Any key to start
+                        self._leave_instructions()
+                
+                elif self.state == GameState.CALIBRATION:
+                    if event.key == pygame.K_s:
+                        # Skip: keep the uncalibrated gaze mapping
+                        self._begin_playing()
                 
                 elif self.state == GameState.PLAYING:
                     if event.key == pygame.K_SPACE:
-                        self._handle_reaction()
+                        self._handle_reaction(press_time)
                     elif event.key == pygame.K_p:
                         self.paused = not self.paused
 
+    def _poll_eye_tracker(self):
+        """Enable tracking once background initialization has finished"""
+        tracker = self.eye_tracker
+        if self.eye_tracker_enabled or tracker is None:
+            return
+        if hasattr(tracker, 'status') and tracker.status == tracker.STATUS_READY:
+            self.eye_tracker_enabled = True
+            self.eye_tracker.load_calibration(self.patient_id)
+    
+    def _leave_instructions(self):
+        """Calibrate first if the patient has no saved gaze calibration"""
+        if getattr(self.eye_tracker, 'is_initializing', False):
+            # Start as soon as the tracker is ready (see update)
+            self.start_requested = True
+            return
+        if self.eye_tracker_enabled and not self.eye_tracker.calibration.is_calibrated:
+            self._start_calibration()
+        else:
+            self._begin_playing()
+    
+    def _begin_playing(self):
+        self.state = GameState.PLAYING
+        self.session_start_time = self.sim_time - self.resumed_elapsed
+        self.metrics.play_started = self.sim_time
+    
+    def _start_calibration(self):
+        """Start the n-point gaze calibration sequence"""
+        n = self.config.CALIBRATION_GRID
+        positions = [0.1 + 0.8 * i / (n - 1) for i in range(n)]
+        self.calibration_targets = [(x, y) for y in positions for x in positions]
+        self.calibration_index = 0
+        self.calibration_point_start = self.sim_time
+        self.eye_tracker.start_calibration()
+        self.state = GameState.CALIBRATION
+    
+    def _update_calibration(self):
+        """Collect gaze samples for the current target and advance through targets"""
+        eye_data = self.eye_tracker.get_eye_data()
+        current_time = self.sim_time
+        elapsed = current_time - self.calibration_point_start
+        
+        if (eye_data and eye_data.gaze_point and not eye_data.blink_detected
+                and elapsed >= self.config.CALIBRATION_SETTLE_TIME):
+            self.eye_tracker.add_calibration_sample(self.calibration_targets[self.calibration_index])
+        
+        if elapsed >= self.config.CALIBRATION_POINT_DURATION:
+            self.calibration_index += 1
+            self.calibration_point_start = current_time
+            if self.calibration_index >= len(self.calibration_targets):
+                self._finish_calibration()
+    
+    def _finish_calibration(self):
+        if self.eye_tracker.finish_calibration() is not None:
+            self.eye_tracker.save_calibration(self.patient_id)
+            self._show_feedback("CALIBRATED!", self.config.SUCCESS_COLOR)
+        else:
+            self._show_feedback("CALIBRATION FAILED", self.config.WARNING_COLOR)
+        self._begin_playing()
+    
     def _generate_report(self, type='pdf'):
         """Generate specific report on demand"""
         if not self.report_generator: return
@@ -795,6 +1276,10 @@ class EnhancedPeriQuestGame:
         try:
             session_data = self.metrics.to_dict()
             eye_data = self.metrics.eye_tracking_data if self.eye_tracker_enabled else None
+            if self.long_session:
+                # Long sessions: the full history is on disk, the report streams it from there
+                session_data["reaction_times"] = self.session_log.reaction_times()
+                eye_data = self.session_log if self.eye_tracker_enabled else None
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             
             if type == 'pdf':
@@ -835,7 +1320,7 @@ class EnhancedPeriQuestGame:
             ("TOTAL SCORE", f"{self.metrics.score}", self.config.ACCENT_COLOR),
             ("ACCURACY", f"{self.metrics.calculate_accuracy():.1f}%", self.config.SUCCESS_COLOR),
             ("AVG REACTION", f"{self.metrics.calculate_average_rt():.0f} ms", self.config.WARNING_COLOR),
-            ("HEAD MOVES", f"{self.metrics.head_movements}", self.config.ERROR_COLOR),
+            ("HEAD MOVES", f"{self.metrics.head_movement_count()}", self.config.ERROR_COLOR),
             ("FALSE ALARMS", f"{self.metrics.false_positives}", self.config.ERROR_COLOR),
         ]
         
@@ -883,23 +1368,30 @@ class EnhancedPeriQuestGame:
         """End session without auto-generating files (User will choose)"""
         self.game_over = True
         self.state = GameState.RESULTS
+        if self.checkpoint_writer is not None:
+            self._save_checkpoint(self.sim_time - self.session_start_time, complete=True)
+        elif self.session_log is not None:
+            self.metrics.eye_tracking_data.flush()
+            self.session_log.flush()
         print("\n=== SESSION COMPLETE ===")
         # Wait for user interaction in game loop
     
-    def _handle_reaction(self):
-        """Handle player reaction"""
-        current_time = time.time()
-        
-        for stimulus in self.stimulus_manager.stimuli:
-            if not stimulus.reacted and stimulus.is_target:
-                reaction_time = current_time - stimulus.appear_time
-                
-                if reaction_time * 1000 < stimulus.duration_ms:
-                    self._process_reaction(stimulus, reaction_time)
-                    break
+    def _handle_reaction(self, press_time: float):
+        """Handle player reaction (press_time on the session clock)"""
+        # Presses before the onset frame was on screen can't be reactions to it
+        stimulus = self.stimulus_manager.match_reaction(press_time)
+        if stimulus is not None:
+            self.stimulus_manager.mark_reacted(stimulus)
+            looked_at = self.gaze_validity.looked_at(stimulus.id)
+            self.gaze_validity.remove_stimulus(stimulus.id)
+            if looked_at is not None and looked_at <= press_time:
+                self.metrics.add_gaze_invalid_reaction(stimulus)
+                self._show_feedback("DON'T LOOK AT IT!", self.config.WARNING_COLOR)
+            else:
+                self._process_reaction(stimulus, press_time - stimulus.appear_time)
         else:
             # False Positive (Reaction with no valid target)
-            self.metrics.false_positives += 1
+            self.metrics.add_false_positive(press_time)
             self.metrics.score = max(0, self.metrics.score - 50)
             self._show_feedback("FALSE ALARM!", self.config.ERROR_COLOR)
     
@@ -928,22 +1420,46 @@ class EnhancedPeriQuestGame:
         self.feedback_queue.append({
             "message": message,
             "color": color,
-            "end_time": time.time() + 1.0
+            "end_time": self.sim_time + 1.0
         })
     
+    def step(self):
+        """Advance the simulation by one fixed time step"""
+        self.sim_time += self.time_step
+        self._gaze_previous = self._gaze_current
+        self.update()
+        data = self.latest_eye_data
+        fresh = data is not None and self.sim_time - data.timestamp < 0.2
+        self._gaze_current = data.gaze_point if fresh else None
+    
     def update(self):
-        """Update game state"""
+        """Update game state at the current simulation time"""
+        self._poll_eye_tracker()
+        if self.state == GameState.INSTRUCTIONS:
+            if self.start_requested and not getattr(self.eye_tracker, 'is_initializing', False):
+                self.start_requested = False
+                self._leave_instructions()
+            return
+        
+        if self.state == GameState.CALIBRATION:
+            self._update_calibration()
+            return
+        
         if self.paused or self.state != GameState.PLAYING:
             return
         
-        current_time = time.time()
+        current_time = self.sim_time
         session_duration = current_time - self.session_start_time
+        self.metrics.play_time = min(session_duration, self.config.SESSION_DURATION)
         
         # Check session end
         if session_duration >= self.config.SESSION_DURATION:
             self.end_session()
             return
         
+        if self.checkpoint_writer is not None and session_duration >= self.next_checkpoint:
+            self._save_checkpoint(session_duration)
+        
         # Update adaptive difficulty
         old_level = self.current_level
         self.current_level = self.adaptive_difficulty.update(self.metrics, session_duration)
@@ -962,20 +1478,29 @@ class EnhancedPeriQuestGame:
         if self.eye_tracker_enabled:
             eye_data = self.eye_tracker.get_eye_data()
             if eye_data:
+                # Warn once at the start of each head movement (events are counted by the tracker)
+                if eye_data.head_turn_detected and not getattr(self.latest_eye_data, 'head_turn_detected', False):
+                    self._show_feedback("KEEP HEAD STILL!", self.config.WARNING_COLOR)
+                self.latest_eye_data = eye_data
                 self.metrics.eye_tracking_data.append(eye_data)
+                self.metrics.pupillometry.update(eye_data.timestamp, eye_data.pupil_diameter,
+                                                 eye_data.blink_detected)
+                # Uncalibrated gaze is too coarse to tell whether a stimulus was looked at
+                if self.eye_tracker.calibration.is_calibrated and not eye_data.blink_detected:
+                    self.gaze_validity.update(eye_data.timestamp, eye_data.gaze_point)
                 
                 if not eye_data.is_fixating:
                     self.metrics.fixation_breaks += 1
         
         # Generate stimuli
-        if random.random() < 0.02:  # 2% chance per frame
-            stimulus = self.stimulus_manager.generate_stimulus(self.current_level)
-            if stimulus:
-                self.metrics.total_stimuli += 1
+        stimulus = self.stimulus_manager.generate_stimulus(self.current_level, current_time)
+        if stimulus:
+            self.metrics.total_stimuli += 1
         
         # Update stimuli
         expired = self.stimulus_manager.update(current_time)
         for stimulus in expired:
+            self.gaze_validity.remove_stimulus(stimulus.id)
             if stimulus.is_target and not stimulus.reacted:
                 self.metrics.add_miss(stimulus)
                 self.metrics.score += self.config.MISS_PENALTY
@@ -989,78 +1514,113 @@ class EnhancedPeriQuestGame:
         else:
             self.current_feedback = None
     
-    def render(self):
-        """Render game"""
+    def render(self, alpha: float = 1.0):
+        """Render game; alpha is the fraction of a time step since the last step"""
         if not self.running:
             return
         
-        self.renderer.clear_screen()
-        
-        if self.state == GameState.RESULTS:
-            self._render_game_over()
-        elif self.state == GameState.INSTRUCTIONS:
-            self._render_instructions()
+        if self.state == GameState.PLAYING:
+            layers = self._playing_layers(alpha)
+            if self.config.DIRTY_RECT_RENDERING:
+                flip_time = self.renderer.present_layers(layers)
+            else:
+                self.renderer.clear_screen()
+                for layer in layers:
+                    layer.draw()
+                flip_time = self.renderer.update_display()
+            # Reaction times and pupil responses count from the frame that first showed a stimulus
+            self._on_frame_presented(flip_time)
         else:
-            # Determine fixation status for feedback
-            is_fixating_center = True
-            current_gaze = None
-            
-            if self.eye_tracker_enabled and self.metrics.eye_tracking_data:
-                latest_data = self.metrics.eye_tracking_data[-1]
-                
-                # Check if data is stale (older than 200ms) indicating lost tracking
-                time_since_data = time.time() - latest_data.timestamp
-                
-                if time_since_data < 0.2:
-                    is_fixating_center = latest_data.is_fixating
-                    current_gaze = latest_data.gaze_point
-                    
-                    # Track head movements (debounce: don't count continuous movement as multiple)
-                    if getattr(latest_data, 'head_turn_detected', False):
-                        if not getattr(self, 'currently_turning_head', False):
-                            self.metrics.head_movements += 1
-                            self.currently_turning_head = True
-                            self._show_feedback("KEEP HEAD STILL!", self.config.WARNING_COLOR)
-                    else:
-                        self.currently_turning_head = False
-                        
-                else:
-                    # Tracking lost (face turned away or obscured)
-                    is_fixating_center = False
-                    current_gaze = None
-            
-            self.renderer.draw_center_fixation(is_fixating=is_fixating_center)
-            
-            for stimulus in self.stimulus_manager.stimuli:
-                self.renderer.draw_stimulus(stimulus)
-            
-            time_remaining = max(0, self.config.SESSION_DURATION - (time.time() - self.session_start_time))
-            self.renderer.draw_hud(self.metrics, time_remaining, self.current_level)
-            
-            # Draw camera feed and eye tracking status
-            if self.eye_tracker_enabled:
-                # Use default positions defined in renderer methods (Bottom Left)
-                self.renderer.draw_camera_feed(self.eye_tracker)
-                
-                # Get current eye data
-                current_eye_data = self.metrics.eye_tracking_data[-1] if self.metrics.eye_tracking_data else None
-                self.renderer.draw_eye_status(current_eye_data)
-                
-                # Draw on-screen gaze cursor for user feedback
-                if current_gaze:
-                    self.renderer.draw_gaze_cursor(current_gaze)
-            
-            if self.current_feedback:
-                self.renderer.draw_feedback(
-                    self.current_feedback["message"],
-                    self.current_feedback["color"]
-                )
+            self.renderer.clear_screen()
+            if self.state == GameState.RESULTS:
+                self._render_game_over()
+            elif self.state == GameState.INSTRUCTIONS:
+                self._render_instructions()
+            elif self.state == GameState.CALIBRATION:
+                self._render_calibration()
+            self.renderer.update_display()
+    
+    def _on_frame_presented(self, flip_time: float):
+        """Bookkeeping for a displayed play frame: onsets of newly shown stimuli"""
+        for stimulus in self.stimulus_manager.mark_shown(flip_time):
+            stimulus.onset_gaze = self._gaze_current
+            self.gaze_validity.add_stimulus(stimulus.id, stimulus.x, stimulus.y, stimulus.size, flip_time)
+            self.metrics.pupillometry.stimulus_onset(flip_time, stimulus.id,
+                                                     stimulus.field.value, stimulus.is_target)
+    
+    def _playing_layers(self, alpha: float = 1.0) -> List[Layer]:
+        """The play screen, back to front, with what each element's pixels depend on"""
+        renderer = self.renderer
+        # Render the state `alpha` of the way from the previous step to the current one
+        render_time = self.sim_time - (1.0 - alpha) * self.time_step
+        
+        # Determine fixation status for feedback
+        is_fixating_center = True
+        current_gaze = None
+        
+        latest_data = self.latest_eye_data
+        if self.eye_tracker_enabled and latest_data:
+            # Check if data is stale (older than 200ms) indicating lost tracking
+            time_since_data = self.clock.now() - latest_data.timestamp
             
-            if self.paused:
-                self.renderer.draw_feedback("PAUSED", self.config.WARNING_COLOR)
+            if time_since_data < 0.2:
+                is_fixating_center = latest_data.is_fixating
+                current_gaze = self._interpolated_gaze(alpha) or latest_data.gaze_point
+            else:
+                # Tracking lost (face turned away or obscured)
+                is_fixating_center = False
+                current_gaze = None
         
-        self.renderer.update_display()
+        pulse = renderer.fixation_pulse(is_fixating_center)
+        layers = [Layer('fixation', (is_fixating_center, pulse), renderer.center_fixation_rect(),
+                        lambda: renderer.draw_center_fixation(is_fixating_center, pulse))]
+        
+        for stimulus in self.stimulus_manager.stimuli:
+            layers.append(Layer(('stimulus', stimulus.id), None, renderer.stimulus_rect(stimulus),
+                                lambda stimulus=stimulus: renderer.draw_stimulus(stimulus)))
+        
+        time_remaining = max(0, self.config.SESSION_DURATION - (render_time - self.session_start_time))
+        hud_values = (self.metrics.score, int(time_remaining), self.current_level,
+                      f"{self.metrics.calculate_accuracy():.1f}", f"{self.metrics.calculate_average_rt():.0f}")
+        layers.append(Layer('hud', hud_values, renderer.hud_rect(),
+                            lambda: renderer.draw_hud(self.metrics, time_remaining, self.current_level)))
+        
+        # Camera feed and eye tracking status (default positions, bottom left)
+        if self.eye_tracker_enabled:
+            tracking_status = getattr(self.eye_tracker, 'tracking_status', None)
+            layers.append(Layer('camera', getattr(self.eye_tracker, 'frame_count', None),
+                                renderer.camera_feed_rect(),
+                                lambda: renderer.draw_camera_feed(self.eye_tracker)))
+            layers.append(Layer('eye_status',
+                                (getattr(latest_data, 'timestamp', None),
+                                 tracking_status and tracking_status['tracking_fps']),
+                                renderer.eye_status_rect(),
+                                lambda: renderer.draw_eye_status(latest_data, tracking_status=tracking_status)))
+            
+            # On-screen gaze cursor for user feedback
+            if current_gaze:
+                cursor = (int(current_gaze[0] * self.config.SCREEN_WIDTH),
+                          int(current_gaze[1] * self.config.SCREEN_HEIGHT))
+                layers.append(Layer('gaze_cursor', cursor, renderer.gaze_cursor_rect(current_gaze),
+                                    lambda: renderer.draw_gaze_cursor(current_gaze)))
+        
+        feedback = self.current_feedback
+        if feedback:
+            layers.append(Layer('feedback', (feedback["message"], feedback["color"]),
+                                renderer.feedback_rect(feedback["message"]),
+                                lambda: renderer.draw_feedback(feedback["message"], feedback["color"])))
+        
+        if self.paused:
+            layers.append(Layer('paused', None, renderer.feedback_rect("PAUSED"),
+                                lambda: renderer.draw_feedback("PAUSED", self.config.WARNING_COLOR)))
+        return layers
     
+    def _interpolated_gaze(self, alpha: float) -> Optional[Tuple[float, float]]:
+        previous, current = self._gaze_previous, self._gaze_current
+        if previous is None or current is None:
+            return current
+        return (previous[0] + (current[0] - previous[0]) * alpha,
+                previous[1] + (current[1] - previous[1]) * alpha)
     
     def _render_instructions(self):
         """Render comprehensive instructions screen"""
@@ -1107,6 +1667,7 @@ class EnhancedPeriQuestGame:
         controls = [
             "SPACE - React to target stimulus",
             "P - Pause/Resume game",
+            "C - Recalibrate gaze (this screen)",
             "ESC - Quit game"
         ]
         
@@ -1137,25 +1698,105 @@ class EnhancedPeriQuestGame:
             screen.blit(d_surf, (level_x, level_y + 25))
             level_y += 60
             
+        # Eye tracker readiness (initialized in the background)
+        tracker = self.eye_tracker
+        if tracker is not None and hasattr(tracker, 'status'):
+            if self.eye_tracker_enabled:
+                status_text, status_color = "Eye tracker ready", self.config.SUCCESS_COLOR
+            elif tracker.is_initializing:
+                status_text, status_color = f"Eye tracker: {tracker.status_message}...", self.config.WARNING_COLOR
+            else:
+                status_text, status_color = f"Eye tracker unavailable: {tracker.status_message}", self.config.ERROR_COLOR
+            status_surf = self.renderer.small_font.render(status_text, True, status_color)
+            screen.blit(status_surf, (WIDTH // 2 - status_surf.get_width() // 2, HEIGHT - 135))
+        
         # Press start hint
-        start_hint = self.renderer.medium_font.render("Press ANY KEY or CLICK to Start Therapy", True, self.config.SUCCESS_COLOR)
+        hint = "Press ANY KEY or CLICK to Start Therapy"
+        if self.start_requested:
+            hint = "Starting once the eye tracker is ready..."
+        start_hint = self.renderer.medium_font.render(hint, True, self.config.SUCCESS_COLOR)
         screen.blit(start_hint, (WIDTH // 2 - start_hint.get_width() // 2, HEIGHT - 100))
         
+    def _render_calibration(self):
+        """Render the current calibration target"""
+        screen = self.renderer.screen
+        WIDTH, HEIGHT = self.config.SCREEN_WIDTH, self.config.SCREEN_HEIGHT
+        
+        title = self.renderer.medium_font.render("Calibration: follow the dot with your eyes", True, self.config.TEXT_COLOR)
+        screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 20))
+        progress = self.renderer.small_font.render(
+            f"Point {self.calibration_index + 1}/{len(self.calibration_targets)}   •   S to skip", True, (148, 163, 184))
+        screen.blit(progress, (WIDTH // 2 - progress.get_width() // 2, 55))
+        
+        if self.calibration_index >= len(self.calibration_targets):
+            return
+        tx, ty = self.calibration_targets[self.calibration_index]
+        x, y = int(tx * WIDTH), int(ty * HEIGHT)
+        
+        # Ring shrinks onto the dot while samples are being collected
+        elapsed = self.sim_time - self.calibration_point_start
+        shrink = min(1.0, elapsed / self.config.CALIBRATION_POINT_DURATION)
+        ring_radius = max(8, int(30 * (1 - shrink)) + 8)
+        pygame.draw.circle(screen, self.config.ACCENT_COLOR, (x, y), ring_radius, 2)
+        pygame.draw.circle(screen, self.config.CENTER_DOT_COLOR, (x, y), 6)
+    
     def run(self):
-        """Main game loop"""
+        """Main game loop: fixed simulation steps, rendering once per frame
+
+        Real elapsed time accumulates and is consumed in SIMULATION_HZ steps,
+        so spawning, difficulty and session timing follow the protocol on
+        any machine; the leftover fraction of a step interpolates rendering.
+        """
         self.start_session()
+        previous = self.clock.now()
+        accumulator = 0.0
         
         while self.running:
+            now = self.clock.now()
+            accumulator += now - previous
+            previous = now
+            
             self.handle_events()
-            self.update()
-            self.render()
+            steps = 0
+            while accumulator >= self.time_step and self.running:
+                if steps == self.config.MAX_CATCH_UP_STEPS:
+                    # Stalled (loading, a slow frame): drop the backlog rather than replay it
+                    self.sim_time += accumulator - accumulator % self.time_step
+                    accumulator %= self.time_step
+                    break
+                self.step()
+                accumulator -= self.time_step
+                steps += 1
+            self.render(accumulator / self.time_step)
         
         self.cleanup()
     
+    def _close_session_log(self):
+        """Close the session log (after its checkpoint writer); a session that
+        logged nothing leaves no directory behind"""
+        if self.session_log is None:
+            return
+        log, self.session_log = self.session_log, None
+        log.close()
+        if log.is_empty():
+            log.remove()
+            remove_checkpoint(log.directory)
+            try:
+                os.rmdir(log.directory)
+            except OSError:
+                pass  # Holds other files
+
     def cleanup(self):
         """Cleanup resources"""
         if self.eye_tracker:
             self.eye_tracker.release()
+        if self.checkpoint_writer is not None:
+            if self.state == GameState.PLAYING:
+                # Quit or crashed mid-session: keep what was played for --resume
+                self._save_checkpoint(self.sim_time - self.session_start_time)
+            self.checkpoint_writer.close()
+            self.checkpoint_writer = None
+        self._close_session_log()
         pygame.quit()
         print("\n✓ Game ended. Thank you!")
 
@@ -1242,23 +1883,46 @@ def show_setup_screen() -> int:
 
 def main():
     import sys
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="PeriQuest peripheral vision therapy")
+    parser.add_argument('--station', help="Use eye tracking from this station of tracking_server.py")
+    parser.add_argument('--resume', metavar='SESSION_DIR',
+                        help="Continue an interrupted session from its directory in session_logs/")
+    args = parser.parse_args()
+    
+    resume_state = None
+    if args.resume:
+        try:
+            resume_state = load_checkpoint(args.resume)
+        except (OSError, ValueError) as e:
+            print(f"✗ No usable checkpoint in {args.resume}: {e}")
+            return
+        if resume_state["complete"]:
+            print(f"✓ Session {resume_state['session_id']} is already complete")
+            return
     
-    # 1. Show graphical setup screen
-    duration_seconds = show_setup_screen()
+    # 1. Show graphical setup screen (a resumed session keeps its duration)
+    duration_seconds = resume_state["session_duration"] if resume_state else show_setup_screen()
     
     print("="*60)
     print("     PERIQUEST - ENHANCED PERIPHERAL VISION THERAPY")
     print("="*60)
     print(f"✓ Session duration set to {duration_seconds/60:.1f} minutes")
     
-    patient_id = f"patient_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    if resume_state:
+        patient_id = resume_state["patient_id"]
+    else:
+        patient_id = f"patient_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     print(f"\nPatient ID: {patient_id}\n")
     
     # Create game instance
-    game = EnhancedPeriQuestGame(patient_id=patient_id)
+    game = EnhancedPeriQuestGame(patient_id=patient_id, station_id=args.station)
     
     # Update configuration
     game.config.SESSION_DURATION = duration_seconds
+    if resume_state:
+        game.resume_from(args.resume, resume_state)
     
     try:
         game.run()
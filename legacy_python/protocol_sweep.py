@@ -0,0 +1,349 @@
+"""
+Protocol Parameter Sweep for PeriQuest
+Grid or random search of difficulty and scoring parameters over simulated patient cohorts
+
+Each parameter set is played by a cohort of virtual patients (headless_sim.py)
+in a process pool. Every set sees the same session seeds, so differences
+between sets come from the parameters rather than the draws. Outcomes are
+aggregated per set and profile into a results table: how many sessions
+reached each level and how fast, accuracy and its stability over the
+session, and score mean and spread. Finished (set, profile) units are
+recorded in a checkpoint file, so an interrupted sweep resumes where it
+stopped and adding parameter values only runs the new sets.
+
+Parameters are GameConfig attributes (PERFECT_RT, LEVEL_CHANGE_COOLDOWN, ...),
+single levels of SPAWN_INTERVALS or STIMULUS_DURATIONS (SPAWN_INTERVALS.3),
+or one of the KNOBS that scale a whole table at once.
+
+Usage:
+    python protocol_sweep.py --param spawn_interval_scale=0.8,1,1.2 --param LEVEL_CHANGE_COOLDOWN=10,20,30
+    python protocol_sweep.py --search random --points 40 --param level_up_accuracy_offset=-10:10 \\
+        --param PERFECT_RT=300:700 --cohort healthy:20 --cohort left_neglect:20 --output sweep/
+"""
+
+import os
+import csv
+import json
+import math
+import time
+import random
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional, List, Dict, Any, Tuple, Union
+
+from periquest_enhanced import GameConfig
+from headless_sim import VirtualPatient, PROFILES, simulate_session
+
+CHECKPOINT_NAME = 'sweep_checkpoint.json'
+RESULTS_NAME = 'sweep_results.csv'
+LEVELS = (2, 3, 4, 5)
+
+RESULT_FIELDS = (
+    ['sessions']
+    + [f for level in LEVELS for f in (f'reached_level_{level}', f'time_to_level_{level}_s')]
+    + ['final_level', 'accuracy', 'accuracy_stability_sd', 'accuracy_sd_between', 'reaction_time_ms',
+       'false_positives', 'score', 'score_variance', 'processing_s']
+)
+
+# ==================== PARAMETERS ====================
+def _scale_spawn_intervals(config: GameConfig, value: float):
+    config.SPAWN_INTERVALS = {level: interval * value for level, interval in config.SPAWN_INTERVALS.items()}
+
+def _scale_stimulus_durations(config: GameConfig, value: float):
+    config.STIMULUS_DURATIONS = {level: int(round(duration * value))
+                                 for level, duration in config.STIMULUS_DURATIONS.items()}
+
+def _offset_level_up_accuracy(config: GameConfig, value: float):
+    config.LEVEL_UP_RULES = {level: (accuracy + value, rt, count)
+                             for level, (accuracy, rt, count) in config.LEVEL_UP_RULES.items()}
+
+def _scale_level_up_rt(config: GameConfig, value: float):
+    config.LEVEL_UP_RULES = {level: (accuracy, rt * value, count)
+                             for level, (accuracy, rt, count) in config.LEVEL_UP_RULES.items()}
+
+def _scale_level_up_stimuli(config: GameConfig, value: float):
+    config.LEVEL_UP_RULES = {level: (accuracy, rt, max(1, int(round(count * value))))
+                             for level, (accuracy, rt, count) in config.LEVEL_UP_RULES.items()}
+
+# Parameters that move every level's entry of a table together
+KNOBS = {
+    'spawn_interval_scale': _scale_spawn_intervals,
+    'stimulus_duration_scale': _scale_stimulus_durations,
+    'level_up_accuracy_offset': _offset_level_up_accuracy,
+    'level_up_rt_scale': _scale_level_up_rt,
+    'level_up_min_stimuli_scale': _scale_level_up_stimuli,
+}
+
+# Per-level tables whose entries can be set individually as NAME.level
+LEVEL_TABLES = ('SPAWN_INTERVALS', 'STIMULUS_DURATIONS')
+
+def check_parameter(name: str):
+    """Raise ValueError unless name is a sweepable parameter"""
+    if name in KNOBS:
+        return
+    table, _, level = name.partition('.')
+    if level:
+        if table not in LEVEL_TABLES or not level.isdigit() or int(level) not in getattr(GameConfig(), table):
+            raise ValueError(f"unknown level table entry '{name}'")
+        return
+    default = getattr(GameConfig(), name, None)
+    if isinstance(default, bool) or not isinstance(default, (int, float)):
+        raise ValueError(f"'{name}' is not a numeric GameConfig attribute or a knob ({', '.join(KNOBS)})")
+
+def config_overrides(params: Dict[str, float]) -> Dict[str, Any]:
+    """GameConfig attribute values for one parameter set (simulate_session's config)"""
+    config = GameConfig()
+    defaults = GameConfig()
+    # Scalars and single table entries first, so knobs scale the overridden tables
+    for name, value in params.items():
+        table, _, level = name.partition('.')
+        if name in KNOBS:
+            continue
+        if level:
+            entries = dict(getattr(config, table))
+            entries[int(level)] = type(entries[int(level)])(value)
+            setattr(config, table, entries)
+        else:
+            setattr(config, name, type(getattr(defaults, name))(value))
+    for name, value in params.items():
+        if name in KNOBS:
+            KNOBS[name](config, value)
+    return {name: value for name, value in vars(config).items() if value != getattr(defaults, name)}
+
+# ==================== SEARCH SPACE ====================
+Domain = Union[List[float], Tuple[float, float]]
+
+def parse_domain(spec: str) -> Tuple[str, Domain]:
+    """'NAME=v1,v2,...' (values) or 'NAME=low:high' (range, random search only)"""
+    name, _, values = spec.partition('=')
+    name = name.strip()
+    if not values:
+        raise ValueError(f"expected NAME=values, got '{spec}'")
+    check_parameter(name)
+    if ':' in values:
+        low, high = (float(v) for v in values.split(':', 1))
+        return name, (min(low, high), max(low, high))
+    return name, [float(v) for v in values.split(',')]
+
+def grid_points(domains: Dict[str, Domain]) -> List[Dict[str, float]]:
+    names = sorted(domains)
+    for name in names:
+        if isinstance(domains[name], tuple):
+            raise ValueError(f"grid search needs a list of values for '{name}', not a range")
+    return [dict(zip(names, values)) for values in itertools.product(*(domains[n] for n in names))]
+
+def random_points(domains: Dict[str, Domain], count: int, seed: int) -> List[Dict[str, float]]:
+    """count parameter sets, uniform over ranges and choices; the same for the same seed"""
+    rng = random.Random(seed)
+    points = []
+    for _ in range(count):
+        point = {}
+        for name in sorted(domains):
+            domain = domains[name]
+            point[name] = (round(rng.uniform(*domain), 4) if isinstance(domain, tuple)
+                           else rng.choice(domain))
+        points.append(point)
+    return points
+
+def point_key(params: Dict[str, float]) -> str:
+    return json.dumps(params, sort_keys=True)
+
+# ==================== EVALUATION ====================
+def _mean(values) -> Optional[float]:
+    values = list(values)
+    return round(sum(values) / len(values), 3) if values else None
+
+def _sd(values) -> Optional[float]:
+    values = list(values)
+    if len(values) < 2:
+        return None
+    mean = sum(values) / len(values)
+    return round(math.sqrt(sum((v - mean) ** 2 for v in values) / (len(values) - 1)), 3)
+
+def window_accuracies(trace: List[Tuple]) -> List[float]:
+    """Accuracy (%) within each trace interval that had stimuli"""
+    accuracies = []
+    previous_total = previous_correct = 0
+    for _, _, total, correct, _ in trace:
+        if total > previous_total:
+            accuracies.append((correct - previous_correct) / (total - previous_total) * 100)
+        previous_total, previous_correct = total, correct
+    return accuracies
+
+def evaluate(params: Dict[str, float], profile: str, seeds: List[int], duration: float,
+             with_eye_tracking: bool) -> Dict[str, Any]:
+    """Play one profile's sessions with one parameter set; the aggregated outcomes"""
+    started = time.time()
+    overrides = config_overrides(params)
+    patient = VirtualPatient.from_profile(profile)
+    results = [simulate_session(patient, duration, seed=seed, config=overrides,
+                                patient_id=f"sweep_{seed}", with_eye_tracking=with_eye_tracking)
+               for seed in seeds]
+
+    summary = {"sessions": len(results)}
+    for level in LEVELS:
+        times = [r["level_times"][level] for r in results if level in r["level_times"]]
+        summary[f"reached_level_{level}"] = round(len(times) / len(results), 3)
+        summary[f"time_to_level_{level}_s"] = _mean(times)
+    summary.update({
+        "final_level": _mean(r["level"] for r in results),
+        "accuracy": _mean(r["accuracy_percentage"] for r in results),
+        # Within-session SD of interval accuracy, averaged over sessions
+        "accuracy_stability_sd": _mean(sd for sd in (_sd(window_accuracies(r["trace"])) for r in results)
+                                       if sd is not None),
+        "accuracy_sd_between": _sd(r["accuracy_percentage"] for r in results),
+        "reaction_time_ms": _mean(r["average_reaction_time_ms"] for r in results),
+        "false_positives": _mean(r["false_positives"] for r in results),
+        "score": _mean(r["score"] for r in results),
+        "score_variance": round(_sd(r["score"] for r in results) ** 2, 1) if len(results) > 1 else None,
+        "processing_s": round(time.time() - started, 1),
+    })
+    return summary
+
+# ==================== CHECKPOINT ====================
+class SweepCheckpoint:
+    """Completed (parameter set, profile) units of a sweep, rewritten atomically after each one"""
+
+    def __init__(self, path: str, options: Dict[str, Any]):
+        self.path = path
+        self.options = options
+        self.units: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> bool:
+        """Resume from an earlier run with the same options; False if none"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"✗ Ignoring unreadable checkpoint {self.path}: {e}")
+            return False
+        if data.get("options") != self.options:
+            print("⚠ Cohort or session options changed since the checkpoint; starting over")
+            return False
+        self.units = data.get("units", {})
+        return True
+
+    @staticmethod
+    def unit_key(params: Dict[str, float], profile: str) -> str:
+        return f"{point_key(params)}|{profile}"
+
+    def is_done(self, params: Dict[str, float], profile: str) -> bool:
+        return self.unit_key(params, profile) in self.units
+
+    def mark_done(self, params: Dict[str, float], profile: str, summary: Dict[str, Any]):
+        self.units[self.unit_key(params, profile)] = {"params": params, "profile": profile,
+                                                      "summary": summary}
+        self.save()
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"options": self.options, "units": self.units}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+def write_results_csv(path: str, points: List[Dict[str, float]], profiles: List[str],
+                      units: Dict[str, Dict[str, Any]]):
+    """One row per parameter set and profile of this sweep, in point order"""
+    names = sorted({name for params in points for name in params})
+    rows = []
+    for index, params in enumerate(points):
+        for profile in profiles:
+            entry = units.get(SweepCheckpoint.unit_key(params, profile))
+            if entry:
+                rows.append({"point": index, **params, "profile": profile, **entry["summary"]})
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=["point", *names, "profile", *RESULT_FIELDS],
+                                extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+# ==================== SWEEP ====================
+def run_sweep(points: List[Dict[str, float]], cohort: Dict[str, int], output_dir: str,
+              duration: float = 300.0, seed: int = 0, with_eye_tracking: bool = True,
+              workers: Optional[int] = None, restart: bool = False) -> Dict[str, Any]:
+    os.makedirs(output_dir, exist_ok=True)
+    options = {"cohort": cohort, "duration": duration, "seed": seed, "eye_tracking": with_eye_tracking}
+    checkpoint = SweepCheckpoint(os.path.join(output_dir, CHECKPOINT_NAME), options)
+    if not restart and checkpoint.load():
+        print(f"✓ Resuming: {len(checkpoint.units)} units already simulated")
+
+    pending = [(params, profile) for params in points for profile in cohort
+               if not checkpoint.is_done(params, profile)]
+    total_sessions = sum(cohort[profile] for _, profile in pending)
+    print(f"✓ {len(points)} parameter sets x {len(cohort)} profiles, "
+          f"{len(pending)} units ({total_sessions} sessions) to simulate")
+
+    failures = {}
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(evaluate, params, profile,
+                                   [seed + i for i in range(cohort[profile])],
+                                   duration, with_eye_tracking): (params, profile)
+                       for params, profile in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                params, profile = futures[future]
+                label = f"{point_key(params)} {profile}"
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    failures[label] = str(e)
+                    print(f"  [{done}/{len(pending)}] ✗ {label}: {e}")
+                    continue
+                checkpoint.mark_done(params, profile, summary)
+                print(f"  [{done}/{len(pending)}] ✓ {label} "
+                      f"(level {summary['final_level']}, accuracy {summary['accuracy']}%, "
+                      f"score {summary['score']}, {summary['processing_s']:.1f}s)")
+
+    write_results_csv(os.path.join(output_dir, RESULTS_NAME), points, list(cohort), checkpoint.units)
+    return {"simulated": len(checkpoint.units), "failed": failures}
+
+def parse_cohort(specs: List[str]) -> Dict[str, int]:
+    """'profile:sessions' entries; a bare profile name uses 10 sessions"""
+    cohort = {}
+    for spec in specs:
+        profile, _, count = spec.partition(':')
+        if profile not in PROFILES:
+            raise ValueError(f"unknown profile '{profile}' (choose from {', '.join(PROFILES)})")
+        cohort[profile] = int(count) if count else 10
+    return cohort
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep PeriQuest protocol parameters over simulated cohorts")
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUES',
+                        help="Values v1,v2,... or (random search) a range low:high; repeatable")
+    parser.add_argument('--search', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--points', type=int, default=20, help="Parameter sets drawn by random search")
+    parser.add_argument('--cohort', action='append', default=[], metavar='PROFILE:SESSIONS',
+                        help="Profile and sessions per parameter set; repeatable (default healthy:10)")
+    parser.add_argument('--duration', type=float, default=300.0, help="Session length (s)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the first session (and of random search)")
+    parser.add_argument('--no-eye-tracking', action='store_true')
+    parser.add_argument('--output', default='sweep', help="Directory for the results table and checkpoint")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and redo every unit")
+    args = parser.parse_args()
+
+    try:
+        domains = dict(parse_domain(spec) for spec in args.param)
+        cohort = parse_cohort(args.cohort or ['healthy'])
+        points = (grid_points(domains) if args.search == 'grid'
+                  else random_points(domains, args.points, args.seed))
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = time.time()
+    try:
+        result = run_sweep(points, cohort, args.output, duration=args.duration, seed=args.seed,
+                           with_eye_tracking=not args.no_eye_tracking, workers=args.workers,
+                           restart=args.restart)
+    except KeyboardInterrupt:
+        print("\n⚠ Interrupted; rerun the same command to resume")
+        return
+    print(f"✓ {result['simulated']} units in {os.path.join(args.output, RESULTS_NAME)} "
+          f"({time.time() - started:.1f}s), {len(result['failed'])} failed")
+
+if __name__ == "__main__":
+    main()
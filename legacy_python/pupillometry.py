@@ -0,0 +1,172 @@
+"""
+Pupillometry for PeriQuest
+Rolling pupil baseline and task-evoked pupil responses from iris landmarks
+"""
+
+import math
+import statistics
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any
+
+from eye_events import SlidingWindowStats
+
+@dataclass
+class PupilResponse:
+    """Task-evoked pupil response to one stimulus
+
+    Changes are relative to the mean pupil size in the pre-onset window,
+    e.g. 0.05 is a 5% dilation.
+    """
+    stimulus_id: int
+    field: str
+    is_target: bool
+    onset_time: float
+    baseline: float
+    peak_change: float
+    mean_change: float
+    peak_latency: float
+    valid_fraction: float
+
+class _Epoch:
+    """Accumulates the post-onset samples of one stimulus"""
+
+    __slots__ = ('stimulus_id', 'field', 'is_target', 'onset_time', 'baseline',
+                 'peak', 'peak_time', 'total', 'count')
+
+    def __init__(self, stimulus_id, field, is_target, onset_time, baseline):
+        self.stimulus_id = stimulus_id
+        self.field = field
+        self.is_target = is_target
+        self.onset_time = onset_time
+        self.baseline = baseline
+        self.peak = -math.inf
+        self.peak_time = onset_time
+        self.total = 0.0
+        self.count = 0
+
+class PupilResponseTracker:
+    """Streaming pupillometry over EyeData.pupil_diameter
+
+    Samples without a pupil size (blinks, lost tracking) and the first
+    blink_recovery seconds after a blink are ignored, since the pupil
+    estimate is unreliable while the lids reopen. Each stimulus onset opens
+    an epoch: the pre-onset mean over baseline_window seconds is its
+    baseline, and samples over the following response_window seconds give
+    the peak and mean relative dilation; samples captured before the onset
+    never count toward it. The expected sample count follows the median
+    interval between recent frames (sample_rate until frames arrive), so
+    a tracker that skips frames under load isn't penalized. Epochs with
+    less than min_valid_fraction of the expected samples are dropped.
+    Memory is bounded by the rolling windows plus one PupilResponse per
+    stimulus.
+    """
+
+    def __init__(self, baseline_window: float = 0.5, response_window: float = 2.0,
+                 rolling_samples: int = 300, blink_recovery: float = 0.15,
+                 min_valid_fraction: float = 0.5, sample_rate: float = 30.0,
+                 interval_samples: int = 31):
+        self.baseline_window = baseline_window
+        self.response_window = response_window
+        self.blink_recovery = blink_recovery
+        self.min_valid_fraction = min_valid_fraction
+        self.sample_rate = sample_rate
+
+        self.responses: List[PupilResponse] = []
+        self.rolling = SlidingWindowStats(rolling_samples)
+        self.recent = deque()  # (timestamp, pupil) within baseline_window
+        self.current: Optional[float] = None
+        self._open_epochs: List[_Epoch] = []
+        self._last_blink: Optional[float] = None
+        self._last_timestamp: Optional[float] = None
+        self._intervals = deque(maxlen=interval_samples)  # seconds between recent frames
+
+    @property
+    def baseline(self) -> Optional[float]:
+        """Rolling mean pupil size over the last rolling_samples valid samples"""
+        return self.rolling.mean if len(self.rolling) else None
+
+    @property
+    def relative_size(self) -> Optional[float]:
+        """Current pupil size relative to the rolling baseline (1.0 = baseline)"""
+        baseline = self.baseline
+        if self.current is None or not baseline:
+            return None
+        return self.current / baseline
+
+    @property
+    def sample_interval(self) -> float:
+        """Median seconds between recent frames, valid or not"""
+        if not self._intervals:
+            return 1.0 / self.sample_rate
+        return statistics.median(self._intervals)
+
+    def update(self, timestamp: float, pupil: Optional[float], blinking: bool = False):
+        """Add one frame's normalized pupil size (None when unavailable)"""
+        if self._last_timestamp is not None and timestamp > self._last_timestamp:
+            self._intervals.append(timestamp - self._last_timestamp)
+        self._last_timestamp = timestamp
+
+        if blinking or pupil is None:
+            if blinking:
+                self._last_blink = timestamp
+            self.current = None
+        elif self._last_blink is not None and timestamp - self._last_blink < self.blink_recovery:
+            self.current = None
+        else:
+            self.current = pupil
+            self.rolling.push(pupil)
+            self.recent.append((timestamp, pupil))
+            for epoch in self._open_epochs:
+                if timestamp < epoch.onset_time:
+                    continue
+                epoch.total += pupil
+                epoch.count += 1
+                if pupil > epoch.peak:
+                    epoch.peak = pupil
+                    epoch.peak_time = timestamp
+
+        cutoff = timestamp - self.baseline_window
+        while self.recent and self.recent[0][0] < cutoff:
+            self.recent.popleft()
+        while self._open_epochs and timestamp - self._open_epochs[0].onset_time >= self.response_window:
+            self._close_epoch(self._open_epochs.pop(0))
+
+    def stimulus_onset(self, timestamp: float, stimulus_id: int, field: str, is_target: bool = True):
+        """Open a response epoch; needs valid samples just before the onset"""
+        if not self.recent:
+            return
+        baseline = sum(p for _, p in self.recent) / len(self.recent)
+        if baseline <= 0:
+            return
+        self._open_epochs.append(_Epoch(stimulus_id, field, is_target, timestamp, baseline))
+
+    def _close_epoch(self, epoch: _Epoch):
+        expected = self.response_window / self.sample_interval
+        valid_fraction = min(1.0, epoch.count / expected) if expected > 0 else 0.0
+        if epoch.count == 0 or valid_fraction < self.min_valid_fraction:
+            return
+        self.responses.append(PupilResponse(
+            stimulus_id=epoch.stimulus_id,
+            field=epoch.field,
+            is_target=epoch.is_target,
+            onset_time=epoch.onset_time,
+            baseline=epoch.baseline,
+            peak_change=epoch.peak / epoch.baseline - 1.0,
+            mean_change=(epoch.total / epoch.count) / epoch.baseline - 1.0,
+            peak_latency=epoch.peak_time - epoch.onset_time,
+            valid_fraction=valid_fraction,
+        ))
+
+    def summary(self) -> Dict[str, Any]:
+        """Session-level pupillometry for SessionMetrics.to_dict"""
+        targets = [r for r in self.responses if r.is_target]
+        def mean(values):
+            values = list(values)
+            return sum(values) / len(values) if values else None
+        return {
+            "pupil_baseline": self.baseline,
+            "pupil_response_count": len(self.responses),
+            "pupil_response_pct": None if not targets else mean(r.peak_change for r in targets) * 100,
+            "pupil_response_latency_s": mean(r.peak_latency for r in targets),
+        }
@@ -0,0 +1,81 @@
+"""
+Render Cache for PeriQuest
+Memoized text surfaces and pre-rendered sprites so frames are mostly blits
+"""
+
+import pygame
+from collections import OrderedDict
+from typing import Tuple, Callable, Hashable, Optional
+
+class LRUCache:
+    """Mapping with a size limit that evicts the least recently used entry"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.entries: "OrderedDict[Hashable, pygame.Surface]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, build: Callable[[], pygame.Surface]) -> pygame.Surface:
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = build()
+        self.entries[key] = surface
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+class RenderCache:
+    """Text and sprite surfaces keyed by everything that affects their pixels
+
+    Text is memoized by (font, string, color): HUD strings change a few
+    times per second at most, so nearly every frame is a cache hit. Sprites
+    (glows, translucent panels) are built once per distinct size, color and
+    alpha. Both caches are LRU-bounded so strings that change every frame
+    (gaze coordinates) can't grow memory without limit.
+    """
+
+    def __init__(self, text_capacity: int = 256, sprite_capacity: int = 128):
+        self.texts = LRUCache(text_capacity)
+        self.sprites = LRUCache(sprite_capacity)
+
+    def text(self, font: pygame.font.Font, string: str, color: Tuple[int, ...]) -> pygame.Surface:
+        return self.texts.get((font, string, color), lambda: font.render(string, True, color))
+
+    def sprite(self, key: Hashable, build: Callable[[], pygame.Surface]) -> pygame.Surface:
+        return self.sprites.get(key, build)
+
+    def circle(self, radius: int, color: Tuple[int, int, int], alpha: int) -> pygame.Surface:
+        """Translucent filled circle in a (2 * radius)^2 surface"""
+        def build():
+            surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surface, (*color[:3], alpha), (radius, radius), radius)
+            return surface
+        return self.sprite(('circle', radius, tuple(color[:3]), alpha), build)
+
+    def panel(self, size: Tuple[int, int], fill: Tuple[int, int, int, int],
+              border: Optional[Tuple[int, int, int]] = None, border_width: int = 2,
+              border_radius: int = 10) -> pygame.Surface:
+        """Translucent rounded rectangle, optionally outlined"""
+        def build():
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            pygame.draw.rect(surface, fill, surface.get_rect(), border_radius=border_radius)
+            if border is not None:
+                pygame.draw.rect(surface, border, surface.get_rect(), border_width,
+                                 border_radius=border_radius)
+            return surface
+        return self.sprite(('panel', tuple(size), fill, border, border_width, border_radius), build)
+
+    def clear(self):
+        self.texts.clear()
+        self.sprites.clear()
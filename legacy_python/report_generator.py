@@ -7,7 +7,7 @@ import os
 import json
 import csv
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
@@ -17,9 +17,14 @@ from matplotlib.patches import Rectangle
 from matplotlib.backends.backend_pdf import PdfPages
 import pandas as pd
 
+from eye_data_store import EyeDataStore
+
 class ReportGenerator:
     """Generates comprehensive reports for therapy sessions"""
     
+    # Per-frame plots of long sessions are thinned to about this many points
+    MAX_PLOT_POINTS = 10000
+    
     def __init__(self, output_dir: str = "reports"):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
@@ -284,7 +289,7 @@ class ReportGenerator:
         
         # 3. Eye Tracking Statistics
         ax3 = fig.add_subplot(gs[1, 1])
-        self._plot_eye_statistics(ax3, eye_data)
+        self._plot_eye_statistics(ax3, eye_data, session_data)
         
         fig.suptitle('Eye Tracking Analysis', fontsize=16, fontweight='bold', y=0.98)
         
@@ -560,18 +565,60 @@ class ReportGenerator:
         ax.set_xlim(0, 1)
         ax.set_ylim(0, 1)
     
+    def _eye_columns(self, eye_data) -> Dict[str, np.ndarray]:
+        """Eye tracking samples as NumPy columns (EyeDataStore or list of EyeData)"""
+        if hasattr(eye_data, 'column'):
+            return {
+                'timestamp': eye_data.column('timestamp'),
+                'gaze_x': eye_data.column('gaze_x'),
+                'gaze_y': eye_data.column('gaze_y'),
+                'has_gaze': eye_data.flag(eye_data.FLAG_HAS_GAZE),
+                'is_fixating': eye_data.flag(eye_data.FLAG_FIXATING),
+                'blink': eye_data.flag(eye_data.FLAG_BLINK),
+            }
+        
+        # Legacy list of EyeData objects
+        gaze = [getattr(d, 'gaze_point', None) for d in eye_data]
+        return {
+            'timestamp': np.array([d.timestamp for d in eye_data], dtype=np.float64),
+            'gaze_x': np.array([g[0] if g else np.nan for g in gaze], dtype=np.float32),
+            'gaze_y': np.array([g[1] if g else np.nan for g in gaze], dtype=np.float32),
+            'has_gaze': np.array([bool(g) for g in gaze], dtype=bool),
+            'is_fixating': np.array([getattr(d, 'is_fixating', False) for d in eye_data], dtype=bool),
+            'blink': np.array([getattr(d, 'blink_detected', False) for d in eye_data], dtype=bool),
+        }
+    
+    def _eye_chunks(self, eye_data) -> Iterator[Dict[str, np.ndarray]]:
+        """_eye_columns() chunk by chunk; a SessionLog is streamed from disk"""
+        if not hasattr(eye_data, 'iter_eye_chunks'):
+            yield self._eye_columns(eye_data)
+            return
+        for chunk in eye_data.iter_eye_chunks():
+            flags = chunk['flags']
+            yield {
+                'timestamp': chunk['timestamp'],
+                'gaze_x': chunk['gaze_x'],
+                'gaze_y': chunk['gaze_y'],
+                'has_gaze': (flags & EyeDataStore.FLAG_HAS_GAZE) != 0,
+                'is_fixating': (flags & EyeDataStore.FLAG_FIXATING) != 0,
+                'blink': (flags & EyeDataStore.FLAG_BLINK) != 0,
+            }
+    
     def _plot_gaze_heatmap(self, ax, eye_data):
         """Plot gaze point heatmap"""
-        gaze_points = [d.gaze_point for d in eye_data if hasattr(d, 'gaze_point') and d.gaze_point]
-        
-        if gaze_points:
-            x_coords = [p[0] for p in gaze_points]
-            y_coords = [1 - p[1] for p in gaze_points]  # Flip Y for display
-            
-            # Create 2D histogram
-            heatmap, xedges, yedges = np.histogram2d(x_coords, y_coords, bins=50, 
-                                                     range=[[0, 1], [0, 1]])
-            
+        # Accumulate the 2D histogram over chunks
+        heatmap = np.zeros((50, 50))
+        xedges = yedges = np.linspace(0, 1, 51)
+        any_gaze = False
+        for columns in self._eye_chunks(eye_data):
+            has_gaze = columns['has_gaze']
+            if has_gaze.any():
+                any_gaze = True
+                x_coords = columns['gaze_x'][has_gaze]
+                y_coords = 1 - columns['gaze_y'][has_gaze]  # Flip Y for display
+                heatmap += np.histogram2d(x_coords, y_coords, bins=50, range=[[0, 1], [0, 1]])[0]
+        
+        if any_gaze:
             extent = [xedges[0], xedges[-1], yedges[0], yedges[-1]]
             im = ax.imshow(heatmap.T, extent=extent, origin='lower', cmap='hot', 
                           interpolation='gaussian', aspect='auto')
@@ -590,20 +637,30 @@ class ReportGenerator:
     
     def _plot_fixation_stability(self, ax, eye_data):
         """Plot fixation stability over time"""
-        fixation_data = [d.is_fixating for d in eye_data if hasattr(d, 'is_fixating')]
-        
-        if fixation_data:
-            # Calculate rolling fixation percentage
-            window_size = 30
-            fixation_pct = []
-            
-            for i in range(len(fixation_data)):
-                start = max(0, i - window_size)
-                window = fixation_data[start:i+1]
-                pct = sum(window) / len(window) * 100
-                fixation_pct.append(pct)
-            
-            ax.plot(fixation_pct, color='#3498db', linewidth=2)
+        # Rolling fixation percentage (window of the last 31 frames), carried across chunks
+        window_size = 30
+        step = max(1, len(eye_data) // self.MAX_PLOT_POINTS)
+        frames, percentages = [], []
+        tail = np.zeros(0, dtype=bool)
+        offset = 0
+        for columns in self._eye_chunks(eye_data):
+            fixating = columns['is_fixating']
+            if not fixating.size:
+                continue
+            data = np.concatenate((tail, fixating))
+            cumulative = np.concatenate(([0], np.cumsum(data)))
+            end = np.arange(tail.size + 1, data.size + 1)
+            start = np.maximum(0, end - 1 - window_size)
+            fixation_pct = (cumulative[end] - cumulative[start]) / (end - start) * 100
+            index = np.arange(offset, offset + fixating.size)
+            keep = index % step == 0
+            frames.append(index[keep])
+            percentages.append(fixation_pct[keep])
+            tail = data[-window_size:]
+            offset += fixating.size
+        
+        if offset:
+            ax.plot(np.concatenate(frames), np.concatenate(percentages), color='#3498db', linewidth=2)
             ax.axhline(y=80, color='#27ae60', linestyle='--', label='Good (80%)')
             ax.axhline(y=50, color='#f39c12', linestyle='--', label='Fair (50%)')
             
@@ -617,19 +674,38 @@ class ReportGenerator:
             ax.text(0.5, 0.5, 'No fixation data', ha='center', va='center')
             ax.axis('off')
     
-    def _plot_eye_statistics(self, ax, eye_data):
+    def _plot_eye_statistics(self, ax, eye_data, session_data: Optional[Dict] = None):
         """Plot eye tracking statistics"""
         ax.axis('off')
         
-        # Calculate statistics
-        blinks = sum(1 for d in eye_data if hasattr(d, 'blink_detected') and d.blink_detected)
-        total_frames = len(eye_data)
+        # Calculate statistics in one pass over the chunks
+        total_frames = fixation_frames = closed_onsets = 0
+        first_time = last_time = 0.0
+        was_closed = False
+        for columns in self._eye_chunks(eye_data):
+            timestamps = columns['timestamp']
+            if not timestamps.size:
+                continue
+            if total_frames == 0:
+                first_time = timestamps[0]
+            last_time = timestamps[-1]
+            total_frames += timestamps.size
+            fixation_frames += int(np.count_nonzero(columns['is_fixating']))
+            # Count closed-eye onsets rather than closed frames
+            closed = columns['blink']
+            closed_onsets += int(np.count_nonzero(closed[1:] & ~closed[:-1])) + int(closed[0] and not was_closed)
+            was_closed = bool(closed[-1])
+        if session_data and 'blink_count' in session_data:
+            # Debounced blink events from the tracker
+            blinks = session_data['blink_count']
+        else:
+            # Older sessions
+            blinks = closed_onsets
         
         if total_frames > 0:
-            duration = eye_data[-1].timestamp - eye_data[0].timestamp if len(eye_data) > 1 else 1
-            blink_rate = (blinks / duration) * 60  # blinks per minute
+            duration = last_time - first_time if total_frames > 1 else 1
+            blink_rate = (blinks / duration) * 60 if duration > 0 else 0  # blinks per minute
             
-            fixation_frames = sum(1 for d in eye_data if hasattr(d, 'is_fixating') and d.is_fixating)
             fixation_pct = (fixation_frames / total_frames) * 100
             
             stats_text = [
@@ -641,6 +717,9 @@ class ReportGenerator:
                 f"Total Blinks: {blinks}",
                 f"Fixation: {fixation_pct:.1f}%",
             ]
+            if session_data and session_data.get('pupil_response_pct') is not None:
+                stats_text.append(f"Pupil Response: {session_data['pupil_response_pct']:+.1f}% "
+                                  f"({session_data['pupil_response_count']} stimuli)")
             
             y_pos = 0.9
             for i, text in enumerate(stats_text):
@@ -0,0 +1,55 @@
+"""
+Session Clock for PeriQuest
+One monotonic timeline for camera capture, stimulus display and key presses
+"""
+
+import time
+from typing import Optional
+
+class SessionClock:
+    """Monotonic session time in seconds
+
+    Every timestamp that goes into a reaction time or a gaze/stimulus
+    comparison comes from this timeline: camera frames are stamped when
+    grabbed on the capture thread, stimulus onsets at the display flip that
+    first shows them, and key presses when the event queue is polled.
+    time.perf_counter is monotonic and system-wide on Windows and Linux, so
+    tracking_server.py stations stamp on the same timeline as the game.
+
+    Known fixed delays are compensated: display_latency (flip to light on
+    the screen) is added to onsets and input_latency (key press to event
+    queue) is subtracted from presses. A press is also placed at the middle
+    of the polling interval it arrived in rather than at its end, which
+    removes the average half-frame delay of polling once per frame.
+    """
+
+    # Polls further apart than this (loading, a stall) don't bound the press time
+    MAX_POLL_INTERVAL = 0.1
+
+    def __init__(self, display_latency: float = 0.0, input_latency: float = 0.0):
+        self.display_latency = display_latency
+        self.input_latency = input_latency
+        self._wall_offset = time.time() - time.perf_counter()
+        self._last_poll: Optional[float] = None
+
+    def now(self) -> float:
+        return time.perf_counter()
+
+    def to_wall(self, timestamp: float) -> float:
+        """Epoch seconds for a session timestamp (for reports and file names)"""
+        return timestamp + self._wall_offset
+
+    def flip_time(self) -> float:
+        """Onset time of a frame whose display flip has just returned"""
+        return self.now() + self.display_latency
+
+    def poll_input(self) -> float:
+        """Call once per event-queue poll; estimated press time of its events"""
+        now = self.now()
+        last, self._last_poll = self._last_poll, now
+        if last is not None and now - last <= self.MAX_POLL_INTERVAL:
+            now = (last + now) / 2
+        return now - self.input_latency
+
+# Shared by frame sources and the tracker; games may create their own with latencies
+SESSION_CLOCK = SessionClock()
@@ -0,0 +1,141 @@
+"""
+On-Disk Session Log for PeriQuest
+Append-only spill files that keep long sessions in bounded memory
+"""
+
+import os
+import numpy as np
+from typing import Dict, Iterator, List, Any, Tuple
+
+from eye_data_store import EyeDataStore
+from trial_log import TrialLogWriter, read_trials, CORRECT
+
+class SessionLog:
+    """Eye samples and trial events of one session, appended to files in chunks
+
+    eye_samples.bin holds packed EyeDataStore.COLUMNS records (41 bytes
+    each), written a chunk at a time; trials.bin is a trial_log.py log of
+    fixed-width trial records, buffered and appended a chunk at a time. Both
+    files are only ever appended to, so everything written stays readable if the
+    session dies, and a torn record at the end is skipped. Readers stream
+    the eye samples back in chunks through a memory map instead of loading
+    the whole file.
+    """
+
+    EYE_FILE = 'eye_samples.bin'
+    TRIALS_FILE = 'trials.bin'
+    EYE_DTYPE = np.dtype(list(EyeDataStore.COLUMNS.items()))
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.eye_path = os.path.join(directory, self.EYE_FILE)
+        self.trials_path = os.path.join(directory, self.TRIALS_FILE)
+        self._eye_file = open(self.eye_path, 'ab')
+        self._trials_file = TrialLogWriter(self.trials_path)
+
+    @classmethod
+    def reopen(cls, directory: str, trials_bytes: int, eye_samples: int) -> 'SessionLog':
+        """Continue a session's log from a position(), dropping anything written after it"""
+        for name, size in ((cls.TRIALS_FILE, trials_bytes), (cls.EYE_FILE, eye_samples * cls.EYE_DTYPE.itemsize)):
+            path = os.path.join(directory, name)
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+        return cls(directory)
+
+    # ---- writing ----
+    def append_eye_chunk(self, columns: Dict[str, np.ndarray]):
+        """Append samples given as EyeDataStore columns of equal length"""
+        records = np.empty(len(columns['timestamp']), dtype=self.EYE_DTYPE)
+        for name in self.EYE_DTYPE.names:
+            records[name] = columns[name]
+        self._eye_file.write(records.tobytes())
+        self._eye_file.flush()
+
+    def append_trial(self, time: float, outcome: str, **stimulus: Any):
+        """One trial outcome; see TrialLogWriter.append for the stimulus fields"""
+        self._trials_file.append(time, outcome, **stimulus)
+
+    def flush(self):
+        self._trials_file.flush()
+        self._eye_file.flush()
+
+    def position(self) -> Tuple[int, int]:
+        """(trial log bytes, eye samples) written so far; call after flush()"""
+        return self._trials_file.tell(), self._eye_file.tell() // self.EYE_DTYPE.itemsize
+
+    def sync(self):
+        """Force everything flushed so far onto the disk (safe from another thread)"""
+        if not self._eye_file.closed:
+            os.fsync(self._eye_file.fileno())
+            os.fsync(self._trials_file.fileno())
+
+    def close(self):
+        if not self._eye_file.closed:
+            self.flush()
+            self._eye_file.close()
+            self._trials_file.close()
+
+    def remove(self):
+        """Close the log and delete its files"""
+        self.close()
+        for path in (self.eye_path, self.trials_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # ---- reading ----
+    def is_empty(self) -> bool:
+        """Nothing logged: no trials and no eye samples"""
+        return len(self) == 0 and len(self.trials()) == 0
+
+    def __len__(self) -> int:
+        """Eye samples on disk"""
+        return os.path.getsize(self.eye_path) // self.EYE_DTYPE.itemsize
+
+    def iter_eye_chunks(self, chunk_samples: int = 65536) -> Iterator[Dict[str, np.ndarray]]:
+        """The logged eye samples as EyeDataStore-style columns, chunk_samples at a time"""
+        count = len(self)
+        if count == 0:
+            return
+        records = np.memmap(self.eye_path, dtype=self.EYE_DTYPE, mode='r', shape=(count,))
+        for start in range(0, count, chunk_samples):
+            chunk = records[start:start + chunk_samples]
+            yield {name: np.asarray(chunk[name]) for name in self.EYE_DTYPE.names}
+
+    def trials(self) -> np.ndarray:
+        """The trials written so far as a memory-mapped trial_log.TRIAL_DTYPE array"""
+        return read_trials(self.trials_path)
+
+    def reaction_times(self) -> List[float]:
+        """Reaction times (ms) of all correct trials, in order"""
+        trials = self.trials()
+        return trials['rt_ms'][trials['outcome'] == CORRECT].astype(np.float64).tolist()
+
+class SpillingEyeDataStore(EyeDataStore):
+    """EyeDataStore that moves its samples to a SessionLog instead of growing
+
+    Memory stays at one chunk: when capacity is reached the samples are
+    appended to the log and the store starts over, so len() and the
+    columns cover only the samples since the last spill.
+    """
+
+    def __init__(self, log: SessionLog, chunk_samples: int = 1800):
+        super().__init__(chunk_samples)
+        self.log = log
+        self.spilled = 0
+
+    @property
+    def total(self) -> int:
+        """Samples recorded, on disk and in memory"""
+        return self.spilled + self._size
+
+    def _grow(self):
+        self.flush()
+
+    def flush(self):
+        """Append the in-memory samples to the log"""
+        if self._size:
+            self.log.append_eye_chunk({name: column[:self._size] for name, column in self._columns.items()})
+            self.spilled += self._size
+            self._size = 0
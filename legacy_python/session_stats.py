@@ -0,0 +1,166 @@
+"""
+Streaming Trial Statistics for PeriQuest
+Outcome counts and reaction-time aggregates per visual field or level, in typed arrays
+"""
+
+import math
+import numpy as np
+from typing import Hashable, Iterable, Optional, Dict, Any
+
+class TrialStats:
+    """Running per-group trial statistics that cost the same at any session length
+
+    Each group (a visual field, a level) is one row of parallel numpy
+    arrays: outcome counters, Welford count/mean/M2 and min/max of its
+    reaction times, and a quantile sketch. The sketch is a histogram of
+    logarithmic buckets RELATIVE_ACCURACY wide, so any quantile read from it
+    is within that relative error of the exact one. A trial updates a single
+    row; session-wide figures combine the rows, of which there are a
+    handful, so nothing ever walks the trial history. Groups not given up
+    front get a row on first use.
+    """
+
+    OUTCOMES = ('correct', 'missed', 'gaze_invalid')
+    RELATIVE_ACCURACY = 0.01
+    MIN_VALUE = 1.0  # ms; smaller reaction times share the first bucket
+    BUCKETS = 700  # up to ~20 minutes at 1% accuracy
+
+    _GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    _LOG_GAMMA = math.log(_GAMMA)
+
+    def __init__(self, groups: Iterable[Hashable] = ()):
+        self.rows: Dict[Hashable, int] = {}
+        self.counts = np.zeros((0, len(self.OUTCOMES)), dtype=np.int64)
+        self.rt_count = np.zeros(0, dtype=np.int64)
+        self.rt_mean = np.zeros(0, dtype=np.float64)
+        self.rt_m2 = np.zeros(0, dtype=np.float64)
+        self.rt_min = np.zeros(0, dtype=np.float64)
+        self.rt_max = np.zeros(0, dtype=np.float64)
+        self.histogram = np.zeros((0, self.BUCKETS), dtype=np.int64)
+        for group in groups:
+            self._row(group)
+
+    def _row(self, group: Hashable) -> int:
+        row = self.rows.get(group)
+        if row is None:
+            row = self.rows[group] = len(self.rows)
+            self.counts = np.vstack([self.counts, np.zeros((1, len(self.OUTCOMES)), dtype=np.int64)])
+            self.rt_count = np.append(self.rt_count, 0)
+            self.rt_mean = np.append(self.rt_mean, 0.0)
+            self.rt_m2 = np.append(self.rt_m2, 0.0)
+            self.rt_min = np.append(self.rt_min, np.inf)
+            self.rt_max = np.append(self.rt_max, -np.inf)
+            self.histogram = np.vstack([self.histogram, np.zeros((1, self.BUCKETS), dtype=np.int64)])
+        return row
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-serializable copy (the sketch as its non-empty buckets)"""
+        rows, buckets = np.nonzero(self.histogram)
+        return {
+            "groups": list(self.rows),
+            "counts": self.counts.tolist(),
+            "rt_count": self.rt_count.tolist(),
+            "rt_mean": self.rt_mean.tolist(),
+            "rt_m2": self.rt_m2.tolist(),
+            "rt_min": self.rt_min.tolist(),
+            "rt_max": self.rt_max.tolist(),
+            "histogram": [rows.tolist(), buckets.tolist(), self.histogram[rows, buckets].tolist()],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'TrialStats':
+        stats = cls(state["groups"])
+        stats.counts[:] = np.reshape(state["counts"], stats.counts.shape)
+        for name in ('rt_count', 'rt_mean', 'rt_m2', 'rt_min', 'rt_max'):
+            getattr(stats, name)[:] = state[name]
+        rows, buckets, counts = state["histogram"]
+        stats.histogram[rows, buckets] = counts
+        return stats
+
+    @classmethod
+    def _bucket(cls, value: float) -> int:
+        if value <= cls.MIN_VALUE:
+            return 0
+        return min(cls.BUCKETS - 1, math.ceil(math.log(value / cls.MIN_VALUE) / cls._LOG_GAMMA))
+
+    @classmethod
+    def _bucket_value(cls, bucket: int) -> float:
+        # Midpoint (in relative terms) of (gamma^(i-1), gamma^i]
+        return cls.MIN_VALUE * 2 * cls._GAMMA ** bucket / (cls._GAMMA + 1)
+
+    def record(self, group: Hashable, outcome: str, reaction_time_ms: Optional[float] = None):
+        """Count one trial outcome; reaction times add to the group's RT statistics"""
+        row = self._row(group)
+        self.counts[row, self.OUTCOMES.index(outcome)] += 1
+        if reaction_time_ms is None:
+            return
+        n = self.rt_count[row] + 1
+        delta = reaction_time_ms - self.rt_mean[row]
+        self.rt_count[row] = n
+        self.rt_mean[row] += delta / n
+        self.rt_m2[row] += delta * (reaction_time_ms - self.rt_mean[row])
+        self.rt_min[row] = min(self.rt_min[row], reaction_time_ms)
+        self.rt_max[row] = max(self.rt_max[row], reaction_time_ms)
+        self.histogram[row, self._bucket(reaction_time_ms)] += 1
+
+    # ---- queries (group=None combines all groups) ----
+    def count(self, outcome: str, group: Optional[Hashable] = None) -> int:
+        column = self.OUTCOMES.index(outcome)
+        if group is None:
+            return int(self.counts[:, column].sum())
+        return int(self.counts[self.rows[group], column]) if group in self.rows else 0
+
+    def total(self, group: Optional[Hashable] = None) -> int:
+        """Trials with any outcome"""
+        if group is None:
+            return int(self.counts.sum())
+        return int(self.counts[self.rows[group]].sum()) if group in self.rows else 0
+
+    def rt_samples(self, group: Optional[Hashable] = None) -> int:
+        if group is None:
+            return int(self.rt_count.sum())
+        return int(self.rt_count[self.rows[group]]) if group in self.rows else 0
+
+    def mean_rt(self, group: Optional[Hashable] = None) -> float:
+        """Mean reaction time (ms), 0 without any"""
+        n = self.rt_samples(group)
+        if n == 0:
+            return 0.0
+        if group is not None:
+            return float(self.rt_mean[self.rows[group]])
+        return float(np.dot(self.rt_count, self.rt_mean) / n)
+
+    def rt_variance(self, group: Optional[Hashable] = None) -> float:
+        """Population variance of reaction times (matches np.var)"""
+        n = self.rt_samples(group)
+        if n == 0:
+            return 0.0
+        if group is not None:
+            return float(self.rt_m2[self.rows[group]] / n)
+        # Chan et al.: within-group M2 plus the spread of the group means
+        mean = self.mean_rt()
+        m2 = self.rt_m2.sum() + np.dot(self.rt_count, (self.rt_mean - mean) ** 2)
+        return float(max(0.0, m2 / n))
+
+    def rt_std(self, group: Optional[Hashable] = None) -> float:
+        return math.sqrt(self.rt_variance(group))
+
+    def rt_range(self, group: Optional[Hashable] = None) -> Optional[tuple]:
+        """(min, max) reaction time, None without any"""
+        if self.rt_samples(group) == 0:
+            return None
+        if group is None:
+            return float(self.rt_min.min()), float(self.rt_max.max())
+        row = self.rows[group]
+        return float(self.rt_min[row]), float(self.rt_max[row])
+
+    def rt_quantile(self, q: float, group: Optional[Hashable] = None) -> float:
+        """Approximate reaction-time quantile (0 <= q <= 1), 0 without any"""
+        n = self.rt_samples(group)
+        if n == 0:
+            return 0.0
+        histogram = self.histogram.sum(axis=0) if group is None else self.histogram[self.rows[group]]
+        rank = q * (n - 1)
+        bucket = int(np.searchsorted(np.cumsum(histogram), rank, side='right'))
+        low, high = self.rt_range(group)
+        return min(high, max(low, self._bucket_value(bucket)))
@@ -7,15 +7,46 @@ import cv2
 import numpy as np
 import time
 import math
-import mediapipe as mp
 import os
+import json
+import threading
 from dataclasses import dataclass, field
 from typing import Tuple, Optional, List, Dict, Any
-from collections import deque
 
-# Import MediaPipe Tasks API
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
+from frame_sources import FrameSource, CameraSource, ThreadedCaptureSource
+from session_clock import SESSION_CLOCK
+from eye_events import FixationDetector, BlinkDetector, HeadMovementDetector
+from head_pose import HeadPoseEstimator, HeadPose
+from gaze_filters import create_gaze_filter
+from adaptive_rate import AdaptiveRateController
+
+# Import MediaPipe Tasks API (not needed for synthetic landmark sources)
+try:
+    import mediapipe as mp
+    from mediapipe.tasks import python
+    from mediapipe.tasks.python import vision
+    MEDIAPIPE_AVAILABLE = True
+except ImportError:
+    MEDIAPIPE_AVAILABLE = False
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def resolve_model_path(model_path: str = 'face_landmarker.task') -> str:
+    """Locate the model as given, next to this module, or in the repository root
+
+    The game used to find the model only when launched from the right
+    working directory; relative paths are now tried against the package too.
+    """
+    candidates = [model_path]
+    if not os.path.isabs(model_path):
+        candidates.append(os.path.join(PACKAGE_DIR, model_path))
+        candidates.append(os.path.join(os.path.dirname(PACKAGE_DIR), model_path))
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return os.path.abspath(candidate)
+    return model_path
+
+DEFAULT_MODEL_PATH = resolve_model_path()
 
 @dataclass
 class EyeData:
@@ -24,24 +55,131 @@ class EyeData:
     left_eye_center: Optional[Tuple[float, float]] = None
     right_eye_center: Optional[Tuple[float, float]] = None
     gaze_point: Optional[Tuple[float, float]] = None
+    raw_gaze_point: Optional[Tuple[float, float]] = None
     left_pupil_size: float = 0.0
     right_pupil_size: float = 0.0
+    pupil_diameter: Optional[float] = None  # iris width / inter-ocular distance, None while blinking
     is_fixating: bool = False
     blink_detected: bool = False
     head_turn_detected: bool = False
-    head_yaw: float = 0.0
+    head_yaw: float = 0.0  # degrees, see head_pose.HeadPose
+    head_pitch: float = 0.0
+    head_roll: float = 0.0
     head_position: Optional[Tuple[float, float]] = None
     
 @dataclass
 class GazeCalibration:
-    """Stores calibration data for gaze estimation"""
+    """Stores calibration data for gaze estimation
+
+    calibration_points are on-screen targets (normalized 0-1) and
+    gaze_mappings the raw iris offsets measured while looking at them.
+    fit() solves a least-squares polynomial mapping from offsets to screen
+    coordinates; apply() is then one small matrix product per frame.
+    """
     calibration_points: List[Tuple[float, float]] = field(default_factory=list)
     gaze_mappings: List[Tuple[float, float]] = field(default_factory=list)
     is_calibrated: bool = False
     calibration_matrix: Optional[np.ndarray] = None
+    
+    # Samples needed per polynomial term for a well-posed fit
+    MIN_SAMPLES_PER_TERM = 3
+    
+    def clear(self):
+        self.calibration_points.clear()
+        self.gaze_mappings.clear()
+        self.is_calibrated = False
+        self.calibration_matrix = None
+    
+    def add_sample(self, target: Tuple[float, float], raw_offset: Tuple[float, float]):
+        self.calibration_points.append(tuple(target))
+        self.gaze_mappings.append(tuple(raw_offset))
+    
+    @staticmethod
+    def _features(offsets: np.ndarray, terms: int) -> np.ndarray:
+        """Design matrix: affine [1, x, y] or quadratic [1, x, y, xy, x^2, y^2]"""
+        x, y = offsets[:, 0], offsets[:, 1]
+        columns = [np.ones_like(x), x, y]
+        if terms == 6:
+            columns += [x * y, x * x, y * y]
+        return np.stack(columns, axis=1)
+    
+    def fit(self) -> Optional[float]:
+        """Fit the mapping; returns RMS error in screen units, None if too few samples"""
+        n = len(self.gaze_mappings)
+        if n < 3 * self.MIN_SAMPLES_PER_TERM:
+            return None
+        
+        terms = 6 if n >= 6 * self.MIN_SAMPLES_PER_TERM else 3
+        offsets = np.asarray(self.gaze_mappings, dtype=np.float64)
+        targets = np.asarray(self.calibration_points, dtype=np.float64)
+        features = self._features(offsets, terms)
+        matrix, _, rank, _ = np.linalg.lstsq(features, targets, rcond=None)
+        if rank < terms:
+            return None
+        
+        self.calibration_matrix = matrix
+        self.is_calibrated = True
+        residual = features @ matrix - targets
+        return float(np.sqrt(np.mean(np.sum(residual ** 2, axis=1))))
+    
+    def apply(self, raw_x: float, raw_y: float) -> Tuple[float, float]:
+        """Map a raw iris offset to normalized screen coordinates"""
+        m = self.calibration_matrix
+        if m.shape[0] == 6:
+            features = (1.0, raw_x, raw_y, raw_x * raw_y, raw_x * raw_x, raw_y * raw_y)
+        else:
+            features = (1.0, raw_x, raw_y)
+        gaze_x, gaze_y = np.dot(features, m)
+        return float(gaze_x), float(gaze_y)
+    
+    def save(self, path: str):
+        if not self.is_calibrated:
+            return
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "calibration_points": self.calibration_points,
+                "gaze_mappings": self.gaze_mappings,
+                "calibration_matrix": self.calibration_matrix.tolist(),
+            }, f)
+    
+    @classmethod
+    def load(cls, path: str) -> Optional['GazeCalibration']:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(
+                calibration_points=[tuple(p) for p in data["calibration_points"]],
+                gaze_mappings=[tuple(p) for p in data["gaze_mappings"]],
+                is_calibrated=True,
+                calibration_matrix=np.asarray(data["calibration_matrix"], dtype=np.float64),
+            )
+        except (OSError, ValueError, KeyError) as e:
+            print(f"✗ Could not load calibration {path}: {e}")
+            return None
 
 class EnhancedEyeTracker:
-    """Advanced eye tracking with MediaPipe Tasks API (FaceLandmarker)"""
+    """Advanced eye tracking with MediaPipe Tasks API (FaceLandmarker)
+
+    With lazy=True the constructor returns immediately; call
+    start_background_init() to load the model, open the source and run a
+    warm-up inference on a worker thread, and poll `status` until it is
+    'ready' (or 'failed') before reading eye data.
+
+    With threaded_capture=True the default camera is read on its own
+    thread (see ThreadedCaptureSource): frames are stamped at capture and
+    get_eye_data returns None instead of blocking when no new frame is in.
+    """
+    
+    # Initialization states reported by `status`
+    STATUS_NOT_STARTED = 'not_started'
+    STATUS_LOADING_MODEL = 'loading_model'
+    STATUS_OPENING_CAMERA = 'opening_camera'
+    STATUS_WARMING_UP = 'warming_up'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
     
     # Eye landmark indices from MediaPipe Face Mesh
     # These indices remain consistent in the new model
@@ -50,33 +188,70 @@ class EnhancedEyeTracker:
     LEFT_IRIS_INDICES = [468, 469, 470, 471, 472]
     RIGHT_IRIS_INDICES = [473, 474, 475, 476, 477]
     
-    def __init__(self, camera_id: int = 0):
+    def __init__(self, camera_id: int = 0, source: Optional[FrameSource] = None,
+                 model_path: str = DEFAULT_MODEL_PATH, fixation_algorithm: str = 'ivt',
+                 gaze_filter: str = 'one_euro', gaze_filter_params: Optional[Dict[str, float]] = None,
+                 prediction_time: float = 0.0, latency_budget_ms: Optional[float] = None,
+                 lazy: bool = False, threaded_capture: bool = False):
         self.camera_id = camera_id
-        self.cap = None
+        self.source = source
+        self.threaded_capture = threaded_capture
+        self.model_path = resolve_model_path(model_path)
         self.landmarker = None
         self.use_mediapipe = False
         self.current_frame = None
         self.start_time = time.time() * 1000
+        self.last_frame_timestamp_ms = -1
+        self.end_of_source = False
+        self.frame_count = 0
         
         # Calibration
         self.calibration = GazeCalibration()
+        self.calibration_dir = 'calibrations'
+        self.last_raw_gaze: Optional[Tuple[float, float]] = None
+        
+        # Temporal smoothing of gaze_point; prediction_time (s) extrapolates
+        # the smoothed gaze forward to hide pipeline latency
+        self.gaze_filter = create_gaze_filter(gaze_filter, **(gaze_filter_params or {}))
+        self.prediction_time = prediction_time
+        
+        # Optional load-adaptive operating point (capture size, frame skip, landmarker input size)
+        self.rate_controller = AdaptiveRateController(latency_budget_ms) if latency_budget_ms else None
+        
+        # Most recent sample (session history is kept by the game's EyeDataStore)
+        self.last_eye_data: Optional[EyeData] = None
         
-        # Eye movement history
-        self.eye_data_history = deque(maxlen=300)
-        self.gaze_history = deque(maxlen=30)
+        # Fixation/saccade detection (event lists are shared with the detector)
+        self.fixation_detector = FixationDetector(algorithm=fixation_algorithm)
+        self.fixations = self.fixation_detector.fixations
+        self.saccades = self.fixation_detector.saccades
         
-        # Fixation detection parameters
-        self.fixation_threshold = 0.05
-        self.total_blinks = 0
-        self.saccades = []
+        # Debounced blink events
+        self.blink_detector = BlinkDetector()
+        self.blinks = self.blink_detector.blinks
+        
+        # Head pose and debounced head movement events
+        self.head_pose_estimator = HeadPoseEstimator()
+        self.head_movement_detector = HeadMovementDetector()
+        self.head_movements = self.head_movement_detector.movements
+        
+        # Readiness for lazy/background initialization
+        self.status = self.STATUS_NOT_STARTED
+        self.status_message = ""
+        self._init_thread: Optional[threading.Thread] = None
         
         # Initialize MediaPipe Tasks
-        self._initialize_mediapipe_tasks()
+        if not lazy:
+            self._initialize_mediapipe_tasks()
         
     def _initialize_mediapipe_tasks(self):
         """Initialize MediaPipe Face Landmarker using Tasks API"""
-        model_path = 'face_landmarker.task'
+        model_path = self.model_path
         
+        if not MEDIAPIPE_AVAILABLE:
+            print("✗ MediaPipe not installed; only landmark sources can be tracked.")
+            return
+
         if not os.path.exists(model_path):
             print(f"✗ Model file {model_path} not found.")
             print("  Please run download_model.py first.")
@@ -91,7 +266,8 @@ class EnhancedEyeTracker:
                 min_face_detection_confidence=0.5,
                 min_face_presence_confidence=0.5,
                 min_tracking_confidence=0.5,
-                output_face_blendshapes=True)
+                output_face_blendshapes=True,
+                output_facial_transformation_matrixes=True)
             
             self.landmarker = vision.FaceLandmarker.create_from_options(options)
             self.use_mediapipe = True
@@ -101,80 +277,156 @@ class EnhancedEyeTracker:
             print(f"✗ Error initializing MediaPipe Tasks: {e}")
             self.use_mediapipe = False
     
-    def initialize_camera(self) -> bool:
-        """Initialize camera"""
+    def start_background_init(self, warm_up: bool = True):
+        """Load the model, open the source and warm up on a background thread"""
+        if self._init_thread is not None:
+            return
+        self._init_thread = threading.Thread(target=self._background_init, args=(warm_up,),
+                                             name="eye-tracker-init", daemon=True)
+        self._init_thread.start()
+
+    def _set_status(self, status: str, message: str = ""):
+        self.status = status
+        self.status_message = message
+
+    def _background_init(self, warm_up: bool):
         try:
-            self.cap = cv2.VideoCapture(self.camera_id)
-            if not self.cap.isOpened():
-                for cam_id in [1, 2, 3]:
-                    self.cap = cv2.VideoCapture(cam_id)
-                    if self.cap.isOpened():
-                        self.camera_id = cam_id
-                        break
+            if self.landmarker is None:
+                self._set_status(self.STATUS_LOADING_MODEL, "Loading face model")
+                self._initialize_mediapipe_tasks()
             
-            if not self.cap.isOpened():
-                print("✗ No camera found")
-                return False
+            self._set_status(self.STATUS_OPENING_CAMERA, "Opening camera")
+            if not self.initialize_camera():
+                self._set_status(self.STATUS_FAILED, "No camera found")
+                return
+            if not self.use_mediapipe and not self.source.provides_landmarks:
+                self._set_status(self.STATUS_FAILED, "Face model unavailable")
+                return
             
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.cap.set(cv2.CAP_PROP_FPS, 30)
-            print(f"✓ Camera {self.camera_id} initialized")
-            return True
+            if warm_up and self.use_mediapipe:
+                # The first inference pays for graph and delegate setup; do it now
+                self._set_status(self.STATUS_WARMING_UP, "Warming up")
+                self.get_eye_data()
+            self._set_status(self.STATUS_READY, "Ready")
         except Exception as e:
-            print(f"✗ Camera initialization error: {e}")
+            self._set_status(self.STATUS_FAILED, str(e))
+
+    @property
+    def is_initializing(self) -> bool:
+        return self.status not in (self.STATUS_NOT_STARTED, self.STATUS_READY, self.STATUS_FAILED)
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until background initialization ends; True if ready"""
+        if self._init_thread is not None:
+            self._init_thread.join(timeout)
+        return self.status == self.STATUS_READY
+
+    def initialize_camera(self) -> bool:
+        """Open the frame source (live camera unless a source was supplied)"""
+        if self.source is None:
+            self.source = CameraSource(self.camera_id)
+            if self.threaded_capture:
+                self.source = ThreadedCaptureSource(self.source)
+        
+        if not self.source.open():
             return False
+        
+        if isinstance(self.source, (CameraSource, ThreadedCaptureSource)):
+            self.camera_id = self.source.camera_id
+        return True
             
     def get_eye_data(self) -> Optional[EyeData]:
         """Get current eye tracking data"""
-        if not self.cap:
+        if not self.source:
+            return None
+        
+        frame = self.source.read()
+        if frame is None:
+            # Recorded sources return None once exhausted; cameras on a dropped frame
+            self.end_of_source = not self.source.is_live
             return None
         
-        ret, frame = self.cap.read()
-        if not ret:
+        self.current_frame = frame.image
+        self.frame_count += 1
+        controller = self.rate_controller
+        if controller and not controller.should_process():
             return None
         
-        self.current_frame = frame
-        return self._process_frame(frame)
+        started = time.perf_counter()
+        if frame.landmarks is not None:
+            # Synthetic/pre-computed landmarks skip the landmarker entirely
+            eye_data = self._process_landmarks(frame.landmarks, frame.blendshapes, frame.timestamp)
+        else:
+            eye_data = self._process_frame(frame.image, frame.timestamp)
+        
+        if controller and controller.record((time.perf_counter() - started) * 1000, frame.timestamp):
+            self._apply_operating_point()
+        return eye_data
+
+    def _apply_operating_point(self):
+        point = self.rate_controller.operating_point
+        if hasattr(self.source, 'set_resolution'):
+            self.source.set_resolution(*point.capture_size)
+        print(f"⚙ Tracking operating point: {point.describe(self._camera_fps)}")
+
+    @property
+    def _camera_fps(self) -> float:
+        return getattr(self.source, 'fps', None) or 30.0
+
+    @property
+    def tracking_status(self) -> Optional[Dict[str, Any]]:
+        """Current adaptive operating point, None without a latency budget"""
+        if not self.rate_controller:
+            return None
+        return self.rate_controller.status(self._camera_fps)
 
     def get_current_frame(self):
         return self.current_frame
 
-    def _process_frame(self, frame) -> Optional[EyeData]:
+    def _process_frame(self, frame, timestamp: Optional[float] = None) -> Optional[EyeData]:
         """Process frame using Face Landmarker"""
         if not self.use_mediapipe or not self.landmarker:
             return None
         
-        timestamp = time.time()
+        if timestamp is None:
+            timestamp = SESSION_CLOCK.now()
+        self.head_pose_estimator.set_image_size((frame.shape[1], frame.shape[0]))
+        if self.rate_controller and self.rate_controller.operating_point.input_scale < 1.0:
+            # Landmarks are normalized, so a smaller landmarker input needs no rescaling after
+            scale = self.rate_controller.operating_point.input_scale
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        result = self._detect_landmarks(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), timestamp)
+        if result is None or not result.face_landmarks:
+            return None
+        
+        # We only asked for 1 face
+        blendshapes = result.face_blendshapes[0] if result.face_blendshapes else None
+        matrixes = getattr(result, 'facial_transformation_matrixes', None)
+        return self._process_landmarks(result.face_landmarks[0], blendshapes, timestamp,
+                                       matrixes[0] if matrixes else None)
+
+    def _detect_landmarks(self, rgb_frame, timestamp: float):
+        """Run the Face Landmarker on an RGB frame; None on detector errors"""
         # MediaPipe Tasks requires MP Image
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
         
-        # Determine timestamp in ms 
+        # Determine timestamp in ms from the frame's own timestamp
         # (This should be strictly increasing for VIDEO mode)
-        frame_timestamp_ms = int((time.time() * 1000))
+        frame_timestamp_ms = max(int(timestamp * 1000), self.last_frame_timestamp_ms + 1)
+        self.last_frame_timestamp_ms = frame_timestamp_ms
         
         try:
-            result = self.landmarker.detect_for_video(mp_image, frame_timestamp_ms)
+            return self.landmarker.detect_for_video(mp_image, frame_timestamp_ms)
         except Exception as e:
             # Handle out of order timestamps or other errors
             # print(f"Detection error: {e}")
             return None
-        
-        if not result.face_landmarks:
-            return None
-        
-        # We only asked for 1 face
-        landmarks = result.face_landmarks[0]
-        
-        # --- Extract Data (same logic as before, just adapting object structure) ---
+
+    def _process_landmarks(self, landmarks, blendshapes, timestamp: float,
+                           transformation_matrix=None) -> EyeData:
+        """Turn one face's landmarks (and optional blendshapes/pose matrix) into EyeData"""
         eye_data = EyeData(timestamp=timestamp)
-        h, w = frame.shape[:2]
         
-        # Helper to get normalized point
-        def get_point(idx):
-            lm = landmarks[idx]
-            return lm # Has x, y, z
-            
         def get_center_normalized(indices):
             xs = [landmarks[i].x for i in indices]
             ys = [landmarks[i].y for i in indices]
@@ -188,7 +440,7 @@ class EnhancedEyeTracker:
             left_iris_center = get_center_normalized(self.LEFT_IRIS_INDICES)
             right_iris_center = get_center_normalized(self.RIGHT_IRIS_INDICES)
             
-            eye_data.gaze_point = self._estimate_gaze(
+            eye_data.raw_gaze_point = self._estimate_gaze(
                 eye_data.left_eye_center, eye_data.right_eye_center,
                 left_iris_center, right_iris_center
             )
@@ -197,75 +449,112 @@ class EnhancedEyeTracker:
             eye_data.left_pupil_size = self._estimate_pupil_size([landmarks[i] for i in self.LEFT_IRIS_INDICES])
             eye_data.right_pupil_size = self._estimate_pupil_size([landmarks[i] for i in self.RIGHT_IRIS_INDICES])
 
+        eye_data.gaze_point = self._smooth_gaze(eye_data.raw_gaze_point, timestamp)
+
         # Blink Detection using Blendshapes if available (more accurate!)
-        if result.face_blendshapes:
+        if blendshapes:
             # Index for eye blink blendshapes usually:
             # These are category_name="eyeBlinkLeft", etc.
             # But let's stick to EAR for consistency or use blendshapes if better.
             # Blendshapes are easier if we iterate them.
-            blendshapes = result.face_blendshapes[0]
             # Search for blink scores
             left_blink = next((c.score for c in blendshapes if c.category_name == 'eyeBlinkLeft'), 0)
             right_blink = next((c.score for c in blendshapes if c.category_name == 'eyeBlinkRight'), 0)
             
-            if left_blink > 0.5 or right_blink > 0.5:
-                eye_data.blink_detected = True
-                self.total_blinks += 1
+            # Per-frame flag is the debounced eyes-closed state; events count blinks
+            eye_data.blink_detected = self.blink_detector.update(timestamp, left_blink, right_blink)
+        
+        if len(landmarks) > 470 and not eye_data.blink_detected:
+            eye_data.pupil_diameter = self._estimate_pupil_diameter(
+                landmarks, eye_data.left_eye_center, eye_data.right_eye_center)
         
         # Fixation detection
-        eye_data.is_fixating = self._detect_fixation(eye_data.gaze_point)
+        eye_data.is_fixating = self._detect_fixation(eye_data.gaze_point, timestamp)
         
-        # Head turn detection using geometry (Nose tip: 1, Left ear: 234, Right ear: 454)
         nose = landmarks[1]
-        left_ear = landmarks[234] 
-        right_ear = landmarks[454]
-        
-        # Calculate horizontal distance ratio
-        # Ensure we don't divide by zero
-        d_left = abs(nose.x - left_ear.x)
-        d_right = abs(nose.x - right_ear.x)
-        
-        # head_turn_ratio: 1.0 is straight. 
-        # If turned right, d_left (mirror) or actual distance changes.
-        head_turn_ratio = d_left / (d_right + 1e-6)
-        
-        # Map ratio to a 'yaw score' roughly -1.0 to 1.0 for UI display
-        # Ratio around 1.0 -> 0.0
-        # Ratio > 2.0 or < 0.5 is significant
-        if head_turn_ratio > 1.0:
-            head_yaw_score = min(1.0, (head_turn_ratio - 1.0))
-        else:
-            head_yaw_score = max(-1.0, -(1.0 / (head_turn_ratio + 1e-6) - 1.0))
-        
-        significant_yaw_threshold = 0.3 # Adjusted threshold for geometric ratio
-        is_turning_head = abs(head_yaw_score) > significant_yaw_threshold
-        
         eye_data.head_position = (nose.x, nose.y)
-        eye_data.head_turn_detected = is_turning_head
-        eye_data.head_yaw = head_yaw_score
         
-        # If head is turned significantly, mark as NOT fixating regardless of gaze
-        if is_turning_head:
+        pose = self._estimate_head_pose(landmarks, transformation_matrix)
+        if pose is not None:
+            eye_data.head_yaw, eye_data.head_pitch, eye_data.head_roll = pose.yaw, pose.pitch, pose.roll
+            eye_data.head_turn_detected = self.head_movement_detector.update(timestamp, pose.yaw, pose.pitch)
+        
+        # If the head is moved away from neutral, mark as NOT fixating regardless of gaze
+        if eye_data.head_turn_detected:
             eye_data.is_fixating = False
             
-        # History
-        self.eye_data_history.append(eye_data)
-        if eye_data.gaze_point:
-            self.gaze_history.append(eye_data.gaze_point)
+        self.last_eye_data = eye_data
             
         return eye_data
 
+    def _estimate_head_pose(self, landmarks, transformation_matrix=None) -> Optional[HeadPose]:
+        """Head pose from the landmarker's matrix, else a solvePnP fit"""
+        if transformation_matrix is not None:
+            return HeadPoseEstimator.from_matrix(transformation_matrix)
+        return self.head_pose_estimator.from_landmarks(landmarks)
+
     # --- Helper methods (Reused) ---
     def _estimate_gaze(self, left_eye, right_eye, left_iris, right_iris):
         if not all([left_eye, right_eye, left_iris, right_iris]): return None
-        # Same simple logic
+        # Raw gaze: mean iris offset from the eye centers
         lx, ly = left_iris[0] - left_eye[0], left_iris[1] - left_eye[1]
         rx, ry = right_iris[0] - right_eye[0], right_iris[1] - right_eye[1]
         avg_x, avg_y = (lx + rx)/2, (ly + ry)/2
-        gaze_x = 0.5 + avg_x * 5
-        gaze_y = 0.5 + avg_y * 10 # Increase sensitivity
+        self.last_raw_gaze = (avg_x, avg_y)
+        
+        if self.calibration.is_calibrated:
+            gaze_x, gaze_y = self.calibration.apply(avg_x, avg_y)
+        else:
+            gaze_x = 0.5 + avg_x * 5
+            gaze_y = 0.5 + avg_y * 10 # Increase sensitivity
+        return (max(0, min(1, gaze_x)), max(0, min(1, gaze_y)))
+
+    def _smooth_gaze(self, raw_gaze, timestamp: float):
+        if raw_gaze is None:
+            # Don't smooth across tracking gaps
+            self.gaze_filter.reset()
+            return None
+        gaze_x, gaze_y = self.gaze_filter.filter(timestamp, raw_gaze)
+        if self.prediction_time > 0:
+            gaze_x, gaze_y = self.gaze_filter.predict(self.prediction_time)
         return (max(0, min(1, gaze_x)), max(0, min(1, gaze_y)))
 
+    # --- Calibration ---
+    def start_calibration(self):
+        """Discard the current mapping and start collecting samples"""
+        self.calibration.clear()
+
+    def add_calibration_sample(self, target: Tuple[float, float]) -> bool:
+        """Pair the latest raw gaze with the on-screen target being shown"""
+        if self.last_raw_gaze is None:
+            return False
+        self.calibration.add_sample(target, self.last_raw_gaze)
+        return True
+
+    def finish_calibration(self) -> Optional[float]:
+        """Fit the mapping from collected samples; returns RMS error or None"""
+        error = self.calibration.fit()
+        if error is None:
+            print("✗ Calibration failed: not enough gaze samples")
+        else:
+            print(f"✓ Gaze calibrated ({len(self.calibration.gaze_mappings)} samples, RMS error {error:.3f})")
+        return error
+
+    def _calibration_path(self, patient_id: str) -> str:
+        return os.path.join(self.calibration_dir, f"calibration_{patient_id}.json")
+
+    def save_calibration(self, patient_id: str):
+        self.calibration.save(self._calibration_path(patient_id))
+
+    def load_calibration(self, patient_id: str) -> bool:
+        """Load a patient's saved calibration; False if none exists"""
+        calibration = GazeCalibration.load(self._calibration_path(patient_id))
+        if calibration is None:
+            return False
+        self.calibration = calibration
+        print(f"✓ Loaded gaze calibration for {patient_id}")
+        return True
+
     def _estimate_pupil_size(self, iris_points):
         # Calculate diameter
         # Normalized units
@@ -274,14 +563,44 @@ class EnhancedEyeTracker:
         dy = iris_points[2].y - iris_points[4].y # Height approximation
         return math.sqrt(dx*dx + dy*dy)
 
-    def _detect_fixation(self, gaze_point):
-        if not gaze_point or len(self.gaze_history) < 5: return False
-        recent = list(self.gaze_history)[-5:]
-        x_var = np.var([p[0] for p in recent])
-        y_var = np.var([p[1] for p in recent])
-        return (x_var + y_var) < self.fixation_threshold
+    def _estimate_pupil_diameter(self, landmarks, left_eye, right_eye) -> Optional[float]:
+        """Mean horizontal iris width normalized by inter-ocular distance
+
+        The ratio cancels viewing distance and image scale, so it is
+        comparable across frames and sessions.
+        """
+        interocular = math.hypot(right_eye[0] - left_eye[0], right_eye[1] - left_eye[1])
+        if interocular <= 0:
+            return None
+        left = landmarks[self.LEFT_IRIS_INDICES[1]], landmarks[self.LEFT_IRIS_INDICES[3]]
+        right = landmarks[self.RIGHT_IRIS_INDICES[1]], landmarks[self.RIGHT_IRIS_INDICES[3]]
+        left_width = math.hypot(left[0].x - left[1].x, left[0].y - left[1].y)
+        right_width = math.hypot(right[0].x - right[1].x, right[0].y - right[1].y)
+        return (left_width + right_width) / 2 / interocular
+
+    def _detect_fixation(self, gaze_point, timestamp: float) -> bool:
+        return self.fixation_detector.update(timestamp, gaze_point)
+
+    @property
+    def total_blinks(self) -> int:
+        return len(self.blinks)
+
+    @property
+    def blink_rate(self) -> float:
+        """Blinks per minute over the last minute"""
+        return self.blink_detector.blink_rate
+
+    def set_fixation_algorithm(self, algorithm: str):
+        """Switch between 'ivt' (velocity) and 'idt' (dispersion) classification"""
+        self.fixation_detector.set_algorithm(algorithm)
 
     def release(self):
-        if self.cap: self.cap.release()
+        self.fixation_detector.finish()
+        self.blink_detector.finish()
+        self.head_movement_detector.finish()
+        if self.source: self.source.release()
         if self.landmarker: self.landmarker.close()
-        cv2.destroyAllWindows()
+        try:
+            cv2.destroyAllWindows()
+        except cv2.error:
+            pass  # Headless OpenCV builds have no GUI backend
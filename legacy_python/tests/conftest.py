@@ -0,0 +1,8 @@
+"""
+Test setup for PeriQuest: the modules are imported flat, as the game does
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
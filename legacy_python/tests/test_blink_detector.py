@@ -0,0 +1,115 @@
+"""
+Regression tests for debounced blink detection
+"""
+
+import pytest
+
+from eye_events import BlinkDetector
+from frame_sources import SyntheticLandmarkSource
+
+FPS = 30
+OPEN, CLOSED = 0.05, 0.9
+
+def feed(detector: BlinkDetector, scores, start: float = 0.0) -> float:
+    """Feed (left, right) score pairs at FPS; returns the time after the last frame"""
+    t = start
+    for left, right in scores:
+        detector.update(t, left, right)
+        t += 1 / FPS
+    return t
+
+def closure(seconds: float, left: float = CLOSED, right: float = CLOSED):
+    """Open eyes, a closure lasting seconds (rounded to whole frames), open eyes"""
+    frames = max(1, round(seconds * FPS))
+    return [(OPEN, OPEN)] * 10 + [(left, right)] * frames + [(OPEN, OPEN)] * 10
+
+def test_short_closure_is_one_blink():
+    detector = BlinkDetector()
+    feed(detector, closure(0.150))
+    assert len(detector.blinks) == 1
+    blink = detector.blinks[0]
+    assert blink.eye == 'both'
+    assert blink.duration == pytest.approx(0.150, abs=1.5 / FPS)
+
+def test_flicker_is_not_a_blink():
+    detector = BlinkDetector()
+    feed(detector, closure(0.030))
+    assert detector.blinks == []
+
+def test_long_closure_is_not_a_blink():
+    detector = BlinkDetector()
+    feed(detector, closure(0.6))
+    assert detector.blinks == []
+
+def test_duration_limits():
+    # 2 frames (67 ms) is above min_duration, 14 (0.47 s) below and 16 (0.53 s) above max_duration
+    for frames, expected in ((1, 0), (2, 1), (14, 1), (16, 0)):
+        detector = BlinkDetector()
+        feed(detector, closure(frames / FPS))
+        assert len(detector.blinks) == expected, f"{frames} closed frames"
+
+def test_hysteresis_holds_a_noisy_closure_together():
+    # Scores dipping between the thresholds while closed don't split the blink
+    detector = BlinkDetector()
+    noisy = [(0.6, 0.6), (0.4, 0.4), (0.7, 0.7), (0.38, 0.38), (0.6, 0.6)]
+    feed(detector, [(OPEN, OPEN)] * 5 + noisy + [(OPEN, OPEN)] * 5)
+    assert len(detector.blinks) == 1
+
+def test_scores_below_close_threshold_never_close():
+    detector = BlinkDetector()
+    feed(detector, [(0.45, 0.45), (0.2, 0.2)] * 30)
+    assert not detector.left_closed and not detector.right_closed
+    assert detector.blinks == []
+
+def test_one_eye_blinks_are_labelled():
+    detector = BlinkDetector()
+    t = feed(detector, closure(0.15, right=OPEN))
+    feed(detector, closure(0.15, left=OPEN), start=t)
+    assert [blink.eye for blink in detector.blinks] == ['left', 'right']
+
+def test_staggered_eyes_are_one_blink():
+    # Left closes first, right reopens last: one blink spanning both
+    detector = BlinkDetector()
+    staggered = [(CLOSED, OPEN)] + [(CLOSED, CLOSED)] * 3 + [(OPEN, CLOSED)]
+    feed(detector, [(OPEN, OPEN)] * 5 + staggered + [(OPEN, OPEN)] * 5)
+    assert len(detector.blinks) == 1
+    assert detector.blinks[0].eye == 'both'
+    assert detector.blinks[0].duration == pytest.approx(5 / FPS)
+
+def test_blink_in_progress_is_closed_by_finish():
+    detector = BlinkDetector()
+    feed(detector, [(OPEN, OPEN)] * 5 + [(CLOSED, CLOSED)] * 5)
+    assert detector.is_blinking and detector.blinks == []
+    detector.finish()
+    assert len(detector.blinks) == 1 and not detector.is_blinking
+
+def test_rolling_blink_rate():
+    # One blink every 4 s for a minute, then a minute with none
+    detector = BlinkDetector()
+    t = 0.0
+    for _ in range(15):
+        t = feed(detector, [(OPEN, OPEN)] * (4 * FPS - 5) + [(CLOSED, CLOSED)] * 5, start=t)
+    assert len(detector.blinks) == 14  # the last closure hasn't reopened yet
+    t = feed(detector, [(OPEN, OPEN)], start=t)
+    assert detector.blink_rate == pytest.approx(15.0, rel=0.05)
+    feed(detector, [(OPEN, OPEN)] * (61 * FPS), start=t)
+    assert len(detector.blinks) == 15
+    assert detector.blink_rate == 0.0
+
+def test_synthetic_blinks_match_ground_truth():
+    source = SyntheticLandmarkSource(duration=120, seed=1)
+    source.open()
+    detector = BlinkDetector()
+    episodes, was_blinking = 0, False
+    while True:
+        frame = source.read()
+        if frame is None:
+            break
+        scores = {category.category_name: category.score for category in frame.blendshapes}
+        detector.update(frame.timestamp, scores['eyeBlinkLeft'], scores['eyeBlinkRight'])
+        blinking = frame.ground_truth["blinking"]
+        episodes += blinking and not was_blinking
+        was_blinking = blinking
+    detector.finish()
+    assert episodes > 15
+    assert len(detector.blinks) == episodes
@@ -0,0 +1,122 @@
+"""
+Regression tests for streaming fixation detection against the ground truth
+of SyntheticLandmarkSource
+"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from eye_events import FixationDetector, SlidingWindowStats
+from frame_sources import SyntheticLandmarkSource
+
+FRAME = 1 / 30
+
+def run_synthetic(algorithm: str, seed: int, duration: float = 120.0):
+    """Feed the scripted gaze through a detector; (detector, ground-truth fixations)
+
+    Every saccade goes to a random peripheral target, so fixations are
+    separated by real gaze shifts. Ground-truth fixations are
+    (start, end, centroid) over the runs of frames marked is_fixating.
+    """
+    source = SyntheticLandmarkSource(duration=duration, seed=seed, peripheral_saccade_probability=1.0)
+    source.open()
+    detector = FixationDetector(algorithm)
+    truth, points, start, previous = [], [], None, None
+    while True:
+        frame = source.read()
+        if frame is None:
+            break
+        gaze = frame.ground_truth["gaze_point"]
+        detector.update(frame.timestamp, gaze)
+        if frame.ground_truth["is_fixating"]:
+            if start is None:
+                start, points = frame.timestamp, []
+            points.append(gaze)
+        elif start is not None:
+            truth.append((start, previous, np.mean(points, axis=0)))
+            start = None
+        previous = frame.timestamp
+    if start is not None:
+        truth.append((start, previous, np.mean(points, axis=0)))
+    detector.finish()
+    return detector, truth
+
+def distinct_fixations(truth, min_duration: float = 0.4, min_amplitude: float = 0.1):
+    """Ground-truth fixations long enough for either algorithm and well apart from their neighbours
+
+    Random targets sometimes land close together; the saccade between them
+    is then too slow to separate the fixations, in the data as for a patient.
+    """
+    distinct = []
+    for before, fixation, after in zip(truth, truth[1:], truth[2:]):
+        start, end, centroid = fixation
+        if end - start < min_duration:
+            continue
+        if min(math.dist(before[2], centroid), math.dist(after[2], centroid)) < min_amplitude:
+            continue
+        distinct.append(fixation)
+    return distinct
+
+@pytest.mark.parametrize("algorithm", FixationDetector.ALGORITHMS)
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_fixations_match_ground_truth(algorithm, seed):
+    detector, truth = run_synthetic(algorithm, seed)
+
+    # Merged neighbours and sub-window fixations may be lost, nothing is invented
+    assert 0.9 * len(truth) <= len(detector.fixations) <= len(truth)
+    assert len(detector.saccades) == len(detector.fixations) - 1
+
+    expected = distinct_fixations(truth)
+    assert len(expected) > 50
+    for start, end, centroid in expected:
+        matches = [f for f in detector.fixations if f.start_time <= end and f.end_time >= start]
+        assert len(matches) == 1, f"fixation {start:.2f}-{end:.2f}s detected as {len(matches)}"
+        fixation = matches[0]
+        # Onset waits for the velocity/dispersion window; the end is at most a couple of frames late
+        assert 0 <= fixation.start_time - start <= 4 * FRAME + 1e-9
+        assert 0 <= fixation.end_time - end <= 2 * FRAME + 1e-9
+        assert fixation.duration == pytest.approx(end - start, abs=5 * FRAME)
+        assert math.dist((fixation.x, fixation.y), centroid) < 0.01
+
+def test_total_fixation_time_matches_ground_truth():
+    detector, truth = run_synthetic('ivt', seed=4)
+    detected = sum(f.duration for f in detector.fixations)
+    expected = sum(end - start for start, end, _ in truth)
+    assert detected == pytest.approx(expected, rel=0.1)
+
+def test_lost_tracking_closes_fixation():
+    detector = FixationDetector('ivt')
+    for i in range(15):
+        detector.update(i * FRAME, (0.5, 0.5))
+    assert detector.is_fixating
+    detector.update(15 * FRAME, None)
+    assert not detector.is_fixating
+    assert len(detector.fixations) == 1
+    # I-VT needs a velocity, so the first sample can't be classified yet
+    assert detector.fixations[0].sample_count == 14
+
+@pytest.mark.parametrize("size", [1, 3, 5, 30])
+def test_sliding_window_stats_match_numpy(size):
+    rng = random.Random(size)
+    stats = SlidingWindowStats(size)
+    values = []
+    for _ in range(500):
+        value = rng.gauss(0.5, 0.1) if rng.random() < 0.9 else rng.uniform(-5, 5)
+        stats.push(value)
+        values.append(value)
+        window = np.array(values[-size:])
+        assert len(stats) == len(window)
+        assert stats.mean == pytest.approx(window.mean(), abs=1e-9)
+        assert stats.variance == pytest.approx(window.var(), abs=1e-9)
+
+def test_sliding_window_stats_clear():
+    stats = SlidingWindowStats(3)
+    for value in (1.0, 2.0, 3.0, 4.0):
+        stats.push(value)
+    stats.clear()
+    assert len(stats) == 0 and stats.variance == 0.0
+    stats.push(7.0)
+    assert stats.mean == 7.0 and stats.variance == 0.0
@@ -0,0 +1,638 @@
+"""
+Multi-Station Eye Tracking Server for PeriQuest
+One tracking process per camera, EyeData streams published over local IPC
+
+Each station runs capture, FaceLandmarker inference and post-processing in
+its own process, so N stations use N cores. A hub in the server process
+forwards every station's stream to the game clients subscribed to it.
+
+Clients authenticate with a random key generated for each server run and
+stored, readable only by the user running the server, in a private
+runtime directory next to the socket (or taken from PERIQUEST_TRACKING_KEY).
+Client requests are JSON, so nothing a client sends is ever unpickled.
+
+Usage:
+    python tracking_server.py --station bay1=0 --station bay2=1
+    python tracking_server.py --station demo=synthetic --station replay=session.mp4
+
+    # In a game process
+    python periquest_enhanced.py --station bay1
+"""
+
+import os
+import sys
+import json
+import math
+import stat
+import time
+import pickle
+import hashlib
+import struct
+import tempfile
+import argparse
+import threading
+import multiprocessing as mp
+from collections import deque
+from multiprocessing.connection import Listener, Client, wait
+from typing import Tuple, Optional, List, Dict, Any
+
+from tasks_eye_tracker import EnhancedEyeTracker, EyeData, GazeCalibration, DEFAULT_MODEL_PATH
+from eye_data_store import EyeDataStore
+from frame_sources import CameraSource, VideoFileSource, SyntheticLandmarkSource
+from session_clock import SESSION_CLOCK
+
+# Per-user directory (0700) holding the socket and the authkey files
+if os.environ.get('XDG_RUNTIME_DIR'):
+    RUNTIME_DIR = os.path.join(os.environ['XDG_RUNTIME_DIR'], 'periquest')
+elif hasattr(os, 'getuid'):
+    RUNTIME_DIR = os.path.join(tempfile.gettempdir(), f'periquest-{os.getuid()}')
+else:
+    RUNTIME_DIR = os.path.join(tempfile.gettempdir(), 'periquest')
+
+if sys.platform == 'win32':
+    DEFAULT_ADDRESS = r'\\.\pipe\periquest-tracking'
+else:
+    DEFAULT_ADDRESS = os.path.join(RUNTIME_DIR, 'tracking.sock')
+AUTHKEY_ENV = 'PERIQUEST_TRACKING_KEY'  # hex; overrides the key file
+
+# Message tags (first byte of every payload sent to clients)
+TAG_SAMPLE = b'E'   # packed EyeData
+TAG_EVENT = b'V'    # pickled (kind, event) for blinks, head movements, fixations, saccades
+TAG_REPLY = b'R'    # pickled (request_id, result) for a remote tracker call
+TAG_END = b'X'      # station source finished
+
+# Tracker methods a client may call on its station
+REMOTE_CALLS = ('start_calibration', 'add_calibration_sample', 'finish_calibration',
+                'save_calibration', 'load_calibration', 'set_fixation_algorithm')
+
+def ensure_runtime_dir(path: str = RUNTIME_DIR) -> str:
+    """Create the private runtime directory, refusing one another user controls"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if hasattr(os, 'getuid'):
+        info = os.lstat(path)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+            raise PermissionError(f"{path} is not a directory owned by this user")
+        if info.st_mode & 0o077:
+            os.chmod(path, 0o700)
+    return path
+
+def authkey_path(address: str) -> str:
+    """Key file of the server listening on address"""
+    digest = hashlib.sha1(address.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(RUNTIME_DIR, f'tracking-{digest}.key')
+
+def write_authkey(address: str, authkey: bytes) -> str:
+    """Store a server's key where only this user can read it"""
+    path = authkey_path(address)
+    ensure_runtime_dir()
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(authkey.hex())
+    os.replace(tmp_path, path)
+    return path
+
+def load_authkey(address: str) -> bytes:
+    """Key of the server on address, from PERIQUEST_TRACKING_KEY or its key file"""
+    if os.environ.get(AUTHKEY_ENV):
+        return bytes.fromhex(os.environ[AUTHKEY_ENV])
+    with open(authkey_path(address), encoding='utf-8') as f:
+        return bytes.fromhex(f.read().strip())
+
+# Per-frame wire record: timestamp, gaze x/y, raw gaze x/y, pupil sizes,
+# normalized pupil diameter (NaN when absent), head yaw/pitch/roll,
+# EyeDataStore flag bits (+16 when raw gaze is present)
+SAMPLE = struct.Struct('<d10fB')
+FLAG_HAS_RAW_GAZE = 16
+
+def pack_eye_data(eye_data: EyeData) -> bytes:
+    flags = 0
+    if eye_data.is_fixating:
+        flags |= EyeDataStore.FLAG_FIXATING
+    if eye_data.blink_detected:
+        flags |= EyeDataStore.FLAG_BLINK
+    if eye_data.head_turn_detected:
+        flags |= EyeDataStore.FLAG_HEAD_TURN
+    gaze = eye_data.gaze_point or (0.0, 0.0)
+    raw = eye_data.raw_gaze_point or (0.0, 0.0)
+    if eye_data.gaze_point:
+        flags |= EyeDataStore.FLAG_HAS_GAZE
+    if eye_data.raw_gaze_point:
+        flags |= FLAG_HAS_RAW_GAZE
+    return TAG_SAMPLE + SAMPLE.pack(
+        eye_data.timestamp, gaze[0], gaze[1], raw[0], raw[1],
+        eye_data.left_pupil_size, eye_data.right_pupil_size,
+        math.nan if eye_data.pupil_diameter is None else eye_data.pupil_diameter,
+        eye_data.head_yaw, eye_data.head_pitch, eye_data.head_roll, flags)
+
+def unpack_eye_data(payload: bytes) -> EyeData:
+    (timestamp, gaze_x, gaze_y, raw_x, raw_y, left_pupil, right_pupil, pupil,
+     yaw, pitch, roll, flags) = SAMPLE.unpack_from(payload, 1)
+    return EyeData(
+        timestamp=timestamp,
+        gaze_point=(gaze_x, gaze_y) if flags & EyeDataStore.FLAG_HAS_GAZE else None,
+        raw_gaze_point=(raw_x, raw_y) if flags & FLAG_HAS_RAW_GAZE else None,
+        left_pupil_size=left_pupil,
+        right_pupil_size=right_pupil,
+        pupil_diameter=None if math.isnan(pupil) else pupil,
+        is_fixating=bool(flags & EyeDataStore.FLAG_FIXATING),
+        blink_detected=bool(flags & EyeDataStore.FLAG_BLINK),
+        head_turn_detected=bool(flags & EyeDataStore.FLAG_HEAD_TURN),
+        head_yaw=yaw, head_pitch=pitch, head_roll=roll,
+    )
+
+# ==================== STATION WORKER ====================
+def build_station_source(spec: str):
+    """Frame source from a station spec: camera index, 'synthetic' or a video path
+
+    Recorded and synthetic sources are stamped from now on the session
+    clock, so clients see the same timeline as from a live camera.
+    """
+    if spec.isdigit():
+        return CameraSource(int(spec))
+    if spec == 'synthetic':
+        return SyntheticLandmarkSource(duration=24 * 3600, start_time=SESSION_CLOCK.now())
+    return VideoFileSource(spec, start_time=SESSION_CLOCK.now())
+
+def _event_lists(tracker: EnhancedEyeTracker) -> Dict[str, list]:
+    return {
+        'blinks': tracker.blinks,
+        'head_movements': tracker.head_movements,
+        'fixations': tracker.fixations,
+        'saccades': tracker.saccades,
+    }
+
+def _station_worker(station_id: str, spec: str, model_path: str, conn, stop_event):
+    """Process entry point: track one station and stream results up the pipe"""
+    source = build_station_source(spec)
+    tracker = EnhancedEyeTracker(source=source, model_path=model_path)
+    if not tracker.initialize_camera():
+        print(f"✗ Station {station_id}: could not open source {spec}")
+        conn.send_bytes(TAG_END)
+        return
+
+    events = _event_lists(tracker)
+    sent = {kind: 0 for kind in events}
+    print(f"✓ Station {station_id} tracking {spec} (pid {os.getpid()})")
+    try:
+        while not stop_event.is_set() and not tracker.end_of_source:
+            # Remote calls are served between frames so the tracker stays single-threaded
+            while conn.poll():
+                request_id, method, args = conn.recv()
+                try:
+                    result = getattr(tracker, method)(*args)
+                except Exception as e:
+                    result = e
+                conn.send_bytes(TAG_REPLY + pickle.dumps((request_id, result)))
+
+            eye_data = tracker.get_eye_data()
+            if eye_data is not None:
+                conn.send_bytes(pack_eye_data(eye_data))
+            for kind, items in events.items():
+                while sent[kind] < len(items):
+                    conn.send_bytes(TAG_EVENT + pickle.dumps((kind, items[sent[kind]])))
+                    sent[kind] += 1
+
+            if not source.is_live:
+                # Recorded sources are replayed in real time
+                lead = source.start_time + source.frame_index / source.fps - SESSION_CLOCK.now()
+                if lead > 0:
+                    time.sleep(lead)
+    except (BrokenPipeError, EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        tracker.release()
+        try:
+            conn.send_bytes(TAG_END)
+        except (BrokenPipeError, OSError):
+            pass
+
+# ==================== SERVER ====================
+class _ClientWriter:
+    """Sends one client's payloads on its own thread
+
+    The hub only queues, so a client that stops reading never blocks the
+    hub or the other stations. Eye samples are coalesced to the newest one
+    (a slow reader skips frames); replies, events and end markers are kept
+    in order. send() returns False once the client is gone or has more than
+    MAX_QUEUED of them waiting, i.e. has stopped reading.
+    """
+
+    MAX_QUEUED = 1000
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.closed = False  # no more payloads accepted
+        self._dropped = False
+        self._finished = False
+        self._sample: Optional[bytes] = None
+        self._queue = deque()
+        self._condition = threading.Condition()
+        threading.Thread(target=self._run, name="tracking-client-writer", daemon=True).start()
+
+    def send(self, payload: bytes) -> bool:
+        with self._condition:
+            if self.closed:
+                return False
+            if payload[:1] == TAG_SAMPLE:
+                self._sample = payload
+            elif len(self._queue) >= self.MAX_QUEUED:
+                return False
+            else:
+                self._queue.append(payload)
+            self._condition.notify()
+        return True
+
+    def close(self, flush: bool = True):
+        """Close the connection once the queued payloads are sent (dropped unless flush)"""
+        with self._condition:
+            self.closed = self._dropped = True
+            self._sample = None
+            if not flush:
+                self._queue.clear()
+            self._condition.notify()
+            finished = self._finished
+        if finished:
+            self.conn.close()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and self._sample is None and not self.closed:
+                    self._condition.wait()
+                if self._queue:
+                    payload = self._queue.popleft()
+                elif self._sample is not None:
+                    payload, self._sample = self._sample, None
+                else:
+                    break
+            try:
+                self.conn.send_bytes(payload)
+            except OSError:
+                break
+        # The hub may still be waiting on the connection until it drops the client
+        with self._condition:
+            self.closed = self._finished = True
+            dropped = self._dropped
+        if dropped:
+            self.conn.close()
+
+class TrackingServer:
+    """Runs one tracking process per station and fans their streams out to clients
+
+    Clients connect to `address`, send the JSON message ["subscribe",
+    station_id] and then receive that station's tagged payloads. Remote
+    tracker calls (["call", request_id, method, args]) from a subscribed
+    client are forwarded to its station; replies go to all of the station's
+    subscribers and are matched by request id. Malformed requests get an
+    error reply. Each client is written to by its own _ClientWriter, and
+    clients that stop reading are dropped. Without an authkey (from PERIQUEST_TRACKING_KEY) a random
+    one is generated and written to authkey_path(address) for clients.
+    """
+
+    def __init__(self, stations: Dict[str, str], address: str = DEFAULT_ADDRESS,
+                 authkey: Optional[bytes] = None, model_path: str = DEFAULT_MODEL_PATH):
+        self.stations = stations
+        self.address = address
+        if authkey is None and os.environ.get(AUTHKEY_ENV):
+            authkey = bytes.fromhex(os.environ[AUTHKEY_ENV])
+        self.authkey = authkey or os.urandom(32)
+        self.authkey_file: Optional[str] = None
+        self.model_path = model_path
+
+        self.processes: Dict[str, mp.Process] = {}
+        self.station_conns: Dict[str, Any] = {}
+        self.subscribers: Dict[str, List[Any]] = {station_id: [] for station_id in stations}
+        self._pending_clients: List[Any] = []
+        self._clients: Dict[Any, str] = {}
+        self._writers: Dict[Any, _ClientWriter] = {}
+        self._lock = threading.Lock()
+        self._stop_event = mp.Event()
+        self.listener = None
+
+    def start(self):
+        for station_id, spec in self.stations.items():
+            parent_conn, child_conn = mp.Pipe()
+            process = mp.Process(target=_station_worker, name=f"station-{station_id}", daemon=True,
+                                 args=(station_id, spec, self.model_path, child_conn, self._stop_event))
+            process.start()
+            child_conn.close()
+            self.processes[station_id] = process
+            self.station_conns[station_id] = parent_conn
+
+        ensure_runtime_dir()
+        if sys.platform != 'win32' and os.path.exists(self.address):
+            os.unlink(self.address)  # Stale socket from a previous run
+        self.authkey_file = write_authkey(self.address, self.authkey)
+        self.listener = Listener(self.address, authkey=self.authkey)
+        threading.Thread(target=self._accept_loop, name="tracking-accept", daemon=True).start()
+        print(f"✓ Tracking server listening on {self.address} ({len(self.stations)} stations)")
+
+    def _accept_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, mp.AuthenticationError):
+                continue
+            with self._lock:
+                self._writers[conn] = _ClientWriter(conn)
+                self._pending_clients.append(conn)
+
+    def serve_forever(self):
+        """Forward station output to subscribers until every station has finished"""
+        station_by_conn = {conn: station_id for station_id, conn in self.station_conns.items()}
+        try:
+            while station_by_conn and not self._stop_event.is_set():
+                with self._lock:
+                    clients = self._pending_clients + list(self._clients)
+                for conn in wait(list(station_by_conn) + clients, timeout=0.5):
+                    if conn in station_by_conn:
+                        if not self._forward_station(conn, station_by_conn[conn]):
+                            del station_by_conn[conn]
+                    elif conn in self._writers:
+                        self._handle_client(conn)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _forward_station(self, conn, station_id: str) -> bool:
+        try:
+            payload = conn.recv_bytes()
+        except (EOFError, OSError):
+            payload = TAG_END
+        for client in list(self.subscribers[station_id]):
+            if not self._writers[client].send(payload):
+                print(f"⚠ Dropping a client of station {station_id} that stopped reading")
+                self._drop_client(client, flush=False)
+        if payload == TAG_END:
+            print(f"✓ Station {station_id} finished")
+            return False
+        return True
+
+    def _reply(self, conn, request_id: Optional[str], result: Any):
+        if not self._writers[conn].send(TAG_REPLY + pickle.dumps((request_id, result))):
+            self._drop_client(conn, flush=False)
+
+    def _handle_client(self, conn):
+        try:
+            message = json.loads(conn.recv_bytes())
+        except (EOFError, OSError):
+            self._drop_client(conn)
+            return
+        except ValueError:
+            self._reply(conn, None, ValueError("Request is not valid JSON"))
+            return
+
+        if not isinstance(message, list) or not message or not all(isinstance(part, str) for part in message[:3]):
+            self._reply(conn, None, ValueError(f"Malformed request: {message!r:.80}"))
+        elif message[0] == 'subscribe':
+            if len(message) != 2:
+                self._reply(conn, None, ValueError("Expected [\"subscribe\", station_id]"))
+            elif conn in self._clients:
+                self._reply(conn, None, ValueError(f"Already subscribed to station '{self._clients[conn]}'"))
+            elif message[1] not in self.subscribers:
+                self._reply(conn, None, KeyError(f"Unknown station '{message[1]}'"))
+                self._drop_client(conn)
+            else:
+                station_id = message[1]
+                with self._lock:
+                    self._pending_clients.remove(conn)
+                    self._clients[conn] = station_id
+                self.subscribers[station_id].append(conn)
+                self._reply(conn, None, True)
+        elif message[0] == 'call':
+            if len(message) != 4 or not isinstance(message[3], list):
+                self._reply(conn, None, ValueError("Expected [\"call\", request_id, method, args]"))
+                return
+            _, request_id, method, args = message
+            if conn not in self._clients:
+                self._reply(conn, request_id, ValueError("Subscribe to a station first"))
+            elif method not in REMOTE_CALLS:
+                self._reply(conn, request_id, AttributeError(method))
+            else:
+                try:
+                    self.station_conns[self._clients[conn]].send((request_id, method, args))
+                except OSError as e:
+                    self._reply(conn, request_id, e)
+        else:
+            self._reply(conn, None, ValueError(f"Unknown request '{message[0]}'"))
+
+    def _drop_client(self, conn, flush: bool = True):
+        """Forget a client; its writer closes the connection (after sending what's queued if flush)"""
+        with self._lock:
+            station_id = self._clients.pop(conn, None)
+            if conn in self._pending_clients:
+                self._pending_clients.remove(conn)
+            writer = self._writers.pop(conn, None)
+        if station_id is not None and conn in self.subscribers[station_id]:
+            self.subscribers[station_id].remove(conn)
+        if writer is not None:
+            writer.close(flush)
+
+    def stop(self):
+        self._stop_event.set()
+        for process in self.processes.values():
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        with self._lock:
+            writers = list(self._writers.values())
+            self._writers.clear()
+        for writer in writers:
+            writer.close()
+        if self.listener:
+            self.listener.close()
+            self.listener = None
+        if self.authkey_file and os.path.exists(self.authkey_file):
+            os.unlink(self.authkey_file)
+            self.authkey_file = None
+
+# ==================== CLIENT ====================
+class TrackingClient:
+    """Subscribes to one station; stands in for EnhancedEyeTracker in the game
+
+    A background thread drains the connection as payloads arrive, so the
+    server never backs up behind a game that isn't asking for eye data
+    (instructions, pause, results, report generation). get_eye_data()
+    returns the newest sample received since the last call (None if nothing
+    new). Event lists fill as the station emits events; calibration calls
+    run on the station's tracker.
+    """
+
+    def __init__(self, station_id: str, address: str = DEFAULT_ADDRESS,
+                 authkey: Optional[bytes] = None, call_timeout: float = 5.0):
+        self.station_id = station_id
+        self.address = address
+        self.authkey = authkey
+        self.call_timeout = call_timeout
+        self.conn = None
+        self.end_of_source = False
+        self.current_frame = None
+
+        # Mirrors the station's calibration state (the mapping lives on the station)
+        self.calibration = GazeCalibration()
+        self.last_eye_data: Optional[EyeData] = None
+        self.blinks: List = []
+        self.head_movements: List = []
+        self.fixations: List = []
+        self.saccades: List = []
+        self._request_counter = 0
+        self._returned: Optional[EyeData] = None
+        self._replies: Dict[str, Any] = {}
+        self._waiting: set = set()
+        self._condition = threading.Condition()
+        self._reader: Optional[threading.Thread] = None
+        self._reading = False
+        self._stop = threading.Event()
+
+    def initialize_camera(self) -> bool:
+        """Connect and subscribe to the station"""
+        try:
+            authkey = self.authkey or load_authkey(self.address)
+            self.conn = Client(self.address, authkey=authkey)
+            self.conn.send_bytes(json.dumps(['subscribe', self.station_id]).encode('utf-8'))
+            _, result = pickle.loads(self.conn.recv_bytes()[1:])
+        except (OSError, EOFError, ValueError, mp.AuthenticationError) as e:
+            print(f"✗ Could not reach tracking server at {self.address}: {e}")
+            self.conn = None
+            return False
+        if isinstance(result, Exception):
+            print(f"✗ Tracking server: {result}")
+            self.conn = None
+            return False
+        self._stop.clear()
+        self._reading = True
+        self._reader = threading.Thread(target=self._read_loop, name="tracking-client-reader", daemon=True)
+        self._reader.start()
+        print(f"✓ Subscribed to station {self.station_id}")
+        return True
+
+    def _read_loop(self):
+        conn = self.conn
+        try:
+            while not self._stop.is_set():
+                if conn.poll(0.1):
+                    self._handle_payload(conn.recv_bytes())
+        except (EOFError, OSError):
+            self.end_of_source = True
+        with self._condition:
+            self._reading = False
+            self._condition.notify_all()
+
+    def _handle_payload(self, payload: bytes):
+        tag = payload[:1]
+        if tag == TAG_SAMPLE:
+            self.last_eye_data = unpack_eye_data(payload)
+        elif tag == TAG_EVENT:
+            kind, event = pickle.loads(payload[1:])
+            getattr(self, kind).append(event)
+        elif tag == TAG_END:
+            self.end_of_source = True
+        elif tag == TAG_REPLY:
+            request_id, result = pickle.loads(payload[1:])
+            with self._condition:
+                # Replies go to every subscriber of the station; keep only ours
+                if request_id in self._waiting:
+                    self._replies[request_id] = result
+                    self._condition.notify_all()
+
+    def get_eye_data(self) -> Optional[EyeData]:
+        eye_data = self.last_eye_data
+        if eye_data is self._returned:
+            return None
+        self._returned = eye_data
+        return eye_data
+
+    def get_current_frame(self):
+        # Camera frames stay on the station
+        return None
+
+    def _call(self, method: str, *args):
+        """Run a tracker method on the station and wait for its result"""
+        if self.conn is None or not self._reading:
+            return None
+        self._request_counter += 1
+        request_id = f"{os.getpid()}-{id(self)}-{self._request_counter}"
+        with self._condition:
+            self._waiting.add(request_id)
+        try:
+            self.conn.send_bytes(json.dumps(['call', request_id, method, list(args)]).encode('utf-8'))
+            with self._condition:
+                self._condition.wait_for(lambda: request_id in self._replies or not self._reading,
+                                         timeout=self.call_timeout)
+        except OSError:
+            pass
+        with self._condition:
+            self._waiting.discard(request_id)
+            if request_id not in self._replies:
+                print(f"✗ Station {self.station_id} did not answer {method}")
+                return None
+            result = self._replies.pop(request_id)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def start_calibration(self):
+        self._call('start_calibration')
+        self.calibration.is_calibrated = False
+
+    def add_calibration_sample(self, target: Tuple[float, float]) -> bool:
+        return bool(self._call('add_calibration_sample', tuple(target)))
+
+    def finish_calibration(self) -> Optional[float]:
+        error = self._call('finish_calibration')
+        self.calibration.is_calibrated = error is not None
+        return error
+
+    def save_calibration(self, patient_id: str):
+        self._call('save_calibration', patient_id)
+
+    def load_calibration(self, patient_id: str) -> bool:
+        loaded = bool(self._call('load_calibration', patient_id))
+        self.calibration.is_calibrated = loaded
+        return loaded
+
+    def set_fixation_algorithm(self, algorithm: str):
+        self._call('set_fixation_algorithm', algorithm)
+
+    @property
+    def total_blinks(self) -> int:
+        return len(self.blinks)
+
+    def release(self):
+        if self.conn is not None:
+            self._stop.set()
+            if self._reader is not None:
+                self._reader.join()
+                self._reader = None
+            self.conn.close()
+            self.conn = None
+
+# ==================== MAIN ====================
+def parse_station(text: str) -> Tuple[str, str]:
+    station_id, sep, spec = text.partition('=')
+    if not sep or not station_id or not spec:
+        raise argparse.ArgumentTypeError(f"expected STATION=SOURCE, got '{text}'")
+    return station_id, spec
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve eye tracking for several PeriQuest stations")
+    parser.add_argument('--station', type=parse_station, action='append', required=True,
+                        help="STATION=SOURCE where SOURCE is a camera index, 'synthetic' or a video file")
+    parser.add_argument('--address', default=DEFAULT_ADDRESS)
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    args = parser.parse_args()
+
+    stations = dict(args.station)
+    if len(stations) != len(args.station):
+        parser.error("station IDs must be unique")
+
+    server = TrackingServer(stations, address=args.address, model_path=args.model)
+    server.start()
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
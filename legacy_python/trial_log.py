@@ -0,0 +1,166 @@
+"""
+Binary Trial Log for PeriQuest
+Fixed-width per-trial records, read back as NumPy arrays through a memory map
+
+A trial log is a 16-byte header (magic, record size) followed by packed
+TRIAL_DTYPE records, one per trial outcome: the stimulus (id, visual field,
+shape, size, position, level, target or distractor), its onset on the
+session clock, the outcome, the reaction time and the gaze position at
+onset. False alarms are records without a stimulus, timed at the press.
+Records are fixed-width, so a reader maps the file and views it as a
+structured array without parsing or copying, and a torn record at the end
+of a crashed session is simply not counted.
+
+Usage:
+    python trial_log.py session_logs/
+"""
+
+import os
+import sys
+import numpy as np
+from typing import Optional, Tuple, Dict, Iterator, Any
+
+MAGIC = b'PQTRIAL1'
+HEADER_SIZE = 16
+
+# Code tables for the one-byte columns (values of the game's enums)
+FIELDS = ('left', 'right', 'top', 'bottom', 'top_left', 'top_right', 'bottom_left', 'bottom_right')
+TYPES = ('circle', 'square', 'triangle', 'star')
+OUTCOMES = ('correct', 'missed', 'gaze_invalid', 'false_positive')
+NONE = 255  # field/type code of false alarms
+
+CORRECT, MISSED, GAZE_INVALID, FALSE_POSITIVE = range(len(OUTCOMES))
+
+TRIAL_DTYPE = np.dtype([
+    ('time', '<f8'),       # onset (press time for false alarms), session clock seconds
+    ('stimulus', '<i4'),   # stimulus id, -1 for false alarms
+    ('field', 'u1'),       # index into FIELDS
+    ('type', 'u1'),        # index into TYPES
+    ('level', 'u1'),
+    ('outcome', 'u1'),     # index into OUTCOMES
+    ('target', 'u1'),
+    ('size', '<u2'),       # px
+    ('x', '<u2'),
+    ('y', '<u2'),
+    ('rt_ms', '<f4'),      # NaN unless answered
+    ('gaze_x', '<f4'),     # normalized gaze at onset, NaN if unknown
+    ('gaze_y', '<f4'),
+])  # 35 bytes per trial
+
+_FIELD_CODES = {name: code for code, name in enumerate(FIELDS)}
+_TYPE_CODES = {name: code for code, name in enumerate(TYPES)}
+_OUTCOME_CODES = {name: code for code, name in enumerate(OUTCOMES)}
+
+def _header() -> bytes:
+    return MAGIC + TRIAL_DTYPE.itemsize.to_bytes(4, 'little') + bytes(4)
+
+class TrialLogWriter:
+    """Appends trial records to a log file, a chunk of CHUNK records at a time"""
+
+    CHUNK = 32
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(_header())
+            self._file.flush()
+        self._buffer = np.zeros(self.CHUNK, dtype=TRIAL_DTYPE)
+        self._pending = 0
+
+    def append(self, time: float, outcome: str, stimulus: int = -1, field: Optional[str] = None,
+               type: Optional[str] = None, level: int = 0, target: bool = False, size: int = 0,
+               position: Tuple[int, int] = (0, 0), rt_ms: Optional[float] = None,
+               gaze: Optional[Tuple[float, float]] = None):
+        record = self._buffer[self._pending]
+        record['time'] = time
+        record['stimulus'] = stimulus
+        record['field'] = NONE if field is None else _FIELD_CODES[field]
+        record['type'] = NONE if type is None else _TYPE_CODES[type]
+        record['level'] = level
+        record['outcome'] = _OUTCOME_CODES[outcome]
+        record['target'] = target
+        record['size'] = size
+        record['x'], record['y'] = position
+        record['rt_ms'] = np.nan if rt_ms is None else rt_ms
+        record['gaze_x'], record['gaze_y'] = gaze if gaze is not None else (np.nan, np.nan)
+        self._pending += 1
+        if self._pending == self.CHUNK:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._file.write(self._buffer[:self._pending].tobytes())
+            self._pending = 0
+        self._file.flush()
+
+    def tell(self) -> int:
+        """Bytes written so far (call after flush())"""
+        return self._file.tell()
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+def read_trials(path: str) -> np.ndarray:
+    """All complete records of a trial log as a read-only structured array (memory-mapped, no copy)"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or header[:8] != MAGIC:
+        raise ValueError(f"{path} is not a PeriQuest trial log")
+    record_size = int.from_bytes(header[8:12], 'little')
+    if record_size != TRIAL_DTYPE.itemsize:
+        raise ValueError(f"{path} has {record_size}-byte records, expected {TRIAL_DTYPE.itemsize}")
+    count = (size - HEADER_SIZE) // record_size
+    if count == 0:
+        return np.zeros(0, dtype=TRIAL_DTYPE)
+    return np.memmap(path, dtype=TRIAL_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+def summarize_trials(trials: np.ndarray) -> Dict[str, Any]:
+    """Outcome counts and per-field accuracy and mean reaction time, computed over whole columns"""
+    outcomes = np.bincount(trials['outcome'], minlength=len(OUTCOMES))
+    stimulus_trials = trials[trials['outcome'] != FALSE_POSITIVE]
+    correct = stimulus_trials['outcome'] == CORRECT
+    fields = stimulus_trials['field']
+    totals = np.bincount(fields, minlength=len(FIELDS))[:len(FIELDS)]
+    hits = np.bincount(fields[correct], minlength=len(FIELDS))[:len(FIELDS)]
+    rt_sums = np.bincount(fields[correct], weights=stimulus_trials['rt_ms'][correct],
+                          minlength=len(FIELDS))[:len(FIELDS)]
+    rts = stimulus_trials['rt_ms'][correct]
+    return {
+        **{name: int(outcomes[code]) for code, name in enumerate(OUTCOMES)},
+        "mean_rt_ms": float(rts.mean()) if rts.size else 0.0,
+        "median_rt_ms": float(np.median(rts)) if rts.size else 0.0,
+        "field_accuracy": {name: float(hits[i] / totals[i] * 100) for i, name in enumerate(FIELDS) if totals[i]},
+        "field_rt_ms": {name: float(rt_sums[i] / hits[i]) for i, name in enumerate(FIELDS) if hits[i]},
+    }
+
+def iter_session_logs(root: str, name: str = 'trials.bin') -> Iterator[Tuple[str, np.ndarray]]:
+    """(session id, trials) for every session directory under root that has a trial log"""
+    for session_id in sorted(os.listdir(root)):
+        path = os.path.join(root, session_id, name)
+        if os.path.isfile(path):
+            try:
+                yield session_id, read_trials(path)
+            except ValueError as e:
+                print(f"✗ Skipping {path}: {e}")
+
+def main():
+    root = sys.argv[1] if len(sys.argv) > 1 else 'session_logs'
+    print(f"{'session':<36} {'trials':>7} {'correct':>8} {'missed':>7} {'false+':>7} {'mean RT':>8}")
+    for session_id, trials in iter_session_logs(root):
+        summary = summarize_trials(trials)
+        print(f"{session_id:<36} {len(trials):>7} {summary['correct']:>8} {summary['missed']:>7} "
+              f"{summary['false_positive']:>7} {summary['mean_rt_ms']:>8.0f}")
+
+if __name__ == "__main__":
+    main()